@@ -12,6 +12,9 @@ REM 设置QGIS环境
 set QGIS_PATH=E:\Software\QGIS
 set PATH=%QGIS_PATH%\bin;%PATH%
 
+REM QML磁盘缓存按QML文件绝对路径和用户区分，不能在打包机上生成后分发：
+REM 打包后的程序首次启动时自动预热，安装程序也可在安装后执行 main.exe --build-qml-cache
+
 REM 执行PyInstaller命令
 "%QGIS_PATH%\bin\python-qgis.bat" -m PyInstaller -w ^
 --hidden-import pyproj ^
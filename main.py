@@ -4,44 +4,108 @@ QGIS地图显示应用程序 - 重构版
 模块化设计，功能分离
 """
 
+import argparse
+import multiprocessing
 import sys
 import os
 
+# 启动计时器最先导入，计时起点尽量靠近进程启动
+from src.utils.startup_tracer import tracer
+
 # 设置QGIS环境
 from src.config import setup_qgis_environment
 setup_qgis_environment()
 
 # ==================== 导入必要的库 ====================
-from qgis.PyQt.QtWidgets import QApplication
-from qgis.core import QgsApplication
+with tracer.phase("import_modules"):
+    from qgis.PyQt.QtWidgets import QApplication
+    from qgis.core import QgsApplication
+
+    # 导入应用程序模块
+    from src.app import QGISMapApp
+    from src.splash import StartupSplash
+
 
-# 导入应用程序模块
-from src.app import QGISMapApp
+def parse_args(argv):
+    """解析本程序的命令行参数，其余参数交给 Qt"""
+    parser = argparse.ArgumentParser(description="QGIS地图显示应用程序")
+    parser.add_argument("--startup-report", metavar="PATH", default=None,
+                        help="首次渲染完成后将启动各阶段耗时写入 JSON 报告")
+    parser.add_argument("--tracks", metavar="PATH", default=None,
+                        help="读取船位历史（CSV：track,time,lon,lat 或 npz）并进入轨迹回放模式")
+    parser.add_argument("--live-feed", metavar="SOURCE", default=None,
+                        help="实时船位数据源：udp://主机:端口、tcp://主机:端口 或文件路径")
+    parser.add_argument("--build-qml-cache", action="store_true",
+                        help="在当前安装位置预热QML磁盘缓存后退出（供安装程序在安装后执行）")
+    return parser.parse_known_args(argv)
+
+def build_qml_cache(qt_args) -> int:
+    """以与正常启动相同的应用名编译安装目录下的 QML，写入当前用户的QML磁盘缓存"""
+    from PyQt5.QtQml import QQmlEngine
+    from src.utils.qml_cache import warm_qml_cache
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    qgs = QgsApplication([], False)
+    engine = QQmlEngine()
+    results = warm_qml_cache(engine)
+    for path, ok, elapsed_ms, errors in results:
+        print(f"{os.path.basename(path):<16} {'OK' if ok else '失败':<4} {elapsed_ms:8.1f}ms")
+        for error in errors:
+            print(f"    {error}")
+    del engine
+    del qgs, app
+    return 0 if results and all(ok for _, ok, _, _ in results) else 1
 
 def main():
     """主函数"""
+    args, qt_args = parse_args(sys.argv[1:])
+    if args.build_qml_cache:
+        return build_qml_cache(qt_args)
     print("启动QGIS地图应用程序...")
+    tracer.report_path = args.startup_report
     
     # 创建Qt应用程序
-    app = QApplication(sys.argv)
+    with tracer.phase("qt_application"):
+        app = QApplication(sys.argv[:1] + qt_args)
+    
+    # 在初始化QGIS之前显示启动画面，首次完整渲染地图后自动关闭
+    splash = StartupSplash()
+    with tracer.phase("splash"):
+        splash.show()
     
     # 初始化QGIS
-    qgs = QgsApplication([], False)
-    qgs.initQgis()
+    with tracer.phase("init_qgis"):
+        qgs = QgsApplication([], False)
+        qgs.initQgis()
     
     print("QGIS初始化完成")
     
     # 创建并初始化地图应用
     map_app = QGISMapApp()
-    if not map_app.initialize():
+    with tracer.phase("app_initialize"):
+        initialized = map_app.initialize()
+    if not initialized:
         print("[ERROR] 应用程序初始化失败")
+        splash.close()
+        tracer.finish()
         return 1
     
+    if args.live_feed:
+        map_app.start_live_feed(args.live_feed)
+    if args.tracks:
+        map_app.start_playback(args.tracks)
+    
     print("应用程序启动完成，进入事件循环...")
     
     # 运行应用程序
     exit_code = app.exec()
     
+    # 首次渲染未完成就退出时，仍输出已记录的启动耗时
+    tracer.finish()
+    
+    # 释放应用资源
+    map_app.shutdown()
+    
     # 清理QGIS
     qgs.exitQgis()
     
@@ -49,5 +113,7 @@ def main():
     return exit_code
 
 if __name__ == "__main__":
+    # 打包后的程序中，巡航路线优化的子进程需要
+    multiprocessing.freeze_support()
     exit_code = main()
     sys.exit(exit_code)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+元瓦片渲染基准测试 - 对比逐个渲染 256px 瓦片与一次渲染 N x N 元瓦片再切分的吞吐量
+
+在同一块瓦片区域（边长为所有元瓦片尺寸的公倍数）上，依次以 1x1、4x4、8x8 元瓦片
+渲染全部瓦片，每次渲染使用一个 QgsMapRendererParallelJob，统计：
+- render：仅渲染和切分的 瓦片/秒
+- png：再加上逐瓦片 PNG 编码（瓦片服务实际的输出）的 瓦片/秒
+
+图层按 quick-qgis-tiles 的方式加载（示例数据、--data 矢量文件、--basemap 底图）。
+默认不加载底图，避免网络下载影响结果；指定底图时先用 quick-qgis-seed 预下载更稳定。
+
+用法：
+    python scripts/bench_metatile.py --zoom 7 --tiles 16
+    python scripts/bench_metatile.py --data data/ships.csv --sizes 1,2,4,8 --repeat 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.headless import HeadlessCanvas, _add_layer_arguments, _init_qgis, _load_layers
+from src.utils.tile_math import lonlat_to_tile
+
+DEFAULT_CENTER = (116.0, 32.0)  # 覆盖示例城市数据
+
+
+def _parse_sizes(text: str):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def render_region(layers, z: int, x0: int, y0: int, tiles: int, size: int, encode: bool) -> float:
+    """以 size x size 元瓦片渲染 tiles x tiles 区域，返回耗时（秒）"""
+    # 延迟导入：依赖已初始化的 QGIS 环境
+    from qgis.core import QgsMapRendererParallelJob
+    from src.core.map_engine import metatile_map_settings, slice_metatile
+    from src.services.tile_server import encode_png
+
+    start = time.perf_counter()
+    for y in range(y0, y0 + tiles, size):
+        for x in range(x0, x0 + tiles, size):
+            job = QgsMapRendererParallelJob(metatile_map_settings(layers, z, x, y, size))
+            job.start()
+            job.waitForFinished()
+            images = slice_metatile(job.renderedImage(), x, y, size)
+            if encode:
+                for image in images.values():
+                    encode_png(image)
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="元瓦片渲染基准测试")
+    _add_layer_arguments(parser)
+    parser.set_defaults(basemap="NONE")
+    parser.add_argument("--zoom", type=int, default=7, help="缩放级别")
+    parser.add_argument("--center", default=f"{DEFAULT_CENTER[0]},{DEFAULT_CENTER[1]}",
+                        help="区域中心经纬度 lon,lat")
+    parser.add_argument("--tiles", type=int, default=16, help="区域边长（瓦片数，需为各元瓦片尺寸的倍数）")
+    parser.add_argument("--sizes", type=_parse_sizes, default=[1, 4, 8], help="元瓦片尺寸列表，如 1,4,8")
+    parser.add_argument("--repeat", type=int, default=1, help="每种尺寸重复次数（取最好成绩）")
+    args = parser.parse_args(argv)
+
+    world = 1 << args.zoom
+    for size in args.sizes:
+        if size < 1 or args.tiles % size:
+            parser.error(f"--tiles {args.tiles} 不是元瓦片尺寸 {size} 的倍数")
+    if args.tiles > world:
+        parser.error(f"缩放级别 {args.zoom} 只有 {world} x {world} 个瓦片")
+
+    lon, lat = (float(v) for v in args.center.split(","))
+    cx, cy = lonlat_to_tile(lon, lat, args.zoom)
+    # 区域左上角按最大元瓦片对齐，并保持在世界范围内
+    align = max(args.sizes)
+    x0 = min(max(0, cx - args.tiles // 2), world - args.tiles) // align * align
+    y0 = min(max(0, cy - args.tiles // 2), world - args.tiles) // align * align
+
+    qgs = _init_qgis()
+    layer_manager = None
+    try:
+        canvas = HeadlessCanvas()
+        layer_manager = _load_layers(canvas, args, "元瓦片基准")
+        layers = canvas.layers()
+        count = args.tiles * args.tiles
+        print(f"z={args.zoom} 区域 x={x0}..{x0 + args.tiles - 1} y={y0}..{y0 + args.tiles - 1}，"
+              f"{count} 个瓦片，{len(layers)} 个图层")
+
+        render_region(layers, args.zoom, x0, y0, min(args.tiles, align), align, False)  # 预热
+        baseline = None
+        for size in args.sizes:
+            results = []
+            for encode in (False, True):
+                elapsed = min(
+                    render_region(layers, args.zoom, x0, y0, args.tiles, size, encode)
+                    for _ in range(max(1, args.repeat))
+                )
+                results.append(count / elapsed)
+            if baseline is None:
+                baseline = results[0]
+            renders = count // (size * size)
+            print(f"{size}x{size:<3} 渲染 {renders:5d} 次  render {results[0]:8.1f} 瓦片/秒 "
+                  f"(x{results[0] / baseline:4.1f})  png {results[1]:8.1f} 瓦片/秒")
+        return 0
+    finally:
+        if layer_manager:
+            layer_manager.cancel_loading()
+            layer_manager.shutdown()
+        qgs.exitQgis()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+QML叠加层帧时间基准测试 - 对比两个独立 QQuickWidget 与单个合并场景的重绘耗时
+
+- split：顶部控制条和右下角工具栏各用一个 QQuickWidget（各自的 QML 引擎与离屏渲染目标）
+- merged：overlay.qml 在一个 QQuickWidget 中同时加载两者
+
+每帧先处理挂起事件，再同步重绘整个窗口（地图画布 + 叠加层合成）。
+status 场景在每帧更新状态文本，使 QML 场景本身也需要重新渲染。
+
+用法：
+    python scripts/bench_overlay.py --frames 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qgis.PyQt.QtCore import Qt, QUrl
+from qgis.PyQt.QtWidgets import QApplication, QVBoxLayout, QWidget
+from PyQt5.QtQuick import QQuickWindow
+from PyQt5.QtQuickWidgets import QQuickWidget
+from qgis.core import QgsApplication, QgsProject
+from qgis.gui import QgsMapCanvas
+
+from src.bridge import QmlBridge
+from src.constants import OVERLAY_QML
+from src.core.data_manager import DataManager
+from src.utils.stats import RollingHistogram
+
+UI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ui")
+TOOLS_W, TOOLS_H, TOOLS_MARGIN = 56, 314, 16
+
+
+def make_quick_widget(parent, bridge, qml_file: str) -> QQuickWidget:
+    """创建与应用相同设置的透明 QQuickWidget"""
+    widget = QQuickWidget(parent)
+    widget.setResizeMode(QQuickWidget.SizeRootObjectToView)
+    widget.setAttribute(Qt.WA_TranslucentBackground)
+    widget.setClearColor(Qt.transparent)
+    widget.setAttribute(Qt.WA_AlwaysStackOnTop)
+    widget.rootContext().setContextProperty("qgisBridge", bridge)
+    widget.setSource(QUrl.fromLocalFile(os.path.join(UI_DIR, qml_file)))
+    return widget
+
+
+def build_window(mode: str, bridge):
+    """创建带示例数据画布和叠加层的窗口"""
+    window = QWidget()
+    window.resize(1000, 700)
+    layout = QVBoxLayout(window)
+    canvas = QgsMapCanvas(window)
+    layout.addWidget(canvas)
+
+    manager = DataManager(None)
+    layers = manager._build_sample_layers()
+    QgsProject.instance().addMapLayers(layers)
+    canvas.setLayers(layers)
+    canvas.setExtent(layers[0].extent())
+
+    window.show()
+    QApplication.processEvents()
+    width, height = canvas.width(), canvas.height()
+    if mode == "split":
+        header = make_quick_widget(canvas, bridge, "main.qml")
+        header.setGeometry(0, 0, width, 60)
+        tools = make_quick_widget(canvas, bridge, "tools.qml")
+        tools.setGeometry(width - TOOLS_W - TOOLS_MARGIN * 2, height - TOOLS_H - TOOLS_MARGIN * 2,
+                          TOOLS_W + TOOLS_MARGIN * 2, TOOLS_H + TOOLS_MARGIN * 2)
+        overlays = [header, tools]
+    else:
+        overlay = make_quick_widget(canvas, bridge, OVERLAY_QML)
+        overlay.setGeometry(0, 0, width, height)
+        overlays = [overlay]
+    for overlay in overlays:
+        overlay.show()
+        overlay.raise_()
+    return window, canvas, overlays, layers
+
+
+def measure(window, bridge, frames: int, update_status: bool) -> RollingHistogram:
+    """逐帧同步重绘窗口并计时（毫秒）"""
+    times = RollingHistogram(frames)
+    for i in range(frames):
+        start = time.perf_counter()
+        if update_status:
+            bridge.updateStatus(f"第 {i} 帧")
+        QApplication.processEvents()
+        window.repaint()
+        times.add((time.perf_counter() - start) * 1000.0)
+    return times
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="QML叠加层帧时间基准测试")
+    parser.add_argument("--frames", type=int, default=300, help="每个场景的帧数")
+    args = parser.parse_args(argv)
+
+    QQuickWindow.setDefaultAlphaBuffer(True)
+    app = QApplication(sys.argv[:1])
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    bridge = QmlBridge(None)
+    try:
+        for mode in ("split", "merged"):
+            window, canvas, overlays, layers = build_window(mode, bridge)
+            measure(window, bridge, 20, True)  # 预热
+            for label, update_status in (("composite", False), ("status", True)):
+                times = measure(window, bridge, args.frames, update_status)
+                summary = times.summary()
+                print(f"{mode:<7} {label:<10} 平均 {summary['mean']:6.2f}ms  "
+                      f"p50 {summary['p50']:6.2f}ms  p90 {summary['p90']:6.2f}ms  "
+                      f"({len(overlays)} 个 QQuickWidget)")
+            window.close()
+            QgsProject.instance().removeMapLayers([layer.id() for layer in layers])
+            window.deleteLater()
+            QApplication.processEvents()
+    finally:
+        qgs.exitQgis()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+巡航路线优化基准测试 - 随机生成监测站点，输出最近邻初始解与局部搜索在时间预算内的改进过程
+
+只使用大圆距离（不需要 QGIS 和陆地数据）；可与同一站点集的最近邻路线长度对比求解质量。
+
+--check 在带两道隔墙的合成网格上随机放置站点，把距离矩阵中每个穿过陆地的站点对
+与单独做一次 Dijkstra 的结果比较，有不一致时返回非零退出码。
+
+用法：
+    python scripts/bench_route_optimizer.py --stations 500 --budget 3
+    python scripts/bench_route_optimizer.py --stations 200 --max-trip-km 800
+    python scripts/bench_route_optimizer.py --check 200
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.core.route_optimizer import (
+    UNREACHABLE_PENALTY_M, _make_search_grid, build_distance_matrix, grid_distances,
+    nearest_neighbor_tour, optimize_route, tour_length
+)
+from src.utils.geodesy import MEAN_EARTH_RADIUS, distance_matrix_m
+
+
+class WallGrid:
+    """合成导航网格：两道从相对两侧伸出的隔墙，站点之间常需绕行（提供 build_distance_matrix 用到的接口）"""
+
+    def __init__(self, rows: int = 40, cols: int = 60, xmin: float = 120.0, ymax: float = 35.0,
+                 resolution: float = 0.1):
+        self.water = np.ones((rows, cols), dtype=bool)
+        self.water[:rows * 3 // 4, cols // 3] = False
+        self.water[rows // 4:, cols * 2 // 3] = False
+        self.xmin, self.ymax, self.resolution = xmin, ymax, resolution
+
+    def snap(self, lon: float, lat: float):
+        row = int(math.floor((self.ymax - lat) / self.resolution))
+        col = int(math.floor((lon - self.xmin) / self.resolution))
+        rows, cols = self.water.shape
+        if 0 <= row < rows and 0 <= col < cols and self.water[row, col]:
+            return row, col
+        return None
+
+    def random_points(self, count: int, rng):
+        cells = np.argwhere(self.water)
+        picked = cells[rng.choice(len(cells), count, replace=False)]
+        return [(self.xmin + (c + 0.5) * self.resolution, self.ymax - (r + 0.5) * self.resolution)
+                for r, c in picked]
+
+
+def check_matrix(trials: int, stations: int, seed: int) -> int:
+    """距离矩阵与逐对 Dijkstra 对比，返回不一致的试验次数"""
+    grid = WallGrid()
+    search_grid = _make_search_grid(grid.water, grid.ymax, grid.resolution)
+    meters_per_cell = math.radians(grid.resolution) * MEAN_EARTH_RADIUS
+    rng = np.random.default_rng(seed)
+    failed = 0
+    for trial in range(trials):
+        points = grid.random_points(stations, rng)
+        distances, blocked = build_distance_matrix(points, grid, workers=1)
+        great_circle = distance_matrix_m(points)
+        cells = [grid.snap(lon, lat) for lon, lat in points]
+        for i, j in zip(*np.nonzero(np.triu(blocked))):
+            # 东西向步长按所在行缩放，两个方向的网格代价略有不同，矩阵取其中任一方向均可
+            expected = []
+            for source, target in ((cells[i], cells[j]), (cells[j], cells[i])):
+                cost = grid_distances(search_grid, source, [target]).get(target)
+                if cost is None:
+                    expected.append(great_circle[i, j] + UNREACHABLE_PENALTY_M)
+                else:
+                    expected.append(max(great_circle[i, j], cost * meters_per_cell))
+            if not any(math.isclose(distances[i, j], value, rel_tol=1e-9) for value in expected):
+                print(f"试验 {trial}：站点 {i}-{j} 矩阵 {distances[i, j]:.1f} m，"
+                      f"逐对计算 {expected[0]:.1f} / {expected[1]:.1f} m")
+                failed += 1
+                break
+    print(f"距离矩阵检查：{trials} 次试验，{failed} 次不一致")
+    return failed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="巡航路线优化基准测试")
+    parser.add_argument("--stations", type=int, default=500, help="站点数")
+    parser.add_argument("--bbox", default="118,24,126,34", help="站点范围 西,南,东,北")
+    parser.add_argument("--budget", type=float, default=3.0, help="求解时间预算（秒）")
+    parser.add_argument("--max-trip-km", type=float, default=None, help="单航次航程上限（公里）")
+    parser.add_argument("--open", action="store_true", help="不返回起点")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--check", type=int, default=0, metavar="TRIALS",
+                        help="在合成隔墙网格上检查距离矩阵（试验次数），不做求解")
+    args = parser.parse_args(argv)
+    if args.check:
+        return 1 if check_matrix(args.check, 6, args.seed) else 0
+
+    west, south, east, north = (float(v) for v in args.bbox.split(","))
+    rng = np.random.default_rng(args.seed)
+    points = np.column_stack((
+        rng.uniform(west, east, args.stations), rng.uniform(south, north, args.stations)
+    )).tolist()
+
+    distances = distance_matrix_m(points)
+    started = time.perf_counter()
+    baseline = tour_length(nearest_neighbor_tour(distances), distances)
+    print(f"{args.stations} 个站点，最近邻路线 {baseline / 1000:.1f} km "
+          f"({(time.perf_counter() - started) * 1000:.0f}ms)")
+
+    def progress(elapsed, length):
+        print(f"  {elapsed:6.2f}s  {length / 1000:10.1f} km  ({length / baseline * 100:5.1f}% 最近邻)")
+
+    result = optimize_route(
+        points, return_to_depot=not args.open,
+        max_trip_m=args.max_trip_km * 1000 if args.max_trip_km else None,
+        time_budget=args.budget, progress=progress
+    )
+    print(f"结果 {result['length_m'] / 1000:.1f} km，{len(result['trips'])} 个航次，"
+          f"矩阵 {result['matrix_ms']:.0f}ms，求解 {result['solve_ms']:.0f}ms")
+    for i, trip in enumerate(result["trips"], 1):
+        print(f"  航次 {i}: {len(trip) - 1} 段，{tour_length(np.array(trip[:-1]), distances) / 1000:.1f} km"
+              if len(result["trips"]) > 1 else f"  站点顺序: {trip[:10]}...")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
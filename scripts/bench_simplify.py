@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+线简化基准测试 - 随机生成长航迹，统计显著度预计算耗时与各缩放级别保留的顶点数
+
+重绘耗时大致与绘制的顶点数成正比，各级别的顶点数与原始顶点数之比即粗比例尺下重绘工作量的缩减。
+只使用 NumPy（不需要 QGIS）。
+
+用法：
+    python scripts/bench_simplify.py --tracks 20 --points 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.constants import SIMPLIFY_MAX_ZOOM
+from src.core.simplify import SimplificationPyramid
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="线简化基准测试")
+    parser.add_argument("--tracks", type=int, default=20, help="航迹条数")
+    parser.add_argument("--points", type=int, default=200000, help="每条航迹的顶点数")
+    parser.add_argument("--step-deg", type=float, default=0.0002, help="相邻定位点的平均间距（度）")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    pyramid = SimplificationPyramid()
+    started = time.perf_counter()
+    for _ in range(args.tracks):
+        # 带航向惯性的随机游走，近似 GPS 航迹
+        heading = np.cumsum(rng.normal(0.0, 0.05, args.points))
+        lon = rng.uniform(120.0, 124.0) + np.cumsum(np.cos(heading)) * args.step_deg
+        lat = rng.uniform(26.0, 32.0) + np.cumsum(np.sin(heading)) * args.step_deg
+        pyramid.add(np.column_stack((lon, lat)))
+    elapsed = time.perf_counter() - started
+    print(f"{args.tracks} 条航迹，共 {pyramid.vertex_count} 个顶点，显著度预计算耗时 {elapsed:.2f}s")
+
+    for zoom in range(2, SIMPLIFY_MAX_ZOOM):
+        started = time.perf_counter()
+        count = pyramid.level_vertex_count(zoom)
+        elapsed = (time.perf_counter() - started) * 1000.0
+        print(f"级别 {zoom:2d}  容差 {pyramid.tolerances[zoom]:.6f}°  顶点 {count:9d}  "
+              f"({count / pyramid.vertex_count:7.2%})  取出耗时 {elapsed:6.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+轨迹存储基准测试 - 在千万级定位点上模拟拖动时间滑块，统计每帧的查询与绘制耗时
+
+生成 --tracks 条随机游走轨迹、共 --points 个定位点（均匀分布在 --days 天内），
+对不同宽度的时间窗口随机取若干位置，每个位置执行一次回放重绘所需的全部计算：
+窗口点数统计、（抽样）查询、每条轨迹的当前位置、投影并累加为画布大小的图像。
+
+--save 把生成的数据保存为 npz，可直接用于 `python main.py --tracks 文件.npz`。
+
+用法：
+    python scripts/bench_track_store.py --points 10000000
+    python scripts/bench_track_store.py --points 2000000 --save data/tracks_demo.npz
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.constants import TRACK_DRAW_MAX_POINTS, TRACK_HEAD_MAX_AGE
+from src.core.track_playback import _palette, rasterize_tracks
+from src.core.track_store import TrackStore
+from src.utils.stats import RollingHistogram
+
+START_TIME = 1.7e9
+EXTENT = (118.0, 24.0, 128.0, 34.0)  # 绘制范围（经纬度）
+
+
+def make_store(points: int, tracks: int, days: float, seed: int = 42) -> TrackStore:
+    """随机游走轨迹：各轨迹从东海海域内出发，定位时间均匀随机"""
+    rng = np.random.default_rng(seed)
+    store = TrackStore()
+    for index in range(tracks):
+        store.track_id(f"船舶{index:04d}")
+    per_track = points // tracks
+    span = days * 86400.0
+    for track in range(tracks):
+        times = np.sort(rng.uniform(START_TIME, START_TIME + span, per_track))
+        lons = rng.uniform(120.0, 126.0) + np.cumsum(rng.normal(0.0, 0.002, per_track))
+        lats = rng.uniform(26.0, 32.0) + np.cumsum(rng.normal(0.0, 0.002, per_track))
+        store.append_columns(np.full(per_track, track), times, lons, lats)
+    store.time_range()  # 合并暂存数据
+    return store
+
+
+def draw_frame(store, palette, t0: float, t1: float, width: int, height: int) -> int:
+    """与 TrackPlayback._redraw 相同的计算（不含 QImage 与 QPainter），返回绘制的点数"""
+    total = store.count_between(t0, t1)
+    step = max(1, math.ceil(total / TRACK_DRAW_MAX_POINTS))
+    columns = store.query(t0, t1, step, ("lon", "lat", "track"))
+    store.latest_positions(max(t0, t1 - TRACK_HEAD_MAX_AGE), t1)
+    rasterize_tracks(columns["lon"], columns["lat"], columns["track"], EXTENT, width, height, palette)
+    return len(columns["track"])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="轨迹存储与回放重绘基准测试")
+    parser.add_argument("--points", type=int, default=10000000, help="定位点总数")
+    parser.add_argument("--tracks", type=int, default=200, help="轨迹数")
+    parser.add_argument("--days", type=float, default=30.0, help="时间跨度（天）")
+    parser.add_argument("--frames", type=int, default=50, help="每种窗口宽度模拟的帧数")
+    parser.add_argument("--size", default="1600x1000", help="画布像素尺寸")
+    parser.add_argument("--save", default=None, help="把生成的数据保存为 npz")
+    args = parser.parse_args(argv)
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    started = time.perf_counter()
+    store = make_store(args.points, args.tracks, args.days)
+    print(f"生成 {len(store)} 个定位点，{args.tracks} 条轨迹，耗时 {time.perf_counter() - started:.1f}s")
+    if args.save:
+        started = time.perf_counter()
+        store.save(args.save)
+        print(f"已保存 {args.save}，耗时 {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        store = TrackStore.load(args.save)
+        print(f"重新读取耗时 {time.perf_counter() - started:.2f}s")
+
+    palette = _palette()
+    first, last = store.time_range()
+    span = last - first
+    rng = np.random.default_rng(0)
+    for fraction in (0.01, 0.05, 0.25, 1.0):
+        frame_times = RollingHistogram(args.frames)
+        drawn = 0
+        for _ in range(args.frames):
+            t0 = first + rng.uniform(0.0, 1.0 - fraction) * span
+            frame_started = time.perf_counter()
+            drawn = draw_frame(store, palette, t0, t0 + fraction * span, width, height)
+            frame_times.add((time.perf_counter() - frame_started) * 1000.0)
+        summary = frame_times.summary()
+        print(f"窗口 {fraction:5.0%}  绘制 {drawn:8d} 点  每帧 p50 {summary['p50']:6.1f}ms  "
+              f"p90 {summary['p90']:6.1f}ms  max {summary['max']:6.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+QML磁盘缓存预热 - 编译 ui/ 下全部 QML 文件并写入当前用户的 Qt QML 磁盘缓存
+
+缓存按 QML 文件的绝对路径和应用名区分，只对本机、本用户、该 ui 目录有效，不随安装包分发。
+本脚本用于源码运行的开发环境；安装后的程序在首次启动时自动预热，
+安装程序也可在安装后执行 `main.exe --build-qml-cache`（见 src/utils/qml_cache.py）。
+
+用法：
+    python scripts/build_qml_cache.py
+    python scripts/build_qml_cache.py --ui-dir dist/main/ui
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qgis.PyQt.QtWidgets import QApplication
+from PyQt5.QtQml import QQmlEngine
+from qgis.core import QgsApplication
+
+from src.utils.qml_cache import UI_DIR, cache_dir, warm_qml_cache
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="预热QML磁盘缓存")
+    parser.add_argument("--ui-dir", default=UI_DIR, help="QML文件目录")
+    args = parser.parse_args(argv)
+
+    if os.environ.get("QML_DISABLE_DISK_CACHE"):
+        print("[WARN] 已设置 QML_DISABLE_DISK_CACHE，QML磁盘缓存不会生效")
+
+    # 与 main.py 相同的初始化顺序，QgsApplication 决定缓存目录使用的应用名
+    app = QApplication(sys.argv[:1])
+    qgs = QgsApplication([], False)
+    engine = QQmlEngine()
+
+    results = warm_qml_cache(engine, args.ui_dir)
+    if not results:
+        print(f"[ERROR] 目录中没有QML文件: {args.ui_dir}")
+        return 1
+    for path, ok, elapsed_ms, errors in results:
+        print(f"{os.path.basename(path):<16} {'OK' if ok else '失败':<4} {elapsed_ms:8.1f}ms")
+        for error in errors:
+            print(f"    {error}")
+
+    print(f"QML磁盘缓存目录: {cache_dir()}")
+    failed = sum(1 for _, ok, _, _ in results if not ok)
+    del engine
+    del qgs, app
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
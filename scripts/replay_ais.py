@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+船位回放生成器 - 以指定速率发送模拟（或录制的）船位消息，用于测试实时船位图层
+
+- 模拟模式：--vessels 艘船在东海海域内匀速航行，按 --rate（条/秒）轮流发送位置报告，
+  格式为 AIS NMEA（!AIVDM 类型 1）或 JSON Lines；
+- 回放模式：--input 指定录制的消息文件，按 --rate 逐行循环发送；
+- 目标：udp://主机:端口（发送数据报）、tcp://主机:端口（作为服务端等待连接）或文件路径（追加写入）。
+
+消息按 10ms 一批发送，每秒输出一次实际发送速率。接收端：
+
+    python main.py --live-feed udp://0.0.0.0:10110
+
+用法：
+    python scripts/replay_ais.py --vessels 2000 --rate 5000
+    python scripts/replay_ais.py --format json --target data/live.jsonl --rate 1000
+    python scripts/replay_ais.py --input data/ais_recorded.nmea --target tcp://0.0.0.0:10111
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.constants import LIVE_FEED_PORT
+
+AREA = (120.0, 26.0, 126.0, 33.0)  # 模拟船舶所在范围（经度、纬度）
+BATCH_SECONDS = 0.01
+UDP_MAX_DATAGRAM = 1400
+
+
+def _armor(value: int, bits: int) -> str:
+    """按 6 bit 一组编码为 AIS 载荷字符"""
+    chars = []
+    for shift in range(bits - 6, -1, -6):
+        code = (value >> shift) & 0x3F
+        chars.append(chr(code + 48 if code < 40 else code + 56))
+    return "".join(chars)
+
+
+def encode_position_report(mmsi: int, lon: float, lat: float, sog: float, cog: float) -> str:
+    """编码为单句 !AIVDM 消息（类型 1，A 类位置报告）"""
+    fields = (
+        (1, 6), (0, 2), (mmsi, 30), (0, 4), (128, 8), (min(1022, int(sog * 10)), 10), (1, 1),
+        (int(round(lon * 600000)) & ((1 << 28) - 1), 28), (int(round(lat * 600000)) & ((1 << 27) - 1), 27),
+        (int(cog * 10) % 3600, 12), (int(cog) % 360, 9), (int(time.time()) % 60, 6),
+        (0, 2), (0, 3), (0, 1), (0, 19),
+    )
+    value = 0
+    for field, width in fields:
+        value = (value << width) | field
+    body = f"AIVDM,1,1,,A,{_armor(value, 168)},0"
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"!{body}*{checksum:02X}"
+
+
+class SimulatedFleet:
+    """匀速航行的模拟船队，碰到范围边界时掉头"""
+
+    def __init__(self, count: int, seed: int = 42):
+        rng = random.Random(seed)
+        self.vessels = [
+            {
+                "mmsi": 412000000 + i,
+                "lon": rng.uniform(AREA[0], AREA[2]), "lat": rng.uniform(AREA[1], AREA[3]),
+                "sog": rng.uniform(5.0, 18.0), "cog": rng.uniform(0.0, 360.0), "time": time.time(),
+            }
+            for i in range(count)
+        ]
+
+    def advance(self, vessel: dict, now: float):
+        """把船移动到 now 时刻的位置"""
+        hours = (now - vessel["time"]) / 3600.0
+        vessel["time"] = now
+        distance = vessel["sog"] * hours / 60.0  # 海里 -> 度（纬度方向）
+        angle = math.radians(vessel["cog"])
+        lat = vessel["lat"] + distance * math.cos(angle)
+        lon = vessel["lon"] + distance * math.sin(angle) / max(0.1, math.cos(math.radians(lat)))
+        if not (AREA[0] <= lon <= AREA[2] and AREA[1] <= lat <= AREA[3]):
+            vessel["cog"] = (vessel["cog"] + 180.0) % 360.0
+            return
+        vessel["lon"], vessel["lat"] = lon, lat
+
+    def messages(self, message_format: str):
+        """轮流产生各船的位置消息（无限序列）"""
+        for vessel in itertools.cycle(self.vessels):
+            self.advance(vessel, time.time())
+            if message_format == "json":
+                yield json.dumps({
+                    "id": str(vessel["mmsi"]), "lon": round(vessel["lon"], 6), "lat": round(vessel["lat"], 6),
+                    "sog": round(vessel["sog"], 1), "cog": round(vessel["cog"], 1),
+                })
+            else:
+                yield encode_position_report(
+                    vessel["mmsi"], vessel["lon"], vessel["lat"], vessel["sog"], vessel["cog"]
+                )
+
+
+def recorded_messages(path: str):
+    """循环回放录制文件中的消息行"""
+    with open(path, "r", encoding="utf-8", errors="replace") as handle:
+        lines = [line.rstrip("\r\n") for line in handle if line.strip()]
+    if not lines:
+        raise SystemExit(f"录制文件为空：{path}")
+    return itertools.cycle(lines)
+
+
+def _address(target: str, prefix: str):
+    host, _, port = target[len(prefix):].rstrip("/").rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def open_sender(target: str):
+    """返回 (send(lines), close())"""
+    if target.startswith("udp://"):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        address = _address(target, "udp://")
+
+        def send(lines):
+            # 多行合并为不超过 UDP_MAX_DATAGRAM 字节的数据报
+            datagram = b""
+            for line in lines:
+                data = line.encode("ascii") + b"\r\n"
+                if datagram and len(datagram) + len(data) > UDP_MAX_DATAGRAM:
+                    sock.sendto(datagram, address)
+                    datagram = b""
+                datagram += data
+            if datagram:
+                sock.sendto(datagram, address)
+        return send, sock.close
+
+    if target.startswith("tcp://"):
+        server = socket.create_server(_address(target, "tcp://"))
+        print(f"等待接收端连接 {target} ...")
+        conn, peer = server.accept()
+        server.close()
+        print(f"接收端已连接：{peer[0]}:{peer[1]}")
+
+        def send(lines):
+            conn.sendall("".join(line + "\r\n" for line in lines).encode("ascii"))
+        return send, conn.close
+
+    handle = open(target, "a", encoding="utf-8")
+
+    def send(lines):
+        handle.write("".join(line + "\n" for line in lines))
+        handle.flush()
+    return send, handle.close
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="船位消息回放生成器")
+    parser.add_argument("--target", default=f"udp://127.0.0.1:{LIVE_FEED_PORT}",
+                        help="udp://主机:端口、tcp://主机:端口（等待连接）或文件路径")
+    parser.add_argument("--rate", type=float, default=5000, help="每秒发送的消息数")
+    parser.add_argument("--vessels", type=int, default=2000, help="模拟船舶数量")
+    parser.add_argument("--format", choices=("nmea", "json"), default="nmea", help="模拟消息格式")
+    parser.add_argument("--input", default=None, help="回放录制的消息文件（每行一条）")
+    parser.add_argument("--duration", type=float, default=0, help="运行秒数（0 表示一直运行）")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        messages = recorded_messages(args.input)
+    else:
+        messages = SimulatedFleet(args.vessels).messages(args.format)
+    send, close = open_sender(args.target)
+
+    started = last_report = time.perf_counter()
+    sent = reported = 0
+    try:
+        while not args.duration or time.perf_counter() - started < args.duration:
+            # 按累计应发送数量补齐，sleep 的误差不会累积
+            due = int((time.perf_counter() - started) * args.rate) - sent
+            if due > 0:
+                send(list(itertools.islice(messages, due)))
+                sent += due
+            now = time.perf_counter()
+            if now - last_report >= 1.0:
+                print(f"已发送 {sent} 条，最近 {(sent - reported) / (now - last_report):.0f} 条/秒")
+                last_report, reported = now, sent
+            time.sleep(BATCH_SECONDS)
+    except (KeyboardInterrupt, BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        close()
+    print(f"共发送 {sent} 条，平均 {sent / max(1e-9, time.perf_counter() - started):.0f} 条/秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,12 @@
 主应用程序类 - 整合所有模块
 """
 
+from qgis.PyQt.QtCore import QTimer
 from qgis.core import QgsCoordinateReferenceSystem
 from .ui_manager import UIManager
 from .layer_manager import LayerManager
 from .constants import DEFAULT_CRS, DEFAULT_WINDOW_TITLE
+from .utils.startup_tracer import tracer
 
 class QGISMapApp:
     """QGIS地图应用程序主类"""
@@ -26,17 +28,28 @@ class QGISMapApp:
         self.ui_manager = UIManager(self)
         
         # 创建主窗口和画布
-        self.window, self.canvas = self.ui_manager.create_main_window()
+        with tracer.phase("create_main_window"):
+            self.window, self.canvas = self.ui_manager.create_main_window()
         
         if not self.canvas:
             print("[ERROR] 画布创建失败")
             return False
         
         # 创建图层管理器
-        self.layer_manager = LayerManager(self.canvas)
+        with tracer.phase("layer_manager"):
+            self.layer_manager = LayerManager(
+                self.canvas, self.ui_manager.update_status, self.ui_manager.set_loading,
+                self.ui_manager.update_render_stats, self.ui_manager.set_measuring,
+                self.ui_manager.set_playback
+            )
+        
+        # 首次完整渲染（画布上已有图层）视为启动完成
+        tracer.begin("first_render")
+        self.canvas.mapCanvasRefreshed.connect(self._on_canvas_refreshed)
         
         # 设置地图
-        self.setup_map()
+        with tracer.phase("setup_map"):
+            self.setup_map()
         
         print("应用程序初始化完成")
         return True
@@ -54,27 +67,51 @@ class QGISMapApp:
         self.canvas.setDestinationCrs(crs)
         print(f"坐标系统设置为 {DEFAULT_CRS}")
         
-        # 添加示例矢量数据
-        self.layer_manager.add_sample_vector_data()
+        # 在后台线程中加载示例矢量数据，完成后再挂载到画布
+        tracer.begin("sample_data")
+        self.layer_manager.add_sample_vector_data_async(on_done=self._on_vector_data_loaded)
         
         # 设置画布显示范围
         self.layer_manager.set_canvas_extent()
         
-        # 强制刷新画布
-        self.canvas.refresh()
-        print("地图设置完成")
-        
-        # 调试信息
-        self.layer_manager.debug_canvas_status()
+        # 默认加载 OSM 底图（推迟到事件循环启动后，避免阻塞窗口显示）
+        QTimer.singleShot(0, self._load_initial_basemap)
         
-        # 默认加载 OSM 底图
+        # 更新状态
+        self.ui_manager.update_status("正在加载数据...")
+    
+    def _load_initial_basemap(self):
+        """加载初始底图"""
         try:
-            self.load_basemap_by("OSM")
+            with tracer.phase("first_basemap"):
+                self.load_basemap_by("OSM")
         except Exception as e:
             print(f"[WARN] 初始底图加载失败: {e}")
+    
+    def _on_canvas_refreshed(self):
+        """画布渲染完成：第一次带图层的完整渲染结束启动计时"""
+        if not self.canvas.layers():
+            return
+        self.canvas.mapCanvasRefreshed.disconnect(self._on_canvas_refreshed)
+        tracer.end("first_render")
+        tracer.mark("first_map")
+        tracer.finish()
+    
+    def _on_vector_data_loaded(self, layers):
+        """后台矢量数据加载完成（主线程）"""
+        tracer.end("sample_data")
+        # 刷新画布
+        self.refresh_canvas()
+        print("地图设置完成")
+        
+        # 调试信息
+        self.layer_manager.debug_canvas_status()
         
         # 更新状态
-        self.ui_manager.update_status("地图加载完成！")
+        if layers:
+            self.ui_manager.update_status("地图加载完成！")
+        else:
+            self.ui_manager.update_status("数据加载未完成")
     
     def load_basemap_by(self, key: str) -> bool:
         """加载底图（委托给图层管理器）"""
@@ -92,6 +129,11 @@ class QGISMapApp:
         if self.layer_manager:
             self.layer_manager.set_canvas_extent()
 
+    def cancel_loading(self):
+        """取消后台数据加载（委托给图层管理器）"""
+        if self.layer_manager:
+            self.layer_manager.cancel_loading()
+
     def zoom_in(self):
         if self.layer_manager:
             self.layer_manager.zoom_in()
@@ -100,6 +142,39 @@ class QGISMapApp:
         if self.layer_manager:
             self.layer_manager.zoom_out()
     
+    def start_live_feed(self, source: str):
+        """接收实时船位（委托给图层管理器）"""
+        if self.layer_manager:
+            self.layer_manager.start_live_feed(source)
+    
+    def start_playback(self, path: str):
+        """读取船位历史并进入轨迹回放模式（委托给图层管理器）"""
+        if self.layer_manager:
+            self.layer_manager.start_playback(path)
+    
+    def set_playback_window(self, t0: float, t1: float):
+        if self.layer_manager:
+            self.layer_manager.set_playback_window(t0, t1)
+    
+    def toggle_playback(self):
+        if self.layer_manager:
+            self.layer_manager.toggle_playback()
+    
+    def stop_playback(self):
+        if self.layer_manager:
+            self.layer_manager.stop_playback()
+    
+    def toggle_measure(self):
+        """切换测量模式（委托给图层管理器）"""
+        if self.layer_manager:
+            self.layer_manager.toggle_measure()
+    
+    def shutdown(self):
+        """退出前释放资源"""
+        if self.layer_manager:
+            self.layer_manager.cancel_loading()
+            self.layer_manager.shutdown()
+    
     def get_window(self):
         """获取主窗口"""
         return self.window
@@ -4,7 +4,7 @@ QML桥接对象 - 供QML调用的Python接口
 """
 
 
-from qgis.PyQt.QtCore import QObject, pyqtSlot, pyqtSignal
+from qgis.PyQt.QtCore import QObject, pyqtProperty, pyqtSlot, pyqtSignal
 
 
 class QmlBridge(QObject):
@@ -12,10 +12,69 @@ class QmlBridge(QObject):
     
     # 供QML绑定的状态信号
     statusChanged = pyqtSignal(str)
+    # 后台加载状态（True 表示正在加载）
+    loadingChanged = pyqtSignal(bool)
+    # 后台加载进度（0~100，-1 表示进度未知）
+    loadingProgressChanged = pyqtSignal(float)
+    # 渲染性能统计（一行文本）
+    renderStatsChanged = pyqtSignal(str)
+    # 测量模式（True 表示测量工具已启用）
+    measuringChanged = pyqtSignal(bool)
+    # 轨迹回放状态（时间范围、窗口、是否播放）变化
+    playbackChanged = pyqtSignal()
+    # 叠加层中的一个 Loader 完成异步加载（参数为 Loader 的 objectName）
+    overlayLoaded = pyqtSignal(str)
 
     def __init__(self, app_ref):
         super().__init__()
         self._app = app_ref
+        # 保存最新状态，QML 异步加载完成后通过属性绑定取得加载前发出的状态
+        self._status = ""
+        self._loading = False
+        self._loading_progress = -1.0
+        self._measuring = False
+        self._playback = {"active": False, "start": 0.0, "end": 0.0, "t0": 0.0, "t1": 0.0, "playing": False}
+
+    @pyqtProperty(str, notify=statusChanged)
+    def status(self):
+        return self._status
+
+    @pyqtProperty(bool, notify=loadingChanged)
+    def loading(self):
+        return self._loading
+
+    @pyqtProperty(float, notify=loadingProgressChanged)
+    def loadingProgress(self):
+        return self._loading_progress
+
+    @pyqtProperty(bool, notify=measuringChanged)
+    def measuring(self):
+        return self._measuring
+
+    @pyqtProperty(bool, notify=playbackChanged)
+    def playbackActive(self):
+        return self._playback["active"]
+
+    @pyqtProperty(float, notify=playbackChanged)
+    def playbackStart(self):
+        return self._playback["start"]
+
+    @pyqtProperty(float, notify=playbackChanged)
+    def playbackEnd(self):
+        return self._playback["end"]
+
+    @pyqtProperty(float, notify=playbackChanged)
+    def playbackT0(self):
+        return self._playback["t0"]
+
+    @pyqtProperty(float, notify=playbackChanged)
+    def playbackT1(self):
+        return self._playback["t1"]
+
+    @pyqtProperty(bool, notify=playbackChanged)
+    def playing(self):
+        return self._playback["playing"]
+
     #@pyqtSlot：装饰器，标记方法可以被QML调用
     @pyqtSlot(str)
     def switchBasemap(self, key):
@@ -38,8 +97,67 @@ class QmlBridge(QObject):
     @pyqtSlot(str)
     def updateStatus(self, message):
         """由Python调用，通知QML状态变化"""
+        self._status = message
         self.statusChanged.emit(message)
 
+    @pyqtSlot(bool)
+    def setLoading(self, loading):
+        """由Python调用，通知QML后台加载状态变化"""
+        self._loading = loading
+        self.loadingChanged.emit(loading)
+
+    @pyqtSlot(float)
+    def setLoadingProgress(self, percent):
+        """由Python调用，通知QML后台加载进度变化"""
+        self._loading_progress = percent
+        self.loadingProgressChanged.emit(percent)
+
+    @pyqtSlot(bool)
+    def setMeasuring(self, measuring):
+        """由Python调用，通知QML测量模式变化"""
+        self._measuring = measuring
+        self.measuringChanged.emit(measuring)
+
+    @pyqtSlot(bool, float, float, float, float, bool)
+    def setPlayback(self, active, start, end, t0, t1, playing):
+        """由Python调用，通知QML轨迹回放状态变化"""
+        self._playback = {"active": active, "start": start, "end": end, "t0": t0, "t1": t1, "playing": playing}
+        self.playbackChanged.emit()
+
+    @pyqtSlot(float, float)
+    def setPlaybackWindow(self, t0, t1):
+        """由QML调用：拖动时间滑块"""
+        if self._app:
+            self._app.set_playback_window(t0, t1)
+
+    @pyqtSlot()
+    def togglePlayback(self):
+        """播放/暂停轨迹回放"""
+        if self._app:
+            self._app.toggle_playback()
+
+    @pyqtSlot()
+    def closePlayback(self):
+        """退出轨迹回放"""
+        if self._app:
+            self._app.stop_playback()
+
+    @pyqtSlot(str)
+    def updateRenderStats(self, text):
+        """由Python调用，通知QML渲染统计变化"""
+        self.renderStatsChanged.emit(text)
+
+    @pyqtSlot(str)
+    def notifyOverlayLoaded(self, name):
+        """由QML调用，通知叠加层的一部分已加载完成"""
+        self.overlayLoaded.emit(name)
+
+    @pyqtSlot()
+    def cancelLoading(self):
+        """取消后台数据加载"""
+        if self._app:
+            self._app.cancel_loading()
+
     # 视图控制：提供给 QML 调用
     @pyqtSlot()
     def zoomIn(self):
@@ -58,6 +176,12 @@ class QmlBridge(QObject):
             # 这里先简单刷新，如需真正移除图层可在 layer_manager 增加清理函数
             self._app.refresh_canvas()
 
+    @pyqtSlot()
+    def toggleMeasure(self):
+        """切换测量工具"""
+        if self._app:
+            self._app.toggle_measure()
+
     @pyqtSlot()
     def toggleFullscreen(self):
         if self._app and self._app.get_window():
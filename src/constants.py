@@ -3,6 +3,8 @@
 常量定义模块 - 定义应用程序中使用的常量
 """
 
+import os
+
 # 应用程序信息
 APP_NAME = "Quick-QGIS"
 APP_VERSION = "2.0.0"
@@ -13,6 +15,15 @@ DEFAULT_WINDOW_WIDTH = 1000
 DEFAULT_WINDOW_HEIGHT = 700
 DEFAULT_WINDOW_TITLE = f"{APP_NAME} - {APP_VERSION}"
 
+# 启动画面：预渲染图片缓存目录；首次渲染迟迟未完成时最多显示的秒数
+SPLASH_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".quick-qgis", "splash")
+SPLASH_MAX_SECONDS = 30
+
+# QML叠加层：宿主文件，以及其中拦截鼠标的按钮区域（QML 对象的 objectName）
+OVERLAY_QML = "overlay.qml"
+OVERLAY_INPUT_ITEMS = ("headerButtons", "toolsPanel", "timelinePanel")
+QML_CACHE_WARM_DELAY_MS = 3000  # 界面加载完成后多久在安装目录预热QML磁盘缓存（仅在QML文件变化后执行一次）
+
 # 地图设置
 DEFAULT_CRS = "EPSG:4326"  # WGS84坐标系统
 DEFAULT_EXTENT = {
@@ -23,6 +34,9 @@ DEFAULT_EXTENT = {
 }
 
 # 底图配置
+# 在线源使用 "url"（QGIS XYZ 数据源字符串）；离线瓦片包使用
+# "type": "mbtiles" 或 "gpkg" 以及 "path"（包文件路径），例如：
+#     "SEA_CHART": {"name": "离线海图", "type": "mbtiles", "path": r"data/tiles/sea.mbtiles"}
 BASEMAP_SOURCES = {
     "OSM": {
         "name": "OpenStreetMap",
@@ -38,6 +52,87 @@ BASEMAP_SOURCES = {
     }
 }
 
+# 离线瓦片包目录：启动时自动注册其中的 *.mbtiles / *.gpkg 为底图
+OFFLINE_TILE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "tiles")
+TILE_PACKAGE_EXTENSIONS = (".mbtiles", ".gpkg")
+
+# 底图图层池：切换后保留在内存中的底图图层数量（含当前底图）
+BASEMAP_POOL_SIZE = 3
+
+# 瓦片缓存设置
+TILE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".quick-qgis", "tiles")
+TILE_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 磁盘缓存字节上限（512MB）
+TILE_CACHE_LOW_WATERMARK = 0.9  # 淘汰时清理到上限的90%，避免频繁淘汰
+TILE_CACHE_ACCESS_FLUSH_SECONDS = 30.0  # 命中瓦片的访问时间先记在内存中，最长间隔多久批量写回
+TILE_USER_AGENT = f"{APP_NAME}/{APP_VERSION}"
+TILE_FETCH_TIMEOUT = 10  # 上游瓦片请求超时（秒）
+TILE_MAX_REQUESTS_PER_HOST = 4  # 每个上游主机的并发下载上限
+
+# 本机瓦片渲染服务：把项目图层渲染为XYZ瓦片供其他工具使用
+TILE_SERVER_PORT = 8090
+TILE_SERVER_WORKERS = 4  # 同时进行的渲染任务数
+TILE_SERVER_MEMORY_TILES = 1024  # 内存中保留的已渲染瓦片数
+TILE_SERVER_CACHE_KEY = "rendered"  # 已渲染瓦片在磁盘瓦片缓存中的来源键
+TILE_SIZE = 256
+TILE_SERVER_METATILE = 4  # 元瓦片边长：一次渲染 N x N 个瓦片再切分
+
+# 航线规划：陆地面数据栅格化为导航网格（经纬度网格，缓存在磁盘上）
+ROUTE_LAND_DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "land_polygons.gpkg")
+ROUTE_GRID_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".quick-qgis", "routes")
+ROUTE_GRID_BOUNDS = (100.0, 0.0, 135.0, 45.0)  # 网格范围 (西, 南, 东, 北)
+ROUTE_GRID_RESOLUTION = 0.02  # 最细网格的格网大小（度，约2km）
+ROUTE_CLEARANCE_CELLS = 1  # 离岸安全距离（格网数）
+ROUTE_LEVEL_FACTOR = 4  # 相邻两级网格的边长倍数
+ROUTE_COARSE_MAX_CELLS = 200  # 最粗一级网格的最大边长（格网数）
+ROUTE_CORRIDOR_CELLS = 2  # 细一级搜索限定在上一级航线周围的格网数
+ROUTE_SEGMENT_CELLS = 8  # 细一级沿上一级航线分段搜索，每段包含的上级格网数
+ROUTE_SNAP_CELLS = 50  # 航点位于陆地时向外寻找水域的最大距离（格网数）
+ROUTE_HEURISTIC_WEIGHT = 1.0  # A* 启发函数权重，大于 1 时更快但航线可能略长
+ROUTE_MAX_EXPANDED = 500000  # 整级网格搜索时最多展开的格网数，超过视为不可达
+
+# 巡航路线优化（多站点排序）
+ROUTE_OPT_TIME_BUDGET = 3.0  # 求解时间预算（秒）
+ROUTE_MATRIX_MAX_CELLS = 200  # 计算海上距离矩阵所用网格的最大边长（取不超过该值的最细一级）
+
+# 实时船位：图层写入节拍（毫秒）、默认 UDP 端口（NMEA over UDP 常用端口）、TCP/文件数据源的重试间隔（秒）
+LIVE_FEED_INTERVAL_MS = 200
+LIVE_FEED_PORT = 10110
+LIVE_FEED_RECONNECT_SECONDS = 2.0
+
+# 轨迹回放：时间分区长度（秒）、CSV 转换缓存目录与每块读取行数
+TRACK_PARTITION_SECONDS = 3600
+TRACK_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".quick-qgis", "tracks")
+TRACK_CSV_CHUNK_ROWS = 500000
+TRACK_DRAW_MAX_POINTS = 1000000  # 每次重绘最多绘制的定位点数（超过时等间隔抽取）
+TRACK_WINDOW_FRACTION = 0.05  # 初始时间窗口占全部时间范围的比例
+TRACK_PLAYBACK_DURATION = 60.0  # 按默认速度播放完全部时间范围所需秒数
+TRACK_PLAYBACK_FPS = 25
+TRACK_HEAD_MAX_AGE = 6 * 3600  # 超过该时间（秒）没有定位的轨迹不再显示当前位置
+
+# 矢量数据批量写入：每次提交给数据提供者的要素数量
+FEATURE_BATCH_SIZE = 10000
+
+# 点聚合：格网像素大小；缩放到该级别及以上时显示原始点，否则显示聚合点
+CLUSTER_CELL_PIXELS = 60
+CLUSTER_MAX_ZOOM = 12
+# 加载的点图层要素数达到该值时自动启用聚合（0 表示不自动启用）
+CLUSTER_AUTO_MIN_POINTS = 50000
+
+# 线简化：缩放到该级别及以上时显示原始线，否则显示按级别预计算的简化线；简化容差（像素）
+SIMPLIFY_MAX_ZOOM = 14
+SIMPLIFY_TOLERANCE_PIXELS = 0.5
+# 加载的线图层顶点数达到该值时自动启用分级简化（0 表示不自动启用）
+SIMPLIFY_AUTO_MIN_VERTICES = 200000
+
+# 渲染统计：滚动窗口保留的渲染次数、耗时直方图分桶上界（毫秒）
+RENDER_STATS_WINDOW = 200
+RENDER_TIME_BUCKETS_MS = (16, 33, 50, 100, 250, 500, 1000, 2000)
+# 逐图层耗时：画布渲染完成后在后台以同样设置再渲染一次并读取各图层耗时，两次之间至少间隔（毫秒）
+RENDER_PROFILE_INTERVAL_MS = 2000
+
+# 测量工具：距离按该椭球计算
+MEASURE_ELLIPSOID = "WGS84"
+
 # 示例城市数据
 SAMPLE_CITIES = [
     ("北京", 116.4074, 39.9042),
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+点聚合索引模块 - 为每个缩放级别预计算网格聚合结果
+
+每个缩放级别使用固定像素大小的经纬度网格，格网内的点合并为一个聚合点
+（位置取平均值）。新增点只需更新各级别对应的一个格网，无需重算全部聚合。
+"""
+
+import math
+
+from ..constants import CLUSTER_CELL_PIXELS
+
+
+class GridClusterIndex:
+    """分级网格点聚合索引"""
+
+    def __init__(self, min_zoom: int = 0, max_zoom: int = 16,
+                 cell_pixels: int = CLUSTER_CELL_PIXELS, tile_size: int = 256):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.point_count = 0
+        # 各级别格网大小（度）：该级别下 cell_pixels 个像素对应的经度跨度
+        self._cell_size = {
+            z: 360.0 / (tile_size * (1 << z)) * cell_pixels
+            for z in range(min_zoom, max_zoom + 1)
+        }
+        # 各级别的格网：(列, 行) -> [点数, 经度和, 纬度和]
+        self._levels = {z: {} for z in range(min_zoom, max_zoom + 1)}
+        # 各级别的修改计数，用于判断显示结果是否过期
+        self._versions = {z: 0 for z in range(min_zoom, max_zoom + 1)}
+
+    def add(self, lon: float, lat: float):
+        """增量加入一个点
+
+        相邻级别的格网大小相差一倍，先求最细级别的格网编号，
+        较粗级别的编号逐级右移一位即可得到。
+        """
+        ix = math.floor(lon / self._cell_size[self.max_zoom])
+        iy = math.floor(lat / self._cell_size[self.max_zoom])
+        for z in range(self.max_zoom, self.min_zoom - 1, -1):
+            cells = self._levels[z]
+            key = (ix, iy)
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [1, lon, lat]
+            else:
+                cell[0] += 1
+                cell[1] += lon
+                cell[2] += lat
+            self._versions[z] += 1
+            ix >>= 1
+            iy >>= 1
+        self.point_count += 1
+
+    def add_points(self, points):
+        """批量增量加入 (经度, 纬度) 点"""
+        for lon, lat in points:
+            self.add(lon, lat)
+
+    def clamp_zoom(self, zoom: int) -> int:
+        return max(self.min_zoom, min(self.max_zoom, zoom))
+
+    def version(self, zoom: int) -> int:
+        """级别的修改计数"""
+        return self._versions[self.clamp_zoom(zoom)]
+
+    def clusters(self, zoom: int, bounds=None):
+        """返回指定级别的聚合点列表 [(经度, 纬度, 点数)]，可按 (west, south, east, north) 过滤"""
+        zoom = self.clamp_zoom(zoom)
+        result = []
+        for count, sum_lon, sum_lat in self._levels[zoom].values():
+            lon, lat = sum_lon / count, sum_lat / count
+            if bounds is not None:
+                west, south, east, north = bounds
+                if not (west <= lon <= east and south <= lat <= north):
+                    continue
+            result.append((lon, lat, count))
+        return result
+
+    def cluster_count(self, zoom: int) -> int:
+        """指定级别的聚合点数量"""
+        return len(self._levels[self.clamp_zoom(zoom)])
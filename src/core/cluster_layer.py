@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+点聚合图层模块 - 粗比例尺下显示聚合点，放大后显示原始点
+
+原始点图层与聚合图层通过比例尺可见性切换，聚合图层只在缩放级别或索引变化时重建，
+平移不会触发重算。
+"""
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsFeature, QgsGeometry,
+    QgsMarkerSymbol, QgsPalLayerSettings, QgsPointXY, QgsProject, QgsProperty,
+    QgsSingleSymbolRenderer, QgsVectorLayer, QgsVectorLayerSimpleLabeling
+)
+from ..constants import CLUSTER_MAX_ZOOM
+from .cluster_index import GridClusterIndex
+
+# 缩放级别0对应的比例尺分母（96 DPI 下的Web墨卡托）
+ZOOM0_SCALE = 559082264.028
+
+
+def zoom_to_scale(zoom: float) -> float:
+    """缩放级别转比例尺分母"""
+    return ZOOM0_SCALE / (2.0 ** zoom)
+
+
+class PointClusterLayer:
+    """原始点图层 + 聚合图层"""
+
+    def __init__(self, point_layer, max_zoom: int = CLUSTER_MAX_ZOOM):
+        self.point_layer = point_layer
+        self.max_zoom = max_zoom
+        self.index = GridClusterIndex(0, max_zoom - 1)
+        self._shown = None  # 当前显示的 (级别, 索引版本)
+
+        wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
+        self._to_wgs84 = None
+        if point_layer.crs() != wgs84:
+            self._to_wgs84 = QgsCoordinateTransform(point_layer.crs(), wgs84, QgsProject.instance())
+
+        self.cluster_layer = QgsVectorLayer(
+            "Point?crs=EPSG:4326&field=count:integer", f"{point_layer.name()}（聚合）", "memory"
+        )
+        self._setup_style()
+        self._setup_scale_visibility()
+        self.add_features(point_layer.getFeatures())
+
+    def _setup_style(self):
+        """聚合点样式：大小随点数增长，并标注点数"""
+        symbol = QgsMarkerSymbol.createSimple({
+            "name": "circle", "color": "255,120,0,200",
+            "outline_color": "255,255,255", "outline_width": "0.4",
+        })
+        symbol.setDataDefinedSize(QgsProperty.fromExpression('min(12, 3 + 1.2 * ln("count"))'))
+        self.cluster_layer.setRenderer(QgsSingleSymbolRenderer(symbol))
+
+        label = QgsPalLayerSettings()
+        label.fieldName = "count"
+        label.placement = QgsPalLayerSettings.OverPoint
+        self.cluster_layer.setLabeling(QgsVectorLayerSimpleLabeling(label))
+        self.cluster_layer.setLabelsEnabled(True)
+
+    def _setup_scale_visibility(self):
+        """按比例尺切换：粗比例尺显示聚合点，放大到 max_zoom 后显示原始点"""
+        threshold = zoom_to_scale(self.max_zoom - 0.5)
+        self.point_layer.setScaleBasedVisibility(True)
+        self.point_layer.setMinimumScale(threshold)
+        self.cluster_layer.setScaleBasedVisibility(True)
+        self.cluster_layer.setMaximumScale(threshold)
+
+    def add_features(self, features):
+        """将要素的点位增量加入聚合索引"""
+        for feature in features:
+            if not feature.hasGeometry():
+                continue
+            geometry = QgsGeometry(feature.geometry())
+            if self._to_wgs84 is not None:
+                geometry.transform(self._to_wgs84)
+            for vertex in geometry.vertices():
+                self.index.add(vertex.x(), vertex.y())
+
+    def update(self, zoom: int) -> bool:
+        """按缩放级别重建聚合要素（级别和索引均未变化时跳过），返回是否重建"""
+        if zoom >= self.max_zoom:
+            return False
+        zoom = self.index.clamp_zoom(zoom)
+        state = (zoom, self.index.version(zoom))
+        if state == self._shown:
+            return False
+
+        features = []
+        for lon, lat, count in self.index.clusters(zoom):
+            feature = QgsFeature()
+            feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(lon, lat)))
+            feature.setAttributes([count])
+            features.append(feature)
+
+        provider = self.cluster_layer.dataProvider()
+        provider.truncate()
+        provider.addFeatures(features)
+        self.cluster_layer.updateExtents()
+        self.cluster_layer.triggerRepaint()
+        self._shown = state
+        return True
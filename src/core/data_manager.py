@@ -3,68 +3,447 @@
 数据管理模块 - 负责矢量数据的创建和管理
 """
 
+import time
+
+from qgis.PyQt.QtCore import QTimer
 from qgis.core import (
-    QgsVectorLayer, QgsFeature, QgsGeometry, QgsPointXY, 
-    QgsProject, QgsRectangle
+    QgsApplication, QgsVectorLayer, QgsFeature, QgsFeatureRequest, QgsGeometry, QgsPointXY, 
+    QgsProject, QgsRectangle, QgsWkbTypes
+)
+from ..constants import (
+    SAMPLE_CITIES, DEFAULT_EXTENT, DEFAULT_CRS, FEATURE_BATCH_SIZE,
+    CLUSTER_AUTO_MIN_POINTS, SIMPLIFY_AUTO_MIN_VERTICES
 )
-from ..constants import SAMPLE_CITIES, DEFAULT_EXTENT, DEFAULT_CRS
+from .cluster_layer import PointClusterLayer
+from .load_task import LayerLoadTask
+from .map_engine import canvas_zoom_level
+from .vector_loader import iter_batches, open_vector_source
+
+PROGRESS_REPORT_INTERVAL = 0.5  # 加载进度上报间隔（秒）
 
 class DataManager:
     """数据管理器 - 负责矢量数据的创建和管理"""
     
-    def __init__(self, canvas):
+    def __init__(self, canvas, status_callback=None, loading_callback=None, refresh_callback=None):
         self.canvas = canvas
+        # 画布刷新回调（通常为 MapEngine.request_refresh，合并同一轮的多次刷新）
+        self.refresh_callback = refresh_callback or (canvas.refresh if canvas else None)
         self.vector_layers = []
+        # 状态回调（通常连接到 QmlBridge.statusChanged）
+        self.status_callback = status_callback
+        # 后台加载状态回调：loading_callback(是否有任务在加载, 进度百分比或 None)
+        self.loading_callback = loading_callback
+        self._tasks = []  # 进行中的后台加载任务（保持引用，避免被回收）
+        self.cluster_layers = {}  # 原始点图层ID -> 点聚合图层
+        self.simplified_layers = {}  # 原始线图层ID -> 简化线图层
+        self.live_layers = []  # 实时船位图层
+        self.track_store = None  # 船位历史（轨迹回放）
+        # 图层移除时清理聚合/简化记录，避免比例尺变化时访问已删除的图层
+        QgsProject.instance().layersWillBeRemoved.connect(self._on_layers_will_be_removed)
+    
+    def _report_status(self, message: str):
+        """上报状态信息"""
+        if self.status_callback:
+            try:
+                self.status_callback(message)
+            except Exception as e:
+                print(f"数据管理器：状态上报失败 - {e}")
     
     def create_sample_data(self):
         """创建示例数据"""
         print("数据管理器：正在创建示例数据...")
         
         try:
-            layers = []
-            
-            # 创建城市点图层
-            point_layer = self._create_city_points_layer()
-            if point_layer:
-                layers.append(point_layer)
+            self._attach_layers(self._build_sample_layers())
+        except Exception as e:
+            print(f"数据管理器：创建示例数据失败 - {e}")
+    
+    def create_sample_data_async(self, on_done=None):
+        """在后台线程中创建示例数据，完成后挂载到画布"""
+        print("数据管理器：正在后台创建示例数据...")
+        self._start_task("创建示例数据", lambda task: self._build_sample_layers(), on_done)
+    
+    def _build_sample_layers(self):
+        """构建示例图层（不访问项目和画布，可在工作线程中执行）"""
+        layers = []
+        
+        # 创建城市点图层
+        point_layer = self._create_city_points_layer()
+        if point_layer:
+            layers.append(point_layer)
+        
+        # 创建连接线图层
+        line_layer = self._create_connection_lines_layer()
+        if line_layer:
+            layers.append(line_layer)
+        
+        # 创建区域面图层
+        polygon_layer = self._create_sample_polygon_layer()
+        if polygon_layer:
+            layers.append(polygon_layer)
+        return layers
+    
+    def _attach_layers(self, layers):
+        """将图层加入项目并添加到画布（主线程）"""
+        if layers:
+            for layer in layers:
+                QgsProject.instance().addMapLayer(layer)
+            self._add_layers_to_canvas(layers)
+            self.vector_layers.extend(layers)
+            print(f"数据管理器：{len(layers)} 个矢量图层已创建")
+        else:
+            print("数据管理器：没有有效的图层可以创建")
+    
+    def _start_task(self, description: str, build, on_done=None):
+        """提交后台加载任务，完成后在主线程挂载图层"""
+        def _done(layers):
+            if task in self._tasks:
+                self._tasks.remove(task)
+            if layers:
+                self._attach_layers(layers)
+            if not self._tasks and self.loading_callback:
+                self.loading_callback(False)
+            if on_done:
+                on_done(layers)
+        
+        task = LayerLoadTask(description, build, _done)
+        task.statusMessage.connect(self._report_status)
+        task.progressChanged.connect(self._report_progress)
+        self._tasks.append(task)
+        if len(self._tasks) == 1 and self.loading_callback:
+            self.loading_callback(True)
+        QgsApplication.taskManager().addTask(task)
+        return task
+    
+    def _report_progress(self, *args):
+        """上报后台加载进度：进行中各任务进度的平均值"""
+        if self._tasks and self.loading_callback:
+            try:
+                self.loading_callback(True, sum(task.progress() for task in self._tasks) / len(self._tasks))
+            except Exception as e:
+                print(f"数据管理器：进度上报失败 - {e}")
+    
+    def cancel_loading(self):
+        """取消所有后台加载任务"""
+        if not self._tasks:
+            return
+        for task in list(self._tasks):
+            task.cancel()
+        print(f"数据管理器：已请求取消 {len(self._tasks)} 个后台加载任务")
+        self._report_status("正在取消加载...")
+    
+    def is_loading(self) -> bool:
+        """是否有后台加载任务在进行"""
+        return bool(self._tasks)
+    
+    def add_features_bulk(self, layer, records, chunk_size: int = FEATURE_BATCH_SIZE) -> int:
+        """批量写入要素
+        
+        records 为 (QgsGeometry, 属性列表) 的可迭代对象，按 chunk_size 分块构建要素，
+        每块只调用一次 addFeatures，全部写入后只更新一次图层范围。返回写入的要素数量。
+        """
+        features = (self._make_feature(geometry, attributes) for geometry, attributes in records)
+        return self.ingest_features(layer, features, chunk_size)
+    
+    @staticmethod
+    def _make_feature(geometry, attributes):
+        feature = QgsFeature()
+        feature.setGeometry(geometry)
+        feature.setAttributes(attributes)
+        return feature
+    
+    def ingest_features(self, layer, features, chunk_size: int = FEATURE_BATCH_SIZE,
+                        progress_callback=None, is_canceled=None) -> int:
+        """按块写入 QgsFeature 序列（可为生成器），只更新一次图层范围
+        
+        progress_callback(已写入数量) 在每块提交后调用；is_canceled() 返回 True 时停止写入。
+        """
+        provider = layer.dataProvider()
+        total = 0
+        for chunk in iter_batches(features, chunk_size):
+            if is_canceled and is_canceled():
+                break
+            total += self._commit_chunk(provider, chunk)
+            if progress_callback:
+                progress_callback(total)
+        
+        layer.updateExtents()
+        return total
+    
+    def _commit_chunk(self, provider, features) -> int:
+        """提交一块要素，返回成功写入的数量"""
+        ok, _ = provider.addFeatures(features)
+        if not ok:
+            print(f"数据管理器：批量写入要素失败 - {provider.lastError()}")
+            return 0
+        return len(features)
+    
+    def create_point_layer(self, name: str, points, fields: str = "name:string",
+                           chunk_size: int = FEATURE_BATCH_SIZE):
+        """由 (经度, 纬度, 属性...) 序列批量创建内存点图层（不加入项目）"""
+        field_uri = "".join(f"&field={f}" for f in fields.split(",") if f) if fields else ""
+        layer = QgsVectorLayer(f"Point?crs={DEFAULT_CRS}{field_uri}", name, "memory")
+        records = (
+            (QgsGeometry.fromPointXY(QgsPointXY(row[0], row[1])), list(row[2:]))
+            for row in points
+        )
+        self.add_features_bulk(layer, records, chunk_size)
+        return layer
+    
+    def create_route_layer(self, route: dict, name: str = "规划航线", add_to_canvas: bool = True):
+        """由航线规划结果（RoutePlanner.plan 的返回值）创建线图层"""
+        layer = QgsVectorLayer(
+            f"LineString?crs={DEFAULT_CRS}&field=name:string&field=length_km:double", name, "memory"
+        )
+        geometry = QgsGeometry.fromPolylineXY([QgsPointXY(lon, lat) for lon, lat in route["points"]])
+        self.add_features_bulk(layer, [(geometry, [name, round(route["length_m"] / 1000.0, 2)])])
+        if add_to_canvas:
+            self._attach_layers([layer])
+        return layer
+    
+    def load_vector_file(self, path: str, name: str = None, add_to_canvas: bool = True,
+                         chunk_size: int = FEATURE_BATCH_SIZE, auto_optimize: bool = True, **options):
+        """流式加载矢量文件（CSV / GeoJSON Lines / GeoPackage 等）到内存图层
+        
+        要素按 chunk_size 分批读取和写入，Python 侧不会持有整个文件，
+        加载进度通过状态回调上报。options 传给对应的数据源（如 lon_field、layer_name）。
+        auto_optimize 为 True 时，挂载后按阈值自动启用点聚合或线简化（见 auto_optimize_layer）。
+        """
+        # 同步加载期间界面不会重绘，只上报状态文本
+        def _report(message, percent=None):
+            self._report_status(message)
+        
+        layer = self._build_vector_layer(path, name, chunk_size, _report, **options)
+        if layer is not None and add_to_canvas:
+            self._attach_layers([layer])
+            if auto_optimize:
+                self.auto_optimize_layer(layer)
+        return layer
+    
+    def load_vector_file_async(self, path: str, name: str = None, chunk_size: int = FEATURE_BATCH_SIZE,
+                               on_done=None, auto_optimize: bool = True, **options):
+        """在后台线程中流式加载矢量文件，完成后挂载到画布"""
+        def _build(task):
+            return [self._build_vector_layer(
+                path, name, chunk_size, task.report, task.isCanceled, **options
+            )]
+        
+        def _done(layers):
+            if auto_optimize:
+                for layer in layers:
+                    self.auto_optimize_layer(layer)
+            if on_done:
+                on_done(layers)
+        
+        self._start_task(f"加载 {path}", _build, _done)
+    
+    def _build_vector_layer(self, path: str, name: str, chunk_size: int,
+                            report, is_canceled=None, **options):
+        """读取矢量文件构建内存图层（不访问项目和画布，可在工作线程中执行）
+        
+        report(消息, 百分比) 用于上报进度，is_canceled() 返回 True 时中止。
+        """
+        try:
+            source = open_vector_source(path, **options)
+        except Exception as e:
+            print(f"数据管理器：打开矢量文件失败 - {path} - {e}")
+            report(f"加载失败：{e}")
+            return None
+        
+        layer_name = name or source.name
+        try:
+            layer = QgsVectorLayer(source.geometry_type, layer_name, "memory")
+            layer.setCrs(source.crs)
+            provider = layer.dataProvider()
+            provider.addAttributes(source.fields.toList())
+            layer.updateFields()
             
-            # 创建连接线图层
-            line_layer = self._create_connection_lines_layer()
-            if line_layer:
-                layers.append(line_layer)
+            last_report = [0.0]
             
-            # 创建区域面图层
-            polygon_layer = self._create_sample_polygon_layer()
-            if polygon_layer:
-                layers.append(polygon_layer)
+            def _progress(count):
+                now = time.monotonic()
+                if now - last_report[0] >= PROGRESS_REPORT_INTERVAL:
+                    last_report[0] = now
+                    percent = source.progress() * 100
+                    report(f"正在加载 {layer_name}：{count} 个要素 ({percent:.0f}%)", percent)
             
-            # 将图层添加到画布
-            if layers:
-                self._add_layers_to_canvas(layers)
-                self.vector_layers.extend(layers)
-                print(f"数据管理器：{len(layers)} 个矢量图层已创建")
-            else:
-                print("数据管理器：没有有效的图层可以创建")
-                
+            total = self.ingest_features(
+                layer, source.features(), chunk_size, _progress, is_canceled
+            )
         except Exception as e:
-            print(f"数据管理器：创建示例数据失败 - {e}")
+            print(f"数据管理器：加载矢量文件失败 - {path} - {e}")
+            report(f"加载失败：{e}")
+            return None
+        finally:
+            source.close()
+        
+        if is_canceled and is_canceled():
+            report(f"{layer_name} 加载已取消")
+            return None
+        
+        print(f"数据管理器：已加载 {layer_name}，共 {total} 个要素")
+        report(f"{layer_name} 加载完成：{total} 个要素")
+        return layer
+    
+    def create_cluster_layer(self, point_layer):
+        """为点图层启用聚合模式：粗比例尺显示聚合点，放大后显示原始点"""
+        cluster = self.cluster_layers.get(point_layer.id())
+        if cluster is not None:
+            return cluster
+        try:
+            cluster = PointClusterLayer(point_layer)
+        except Exception as e:
+            print(f"数据管理器：创建聚合图层失败 - {e}")
+            return None
+        
+        if not self.cluster_layers:
+            self.canvas.scaleChanged.connect(self._update_clusters)
+        self.cluster_layers[point_layer.id()] = cluster
+        self._attach_layers([cluster.cluster_layer])
+        cluster.update(canvas_zoom_level(self.canvas))
+        print(f"数据管理器：{point_layer.name()} 已启用聚合，共 {cluster.index.point_count} 个点")
+        return cluster
+    
+    def create_simplified_layer(self, line_layer):
+        """为线图层启用分级简化：粗比例尺显示按缩放级别简化的线，放大后显示原始线"""
+        simplified = self.simplified_layers.get(line_layer.id())
+        if simplified is not None:
+            return simplified
+        # 延迟导入：numpy 只在启用线简化时需要
+        from .simplified_layer import SimplifiedLineLayer
+        started = time.perf_counter()
+        try:
+            simplified = SimplifiedLineLayer(line_layer)
+        except Exception as e:
+            print(f"数据管理器：创建简化线图层失败 - {e}")
+            return None
+        
+        if not self.simplified_layers:
+            self.canvas.scaleChanged.connect(self._update_simplified)
+        self.simplified_layers[line_layer.id()] = simplified
+        self._attach_layers([simplified.simplified_layer])
+        simplified.update(canvas_zoom_level(self.canvas))
+        print(f"数据管理器：{line_layer.name()} 已启用分级简化，共 {simplified.pyramid.vertex_count} 个顶点，"
+              f"预计算耗时 {time.perf_counter() - started:.2f}s")
+        return simplified
+    
+    def auto_optimize_layer(self, layer):
+        """按阈值自动启用优化：点数达到 CLUSTER_AUTO_MIN_POINTS 的点图层启用聚合，
+        顶点数达到 SIMPLIFY_AUTO_MIN_VERTICES 的线图层启用分级简化（阈值为 0 时不启用）"""
+        geometry_type = layer.geometryType()
+        if geometry_type == QgsWkbTypes.PointGeometry:
+            if CLUSTER_AUTO_MIN_POINTS and layer.featureCount() >= CLUSTER_AUTO_MIN_POINTS:
+                return self.create_cluster_layer(layer)
+        elif geometry_type == QgsWkbTypes.LineGeometry:
+            if (SIMPLIFY_AUTO_MIN_VERTICES and
+                    self._count_vertices(layer, SIMPLIFY_AUTO_MIN_VERTICES) >= SIMPLIFY_AUTO_MIN_VERTICES):
+                return self.create_simplified_layer(layer)
+        return None
+    
+    @staticmethod
+    def _count_vertices(layer, limit: int) -> int:
+        """统计图层顶点数，达到 limit 即停止"""
+        total = 0
+        for feature in layer.getFeatures(QgsFeatureRequest().setNoAttributes()):
+            if feature.hasGeometry():
+                total += feature.geometry().constGet().nCoordinates()
+                if total >= limit:
+                    break
+        return total
+    
+    def add_points(self, point_layer, points, chunk_size: int = FEATURE_BATCH_SIZE) -> int:
+        """向点图层追加 (经度, 纬度, 属性...) 点，已启用聚合时增量更新聚合结果"""
+        features = [
+            self._make_feature(QgsGeometry.fromPointXY(QgsPointXY(row[0], row[1])), list(row[2:]))
+            for row in points
+        ]
+        count = self.ingest_features(point_layer, features, chunk_size)
+        
+        cluster = self.cluster_layers.get(point_layer.id())
+        if cluster is not None:
+            cluster.add_features(features)
+            cluster.update(canvas_zoom_level(self.canvas))
+        point_layer.triggerRepaint()
+        return count
+    
+    def create_live_layer(self, feed, name: str = "实时船位"):
+        """由船位数据源创建实时船位图层并开始接收"""
+        # 延迟导入：仅在使用实时船位时加载
+        from .live_layer import LiveVesselLayer
+        live = LiveVesselLayer(feed, name)
+        self._attach_layers([live.layer])
+        self.live_layers.append(live)
+        live.start()
+        return live
+    
+    def stop_live_layers(self):
+        """停止所有实时船位图层的接收和刷新"""
+        for live in self.live_layers:
+            live.stop()
+    
+    def load_track_history(self, path: str, **fields):
+        """读取船位历史（CSV 或 npz）到按时间分区的轨迹存储，fields 为 CSV 字段名（如 time_field）"""
+        # 延迟导入：numpy 与轨迹存储只在轨迹回放时需要
+        from .track_store import load_track_store
+        try:
+            self.track_store = load_track_store(path, **fields)
+        except (OSError, ValueError) as e:
+            print(f"数据管理器：读取船位历史失败 - {path} - {e}")
+            self._report_status(f"读取船位历史失败：{e}")
+            return None
+        self._report_status(
+            f"船位历史：{len(self.track_store)} 个定位点，{len(self.track_store.track_names)} 条轨迹"
+        )
+        return self.track_store
+    
+    def _on_layers_will_be_removed(self, layer_ids):
+        """原始图层或其聚合/简化图层即将移除：停止对应的更新，并移除另一侧的配套图层"""
+        removed = set(layer_ids)
+        self.vector_layers = [layer for layer in self.vector_layers if layer.id() not in removed]
+        orphans = []
+        groups = (
+            (self.cluster_layers, self._update_clusters, lambda c: (c.point_layer, c.cluster_layer)),
+            (self.simplified_layers, self._update_simplified, lambda s: (s.line_layer, s.simplified_layer)),
+        )
+        for companions, update, layers_of in groups:
+            if not companions:
+                continue
+            for source_id, companion in list(companions.items()):
+                source, derived = layers_of(companion)
+                if source_id not in removed and derived.id() not in removed:
+                    continue
+                del companions[source_id]
+                if source_id in removed:
+                    orphans.append(derived.id())
+                else:
+                    # 只移除了配套图层：原始图层恢复为所有比例尺可见
+                    source.setScaleBasedVisibility(False)
+            if not companions:
+                self.canvas.scaleChanged.disconnect(update)
+        orphans = [layer_id for layer_id in orphans if layer_id not in removed]
+        if orphans:
+            # 不在移除信号中嵌套移除，下一轮事件循环再移除配套图层
+            QTimer.singleShot(0, lambda: QgsProject.instance().removeMapLayers(orphans))
+    
+    def _update_clusters(self, *args):
+        """比例尺变化时按当前缩放级别更新聚合图层"""
+        zoom = canvas_zoom_level(self.canvas)
+        for cluster in self.cluster_layers.values():
+            cluster.update(zoom)
+    
+    def _update_simplified(self, *args):
+        """比例尺变化时按当前缩放级别更新简化线图层"""
+        zoom = canvas_zoom_level(self.canvas)
+        for simplified in self.simplified_layers.values():
+            simplified.update(zoom)
     
     def _create_city_points_layer(self):
         """创建城市点图层"""
         try:
-            point_layer = QgsVectorLayer(f"Point?crs={DEFAULT_CRS}", "中国主要城市", "memory")
-            point_provider = point_layer.dataProvider()
-            
-            # 添加城市点
-            for name, lon, lat in SAMPLE_CITIES:
-                feature = QgsFeature()
-                point = QgsPointXY(lon, lat)
-                feature.setGeometry(QgsGeometry.fromPointXY(point))
-                feature.setAttributes([name])
-                point_provider.addFeatures([feature])
-            
-            point_layer.updateExtents()
-            QgsProject.instance().addMapLayer(point_layer)
+            # 批量添加城市点
+            point_layer = self.create_point_layer(
+                "中国主要城市", ((lon, lat, name) for name, lon, lat in SAMPLE_CITIES)
+            )
             print("数据管理器：城市点图层创建成功")
             return point_layer
             
@@ -86,7 +465,6 @@ class DataManager:
             line_provider.addFeatures([line_feature])
             
             line_layer.updateExtents()
-            QgsProject.instance().addMapLayer(line_layer)
             print("数据管理器：连接线图层创建成功")
             return line_layer
             
@@ -114,7 +492,6 @@ class DataManager:
             polygon_provider.addFeatures([polygon_feature])
             
             polygon_layer.updateExtents()
-            QgsProject.instance().addMapLayer(polygon_layer)
             print("数据管理器：区域面图层创建成功")
             return polygon_layer
             
@@ -123,11 +500,11 @@ class DataManager:
             return None
     
     def _add_layers_to_canvas(self, layers):
-        """将图层添加到画布"""
+        """将图层添加到画布（置于已有图层之上，保证不被底图遮挡）"""
         current_layers = self.canvas.layers()
-        all_layers = current_layers + layers
+        all_layers = layers + current_layers
         self.canvas.setLayers(all_layers)
-        self.canvas.refresh()
+        self.refresh_callback()
     
     def get_layers(self):
         """获取所有矢量图层"""
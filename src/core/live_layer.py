@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+实时船位图层模块 - 按固定节拍把船位数据源的最新位置批量写入内存点图层
+
+每个节拍只做一次 drain：已有船舶的位置通过一次 changeGeometryValues、航速航向通过一次
+changeAttributeValues 原地更新，新出现的船舶一次 addFeatures；然后只对本图层 triggerRepaint，
+其他图层直接使用画布的渲染缓存。主线程每个节拍的工作量只与这段时间内有更新的船舶数有关。
+"""
+
+import time
+
+from qgis.PyQt.QtCore import QTimer
+from qgis.core import (
+    QgsFeature, QgsGeometry, QgsMarkerSymbol, QgsPointXY, QgsProperty, QgsSingleSymbolRenderer,
+    QgsSymbolLayer, QgsVectorLayer
+)
+from ..constants import LIVE_FEED_INTERVAL_MS, RENDER_STATS_WINDOW
+from ..utils.stats import RollingHistogram
+
+LIVE_FIELDS = "field=id:string&field=sog:double&field=cog:double&field=updated:double"
+
+
+class LiveVesselLayer:
+    """实时船位图层：QTimer 定时从 PositionFeed 取走更新并写入图层"""
+
+    def __init__(self, feed, name: str = "实时船位", interval_ms: int = LIVE_FEED_INTERVAL_MS):
+        self.feed = feed
+        self.layer = QgsVectorLayer(f"Point?crs=EPSG:4326&{LIVE_FIELDS}", name, "memory")
+        self._fids = {}  # 船舶ID -> 要素ID
+        fields = self.layer.fields()
+        self._sog_index = fields.indexOf("sog")
+        self._cog_index = fields.indexOf("cog")
+        self._time_index = fields.indexOf("updated")
+        self._setup_style()
+
+        self.applied = 0  # 写入图层的位置更新数
+        self.flush_times = RollingHistogram(RENDER_STATS_WINDOW)  # 每个节拍的耗时（毫秒）
+        self.timer = QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def _setup_style(self):
+        """船位符号：三角形按航向旋转"""
+        symbol = QgsMarkerSymbol.createSimple({
+            "name": "triangle", "color": "0,140,255,230",
+            "outline_color": "255,255,255", "outline_width": "0.3", "size": "3",
+        })
+        symbol.symbolLayer(0).setDataDefinedProperty(
+            QgsSymbolLayer.PropertyAngle, QgsProperty.fromExpression('coalesce("cog", 0)')
+        )
+        self.layer.setRenderer(QgsSingleSymbolRenderer(symbol))
+
+    def start(self):
+        self.feed.start()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.feed.stop()
+
+    def flush(self) -> int:
+        """把数据源中的最新位置写入图层，返回更新的船舶数"""
+        updates = self.feed.drain()
+        if not updates:
+            return 0
+        started = time.perf_counter()
+        provider = self.layer.dataProvider()
+        geometries = {}
+        attributes = {}
+        new_vessels = []
+        new_features = []
+        for vessel, (lon, lat, sog, cog, received) in updates.items():
+            geometry = QgsGeometry.fromPointXY(QgsPointXY(lon, lat))
+            fid = self._fids.get(vessel)
+            if fid is None:
+                feature = QgsFeature()
+                feature.setGeometry(geometry)
+                feature.setAttributes([vessel, sog, cog, received])
+                new_vessels.append(vessel)
+                new_features.append(feature)
+            else:
+                geometries[fid] = geometry
+                attributes[fid] = {self._sog_index: sog, self._cog_index: cog, self._time_index: received}
+
+        if geometries:
+            provider.changeGeometryValues(geometries)
+            provider.changeAttributeValues(attributes)
+        if new_features:
+            ok, added = provider.addFeatures(new_features)
+            if ok:
+                for vessel, feature in zip(new_vessels, added):
+                    self._fids[vessel] = feature.id()
+            else:
+                print(f"实时船位：写入新船舶失败 - {provider.lastError()}")
+        self.layer.updateExtents()
+        self.layer.triggerRepaint()
+
+        self.applied += len(updates)
+        self.flush_times.add((time.perf_counter() - started) * 1000.0)
+        return len(updates)
+
+    def stats(self) -> dict:
+        """接收、合并与写入统计"""
+        stats = self.feed.stats()
+        stats.update({
+            "vessels": len(self._fids),
+            "applied": self.applied,
+            "flush_ms": self.flush_times.summary(),
+        })
+        return stats
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+后台加载任务模块 - 在 QgsTask 工作线程中构建图层，完成后回到主线程挂载到画布
+"""
+
+from qgis.PyQt.QtCore import QCoreApplication, pyqtSignal
+from qgis.core import QgsTask
+
+
+class LayerLoadTask(QgsTask):
+    """在后台线程中构建图层的任务
+
+    build(task) 在工作线程中执行并返回图层列表，期间可调用 task.report(message, percent)
+    上报进度、通过 task.isCanceled() 检查取消。on_done(layers) 在主线程中调用，
+    任务失败或取消时 layers 为空列表。
+    """
+
+    # 由工作线程发出、在主线程中处理的状态消息
+    statusMessage = pyqtSignal(str)
+
+    def __init__(self, description: str, build, on_done=None):
+        super().__init__(description, QgsTask.CanCancel)
+        self._build = build
+        self._on_done = on_done
+        self.layers = []
+        self.error = None
+
+    def report(self, message: str, percent: float = None):
+        """上报进度（可在工作线程中调用）"""
+        if percent is not None:
+            self.setProgress(percent)
+        self.statusMessage.emit(message)
+
+    def run(self):
+        """工作线程：构建图层"""
+        try:
+            layers = [layer for layer in self._build(self) if layer is not None]
+            # 图层在工作线程中创建，交给主线程前需转移线程归属
+            main_thread = QCoreApplication.instance().thread()
+            for layer in layers:
+                layer.moveToThread(main_thread)
+            self.layers = layers
+            return not self.isCanceled()
+        except Exception as e:
+            self.error = e
+            return False
+
+    def finished(self, result):
+        """主线程：回调结果"""
+        if not result:
+            if self.error is not None:
+                print(f"后台加载：{self.description()} 失败 - {self.error}")
+            elif self.isCanceled():
+                print(f"后台加载：{self.description()} 已取消")
+            self.layers = []
+        if self._on_done:
+            self._on_done(self.layers)
@@ -3,30 +3,219 @@
 地图引擎模块 - 负责地图的核心渲染和显示功能
 """
 
-from qgis.core import QgsCoordinateReferenceSystem
+import time
+
+from qgis.PyQt.QtCore import QSize, QTimer
+from qgis.PyQt.QtGui import QColor
+from qgis.core import (
+    QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsMapRendererParallelJob,
+    QgsMapSettings, QgsProject, QgsRectangle
+)
 from qgis.gui import QgsMapCanvas
-from ..constants import DEFAULT_EXTENT, DEFAULT_CRS
+from ..constants import (
+    DEFAULT_EXTENT, DEFAULT_CRS, RENDER_PROFILE_INTERVAL_MS, RENDER_STATS_WINDOW,
+    RENDER_TIME_BUCKETS_MS, TILE_SIZE
+)
+from ..utils.stats import RollingHistogram
+from ..utils.tile_math import tile_mercator_bounds, zoom_for_resolution
+
+
+def canvas_lonlat_extent(canvas):
+    """画布当前显示范围（转换为 WGS84 经纬度）"""
+    extent = canvas.extent()
+    crs = canvas.mapSettings().destinationCrs()
+    wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
+    if crs != wgs84:
+        transform = QgsCoordinateTransform(crs, wgs84, QgsProject.instance())
+        extent = transform.transformBoundingBox(extent)
+    return extent
+
+
+def canvas_zoom_level(canvas) -> int:
+    """画布当前分辨率对应的XYZ瓦片缩放级别"""
+    extent = canvas_lonlat_extent(canvas)
+    return zoom_for_resolution(extent.width() / max(1, canvas.width()))
+
+
+def tile_map_settings(layers, z: int, x: int, y: int, tile_size: int = TILE_SIZE) -> QgsMapSettings:
+    """渲染单个XYZ瓦片（EPSG:3857）的地图设置，背景透明"""
+    settings = QgsMapSettings()
+    settings.setLayers(layers)
+    settings.setDestinationCrs(QgsCoordinateReferenceSystem("EPSG:3857"))
+    settings.setOutputSize(QSize(tile_size, tile_size))
+    settings.setOutputDpi(96)
+    settings.setBackgroundColor(QColor(0, 0, 0, 0))
+    # 避免标注和符号在相邻瓦片之间出现接缝
+    settings.setFlag(QgsMapSettings.RenderMapTile, True)
+    settings.setExtent(QgsRectangle(*tile_mercator_bounds(z, x, y)))
+    return settings
+
+
+def metatile_origin(z: int, x: int, y: int, size: int):
+    """瓦片所在元瓦片的左上角瓦片坐标与实际边长（低缩放级别时不超过整个世界）"""
+    size = max(1, min(size, 1 << z))
+    return x - x % size, y - y % size, size
+
+
+def metatile_map_settings(layers, z: int, x: int, y: int, size: int,
+                          tile_size: int = TILE_SIZE) -> QgsMapSettings:
+    """一次渲染 size x size 个瓦片的元瓦片地图设置，(x, y) 为左上角瓦片"""
+    xmin, _, _, ymax = tile_mercator_bounds(z, x, y)
+    _, ymin, xmax, _ = tile_mercator_bounds(z, x + size - 1, y + size - 1)
+    settings = tile_map_settings(layers, z, x, y, tile_size)
+    settings.setOutputSize(QSize(tile_size * size, tile_size * size))
+    settings.setExtent(QgsRectangle(xmin, ymin, xmax, ymax))
+    return settings
+
+
+def slice_metatile(image, x: int, y: int, size: int, tile_size: int = TILE_SIZE) -> dict:
+    """把元瓦片图片切分为瓦片，返回 {(x, y): QImage}"""
+    tiles = {}
+    for dy in range(size):
+        for dx in range(size):
+            tiles[(x + dx, y + dy)] = image.copy(dx * tile_size, dy * tile_size, tile_size, tile_size)
+    return tiles
+
 
 class MapEngine:
     """地图引擎 - 负责地图的核心渲染功能"""
     
-    def __init__(self, canvas: QgsMapCanvas):
+    def __init__(self, canvas: QgsMapCanvas, render_callback=None):
         self.canvas = canvas
+        # 刷新协调：同一轮事件循环内的多次刷新请求合并为一次重绘
+        self._refresh_pending = False
+        self.refresh_requests = 0
+        self.refresh_count = 0
+        self.suppressed_refreshes = 0
+        # 渲染统计：每次渲染的耗时、瓦片请求数与本地命中数
+        self.render_times = RollingHistogram(RENDER_STATS_WINDOW, RENDER_TIME_BUCKETS_MS)
+        self.render_tiles = RollingHistogram(RENDER_STATS_WINDOW)
+        self.render_tile_hits = RollingHistogram(RENDER_STATS_WINDOW)
+        self.layer_render_times = {}  # 图层名 -> 渲染耗时直方图（由后台逐图层计时任务记录）
+        self._profile_job = None  # 进行中的逐图层计时渲染（完成前保持引用）
+        self._profile_stale = False  # 进行中的计时渲染已被取消
+        self._profile_last = None  # 上次启动逐图层计时的时间
+        self.renders_cancelled = 0
+        self.render_callback = render_callback  # 每次渲染完成后以统计汇总调用
+        self.tile_stats_provider = None  # 返回累计瓦片统计的函数
+        self._render_started = None
+        self._render_tile_stats = None
         self._setup_canvas()
+        self._connect_render_signals()
     
     def _setup_canvas(self):
         """设置画布基本属性"""
         # 设置坐标系统
         crs = QgsCoordinateReferenceSystem(DEFAULT_CRS)
         self.canvas.setDestinationCrs(crs)
+        # 渲染缓存：单个图层 triggerRepaint 时只重绘该图层，其他图层使用缓存的图像
+        self.canvas.setCachingEnabled(True)
         print(f"地图引擎：坐标系统设置为 {DEFAULT_CRS}")
     
+    def _connect_render_signals(self):
+        """监听画布渲染开始/完成信号"""
+        self.canvas.renderStarting.connect(self._on_render_starting)
+        self.canvas.mapCanvasRefreshed.connect(self._on_render_finished)
+    
+    def set_tile_stats_provider(self, provider):
+        """设置瓦片统计来源：provider() 返回含 requests / local_hits 累计值的字典"""
+        self.tile_stats_provider = provider
+    
+    def _tile_stats(self):
+        if self.tile_stats_provider is None:
+            return {}
+        try:
+            return self.tile_stats_provider() or {}
+        except Exception:
+            return {}
+    
+    def _on_render_starting(self):
+        """渲染开始：上一次渲染尚未完成说明它被新的渲染取消了"""
+        if self._render_started is not None:
+            self.renders_cancelled += 1
+        if self._profile_job is not None and not self._profile_stale:
+            # 计时渲染的结果已过期，且不应与画布渲染争用线程
+            self._profile_stale = True
+            self._profile_job.cancelWithoutBlocking()
+        self._render_started = time.perf_counter()
+        self._render_tile_stats = self._tile_stats()
+    
+    def _on_render_finished(self):
+        """渲染完成：记录耗时以及期间的瓦片请求与命中数"""
+        if self._render_started is None:
+            return
+        elapsed_ms = (time.perf_counter() - self._render_started) * 1000.0
+        self._render_started = None
+        self.render_times.add(elapsed_ms)
+        
+        before, after = self._render_tile_stats or {}, self._tile_stats()
+        if after:
+            self.render_tiles.add(after.get("requests", 0) - before.get("requests", 0))
+            self.render_tile_hits.add(after.get("local_hits", 0) - before.get("local_hits", 0))
+        
+        if self.render_callback:
+            self.render_callback(self.get_render_stats())
+        self._start_layer_profile()
+    
+    def _start_layer_profile(self):
+        """画布渲染完成后，在后台线程以同样的地图设置再渲染一次，读取各图层的耗时
+        
+        画布内部的渲染任务不对外暴露每个图层的耗时，因此另起一个并行渲染任务（不阻塞界面），
+        完成后由 perLayerRenderingTime() 取得各图层耗时。同一时间只有一个计时任务，
+        两次之间至少间隔 RENDER_PROFILE_INTERVAL_MS，画布开始新的渲染时取消。
+        """
+        if self._profile_job is not None or not hasattr(QgsMapRendererParallelJob, "perLayerRenderingTime"):
+            return
+        now = time.perf_counter()
+        if self._profile_last is not None and (now - self._profile_last) * 1000.0 < RENDER_PROFILE_INTERVAL_MS:
+            return
+        settings = self.canvas.mapSettings()
+        if not settings.layers():
+            return
+        self._profile_last = now
+        job = QgsMapRendererParallelJob(settings)
+        job.finished.connect(lambda job=job: self._on_layer_profile_finished(job))
+        self._profile_job = job
+        job.start()
+    
+    def _on_layer_profile_finished(self, job):
+        """计时渲染完成：记录各图层耗时（被取消的结果不记录）"""
+        stale, self._profile_job, self._profile_stale = self._profile_stale, None, False
+        if stale:
+            return
+        times = {layer.name(): elapsed_ms for layer, elapsed_ms in job.perLayerRenderingTime().items()}
+        for name, elapsed_ms in times.items():
+            histogram = self.layer_render_times.get(name)
+            if histogram is None:
+                histogram = RollingHistogram(RENDER_STATS_WINDOW, RENDER_TIME_BUCKETS_MS)
+                self.layer_render_times[name] = histogram
+            histogram.add(elapsed_ms)
+        # 已移除的图层不再显示
+        for name in set(self.layer_render_times) - set(times):
+            del self.layer_render_times[name]
+        if self.render_callback:
+            self.render_callback(self.get_render_stats())
+    
+    def get_render_stats(self):
+        """渲染统计汇总（耗时单位毫秒）"""
+        return {
+            "render_ms": self.render_times.summary(),
+            "render_histogram": self.render_times.histogram(),
+            "tiles_per_render": self.render_tiles.summary(),
+            "tile_hits_per_render": self.render_tile_hits.summary(),
+            "cancelled": self.renders_cancelled,
+            "layers_ms": {
+                name: histogram.summary() for name, histogram in self.layer_render_times.items()
+            },
+            "refresh": self.get_refresh_stats(),
+        }
+    
     def set_extent(self, xmin: float, ymin: float, xmax: float, ymax: float):
         """设置地图显示范围"""
         from qgis.core import QgsRectangle
         extent = QgsRectangle(xmin, ymin, xmax, ymax)
         self.canvas.setExtent(extent)
-        self.canvas.refresh()
+        self.request_refresh()
         print(f"地图引擎：设置显示范围 {extent.toString()}")
     
     def set_default_extent(self):
@@ -40,8 +229,34 @@ class MapEngine:
     
     def refresh(self):
         """刷新地图显示"""
+        self.request_refresh()
+    
+    def request_refresh(self):
+        """请求刷新：标记画布为待重绘，在下一轮事件循环统一重绘一次
+        
+        各模块都应通过此方法刷新画布，而不是直接调用 canvas.refresh()。
+        """
+        self.refresh_requests += 1
+        if self._refresh_pending:
+            self.suppressed_refreshes += 1
+            return
+        self._refresh_pending = True
+        QTimer.singleShot(0, self._flush_refresh)
+    
+    def _flush_refresh(self):
+        """执行合并后的重绘"""
+        self._refresh_pending = False
+        self.refresh_count += 1
         self.canvas.refresh()
     
+    def get_refresh_stats(self):
+        """刷新统计：请求次数、实际重绘次数、被合并（省去）的次数"""
+        return {
+            "requests": self.refresh_requests,
+            "renders": self.refresh_count,
+            "suppressed": self.suppressed_refreshes,
+        }
+    
     def get_canvas(self):
         """获取地图画布"""
         return self.canvas
@@ -61,7 +276,7 @@ class MapEngine:
                 center.y() + new_height / 2.0,
             )
             self.canvas.setExtent(new_extent)
-            self.canvas.refresh()
+            self.request_refresh()
         except Exception as e:
             print(f"[WARN] 放大失败: {e}")
 
@@ -80,6 +295,6 @@ class MapEngine:
                 center.y() + new_height / 2.0,
             )
             self.canvas.setExtent(new_extent)
-            self.canvas.refresh()
+            self.request_refresh()
         except Exception as e:
             print(f"[WARN] 缩小失败: {e}")
\ No newline at end of file
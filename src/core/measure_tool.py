@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+测量工具模块 - 在画布上逐点测量椭球面距离与闭合面积
+
+- 每段距离在加点时用 QgsDistanceArea（WGS84 椭球）计算一次并累加；
+- 面积按球面多边形的逐边公式累加，每条边的贡献只计算一次；
+- 鼠标移动时只重新计算最后一段（末点到光标）和闭合边（光标到首点），
+  只更新一条 3 个点的橡皮筋线，因此与已有顶点数无关。
+"""
+
+import math
+
+from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtGui import QColor
+from qgis.core import (
+    QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsDistanceArea, QgsPointXY,
+    QgsProject, QgsWkbTypes
+)
+from qgis.gui import QgsMapTool, QgsRubberBand
+
+from ..constants import MEASURE_ELLIPSOID
+
+# 与椭球面积相等的球半径（WGS84 等面积球），用于逐边面积公式
+AUTHALIC_RADIUS = 6371007.2
+
+LINE_COLOR = QColor(230, 80, 30, 220)
+PREVIEW_COLOR = QColor(230, 80, 30, 140)
+
+
+def _edge_area_term(p1, p2) -> float:
+    """球面多边形面积公式中一条边的贡献（弧度），p1、p2 为经纬度点"""
+    dlon = math.radians(p2.x() - p1.x())
+    # 跨越 180° 经线时取较短的方向
+    dlon = (dlon + math.pi) % (2.0 * math.pi) - math.pi
+    return dlon * (2.0 + math.sin(math.radians(p1.y())) + math.sin(math.radians(p2.y())))
+
+
+def format_distance(meters: float) -> str:
+    if meters >= 1000.0:
+        return f"{meters / 1000.0:.2f} km"
+    return f"{meters:.1f} m"
+
+
+def format_area(square_meters: float) -> str:
+    if square_meters >= 1e6:
+        return f"{square_meters / 1e6:.2f} km²"
+    return f"{square_meters:.0f} m²"
+
+
+class GeodesicMeasurement:
+    """逐点累加的测量结果：总长与面积项随加点/删点增量维护"""
+
+    def __init__(self, source_crs: QgsCoordinateReferenceSystem):
+        transform_context = QgsProject.instance().transformContext()
+        self.distance_area = QgsDistanceArea()
+        self.distance_area.setSourceCrs(source_crs, transform_context)
+        self.distance_area.setEllipsoid(MEASURE_ELLIPSOID)
+        self.to_lonlat = QgsCoordinateTransform(
+            source_crs, QgsCoordinateReferenceSystem("EPSG:4326"), transform_context
+        )
+        self.points = []  # 画布坐标
+        self._lonlat = []  # 经纬度坐标（面积计算用）
+        self._segments = []  # 每段长度（米）
+        self._area_terms = []  # 每条边的面积项
+        self.length = 0.0
+        self._area_sum = 0.0
+
+    def __len__(self):
+        return len(self.points)
+
+    def add_point(self, point: QgsPointXY):
+        lonlat = self.to_lonlat.transform(point)
+        if self.points:
+            segment = self.distance_area.measureLine(self.points[-1], point)
+            term = _edge_area_term(self._lonlat[-1], lonlat)
+            self._segments.append(segment)
+            self._area_terms.append(term)
+            self.length += segment
+            self._area_sum += term
+        self.points.append(QgsPointXY(point))
+        self._lonlat.append(lonlat)
+
+    def remove_last_point(self):
+        if not self.points:
+            return
+        self.points.pop()
+        self._lonlat.pop()
+        if self._segments:
+            self.length -= self._segments.pop()
+            self._area_sum -= self._area_terms.pop()
+
+    def preview(self, cursor: QgsPointXY):
+        """光标处的临时结果：(总长, 最后一段长度, 闭合面积)，只计算与光标相连的两条边"""
+        if not self.points:
+            return 0.0, 0.0, 0.0
+        segment = self.distance_area.measureLine(self.points[-1], cursor)
+        area = 0.0
+        if len(self.points) >= 2:
+            lonlat = self.to_lonlat.transform(cursor)
+            total = (self._area_sum + _edge_area_term(self._lonlat[-1], lonlat)
+                     + _edge_area_term(lonlat, self._lonlat[0]))
+            area = abs(total) * AUTHALIC_RADIUS * AUTHALIC_RADIUS / 2.0
+        return self.length + segment, segment, area
+
+    def area(self) -> float:
+        """已确定顶点围成的闭合面积（平方米）"""
+        if len(self.points) < 3:
+            return 0.0
+        total = self._area_sum + _edge_area_term(self._lonlat[-1], self._lonlat[0])
+        return abs(total) * AUTHALIC_RADIUS * AUTHALIC_RADIUS / 2.0
+
+
+class MeasureTool(QgsMapTool):
+    """测量地图工具：左键加点，右键结束，Backspace 撤销上一点，Esc 清除"""
+
+    def __init__(self, canvas, result_callback=None, active_callback=None):
+        super().__init__(canvas)
+        self.result_callback = result_callback  # 测量结果文本
+        self.active_callback = active_callback  # 工具启用/停用
+        self.measurement = None
+        self.finished = False
+        self.setCursor(Qt.CrossCursor)
+
+        self.line_band = QgsRubberBand(canvas, QgsWkbTypes.LineGeometry)
+        self.line_band.setColor(LINE_COLOR)
+        self.line_band.setWidth(2)
+        # 跟随光标的预览线：末点 -> 光标 -> 首点，固定 3 个点
+        self.preview_band = QgsRubberBand(canvas, QgsWkbTypes.LineGeometry)
+        self.preview_band.setColor(PREVIEW_COLOR)
+        self.preview_band.setWidth(1)
+        self.preview_band.setLineStyle(Qt.DashLine)
+        canvas.destinationCrsChanged.connect(self.clear)
+
+    def activate(self):
+        super().activate()
+        if self.active_callback:
+            self.active_callback(True)
+        self._report("测量：左键加点，右键结束，Backspace 撤销，Esc 清除")
+
+    def deactivate(self):
+        self.clear()
+        super().deactivate()
+        if self.active_callback:
+            self.active_callback(False)
+
+    def clear(self):
+        """清除当前测量"""
+        self.measurement = None
+        self.finished = False
+        self.line_band.reset(QgsWkbTypes.LineGeometry)
+        self.preview_band.reset(QgsWkbTypes.LineGeometry)
+
+    def _report(self, text: str):
+        if self.result_callback:
+            self.result_callback(text)
+
+    def _result_text(self, length: float, segment: float, area: float) -> str:
+        text = f"距离 {format_distance(length)}"
+        if segment:
+            text += f" · 本段 {format_distance(segment)}"
+        if area:
+            text += f" · 闭合面积 {format_area(area)}"
+        return text
+
+    def _update_preview(self, cursor: QgsPointXY):
+        """只移动预览线上的光标点"""
+        points = self.measurement.points
+        if self.preview_band.numberOfVertices() != 3:
+            self.preview_band.reset(QgsWkbTypes.LineGeometry)
+            for point in (points[-1], cursor, points[0]):
+                self.preview_band.addPoint(point, False)
+            self.preview_band.updatePosition()
+            self.preview_band.update()
+        else:
+            self.preview_band.movePoint(0, points[-1])
+            self.preview_band.movePoint(1, cursor)
+            self.preview_band.movePoint(2, points[0])
+
+    def canvasMoveEvent(self, event):
+        if self.measurement is None or self.finished or not len(self.measurement):
+            return
+        cursor = event.mapPoint()
+        self._update_preview(cursor)
+        self._report(self._result_text(*self.measurement.preview(cursor)))
+
+    def canvasReleaseEvent(self, event):
+        point = event.mapPoint()
+        if event.button() == Qt.RightButton:
+            self._finish()
+            return
+        if event.button() != Qt.LeftButton:
+            return
+        if self.measurement is None or self.finished:
+            self.clear()
+            self.measurement = GeodesicMeasurement(self.canvas().mapSettings().destinationCrs())
+        self.measurement.add_point(point)
+        self.line_band.addPoint(point, True)
+        self._update_preview(point)
+        self._report(self._result_text(self.measurement.length, 0.0, self.measurement.area()))
+
+    def _finish(self):
+        """结束本次测量，保留结果线"""
+        if self.measurement is None:
+            return
+        self.finished = True
+        self.preview_band.reset(QgsWkbTypes.LineGeometry)
+        self._report("测量结果：" + self._result_text(self.measurement.length, 0.0, self.measurement.area()))
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.clear()
+            self._report("测量已清除")
+        elif event.key() == Qt.Key_Backspace and self.measurement and not self.finished:
+            self.measurement.remove_last_point()
+            self.line_band.removeLastPoint()
+            self.preview_band.reset(QgsWkbTypes.LineGeometry)
+            if not len(self.measurement):
+                self.clear()
+                return
+            self._report(self._result_text(self.measurement.length, 0.0, self.measurement.area()))
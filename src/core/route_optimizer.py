@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+巡航路线优化模块 - 把几十到几百个监测站点排成一条（或几条）高效的巡航路线
+
+- 距离矩阵：默认为大圆距离；给出导航网格时，连线穿过陆地的站点对改用网格上的海上距离。
+  海上距离以站点所在格网为源做多目标 Dijkstra（到达全部所需目标即停止），
+  不同的源在多个进程中并行计算；
+- 求解：最近邻构造初始路线，交替做 2-opt 与 Or-opt（向量化计算每一步的全部候选），
+  局部最优后在剩余时间内做扰动（double-bridge）再局部搜索，每次改进记录 (耗时, 路线长度)；
+- 多航次（VRP）：给出单航次航程上限时，把整条路线最优切分为若干从起点出发并返回的航次，
+  每个航次再单独优化。
+
+本模块不依赖 QGIS，可以在子进程中导入。
+"""
+
+import heapq
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..constants import ROUTE_OPT_TIME_BUDGET
+from ..utils.geodesy import MEAN_EARTH_RADIUS, distance_matrix_m
+
+UNREACHABLE_PENALTY_M = 1e9  # 没有海上通路的站点对
+IMPROVEMENT_EPS = 1e-6
+
+# 8 邻域移动：(行偏移, 列偏移)
+_MOVES = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+
+_worker_grid = None  # 子进程中的网格：(可通行字节串, 行数, 列数, 每行东西向缩放)
+
+
+def _make_search_grid(water: np.ndarray, ymax: float, resolution: float):
+    rows, cols = water.shape
+    lats = ymax - (np.arange(rows) + 0.5) * resolution
+    row_scale = np.cos(np.radians(lats)).clip(0.01).tolist()
+    return np.ascontiguousarray(water, dtype=bool).tobytes(), rows, cols, row_scale
+
+
+def _init_worker(water, ymax, resolution):
+    global _worker_grid
+    _worker_grid = _make_search_grid(water, ymax, resolution)
+
+
+def grid_distances(search_grid, source, targets) -> dict:
+    """从 source 格网出发的多目标 Dijkstra，返回 {目标格网: 代价}（单位为南北方向一格）
+
+    移动规则与航线规划相同（8 邻域，不斜穿陆地角点）；全部目标到达后停止。
+    """
+    passable, rows, cols, row_scale = search_grid
+    remaining = {r * cols + c for r, c in targets}
+    start = source[0] * cols + source[1]
+    best = {start: 0.0}
+    heap = [(0.0, start)]
+    found = {}
+    while heap and remaining:
+        cost, index = heapq.heappop(heap)
+        if cost > best.get(index, math.inf):
+            continue
+        if index in remaining:
+            remaining.discard(index)
+            found[divmod(index, cols)] = cost
+        row, col = divmod(index, cols)
+        scale = row_scale[row]
+        diagonal = math.sqrt(scale * scale + 1.0)
+        for dr, dc in _MOVES:
+            nr, nc = row + dr, col + dc
+            if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
+                continue
+            neighbor = nr * cols + nc
+            if not passable[neighbor]:
+                continue
+            if dr and dc:
+                if not (passable[row * cols + nc] and passable[nr * cols + col]):
+                    continue
+                step = diagonal
+            else:
+                step = scale if dc else 1.0
+            new_cost = cost + step
+            if new_cost < best.get(neighbor, math.inf):
+                best[neighbor] = new_cost
+                heapq.heappush(heap, (new_cost, neighbor))
+    return found
+
+
+def _worker_distances(task):
+    source, targets = task
+    return source, grid_distances(_worker_grid, source, targets)
+
+
+def _blocked_pairs(cells: np.ndarray, water: np.ndarray) -> np.ndarray:
+    """站点两两之间的连线是否穿过陆地（在网格上按半格步长采样）"""
+    count = len(cells)
+    blocked = np.zeros((count, count), dtype=bool)
+    for i in range(count - 1):
+        others = cells[i + 1:]
+        span = np.abs(others - cells[i]).max()
+        t = np.arange(2 * span + 2) / (2 * span + 1)
+        rows = np.rint(cells[i, 0] + np.outer(t, others[:, 0] - cells[i, 0])).astype(np.intp)
+        cols = np.rint(cells[i, 1] + np.outer(t, others[:, 1] - cells[i, 1])).astype(np.intp)
+        blocked[i, i + 1:] = ~water[rows, cols].all(axis=0)
+    return blocked | blocked.T
+
+
+def _distance_tasks(cells: np.ndarray, blocked: np.ndarray):
+    """选出做 Dijkstra 的源格网及各自的目标格网
+
+    同一格网内的站点共用一次搜索；每次贪心地选覆盖最多未计算站点对的格网作为源，
+    使源的数量尽量少（一次搜索可以到达任意多个目标）。
+    """
+    keys = [tuple(cell) for cell in cells]
+    pending = {}
+    for i, j in zip(*np.nonzero(np.triu(blocked))):
+        a, b = keys[i], keys[j]
+        if a != b:
+            pending.setdefault(a, set()).add(b)
+            pending.setdefault(b, set()).add(a)
+    tasks = []
+    while pending:
+        source = max(pending, key=lambda cell: len(pending[cell]))
+        targets = pending.pop(source)
+        tasks.append((source, sorted(targets)))
+        for target in targets:
+            others = pending.get(target)
+            if others is not None:
+                others.discard(source)
+                if not others:
+                    del pending[target]
+    return tasks
+
+
+def build_distance_matrix(points, grid=None, workers: int = None):
+    """站点距离矩阵（米），返回 (矩阵, 穿过陆地的站点对矩阵)
+
+    grid 为导航网格（RoutePlanner 的某一级），为 None 时全部使用大圆距离。
+    """
+    distances = distance_matrix_m(points)
+    count = len(points)
+    blocked = np.zeros((count, count), dtype=bool)
+    if grid is None or count < 2:
+        return distances, blocked
+
+    cells = []
+    for lon, lat in points:
+        cell = grid.snap(lon, lat)
+        cells.append(cell if cell is not None else (-1, -1))
+    cells = np.array(cells, dtype=np.intp)
+    on_grid = cells[:, 0] >= 0
+    inside = np.flatnonzero(on_grid)
+    if len(inside) >= 2:
+        sub = _blocked_pairs(cells[inside], grid.water)
+        blocked[np.ix_(inside, inside)] = sub
+    if not blocked.any():
+        return distances, blocked
+
+    tasks = _distance_tasks(cells, blocked)
+
+    results = {}
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                initargs=(grid.water, grid.ymax, grid.resolution)
+            ) as pool:
+                results = dict(pool.map(_worker_distances, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+        except (OSError, RuntimeError) as e:
+            print(f"[WARN] 并行计算海上距离失败，改为单进程: {e}")
+            results = {}
+    if not results:
+        search_grid = _make_search_grid(grid.water, grid.ymax, grid.resolution)
+        results = {source: grid_distances(search_grid, source, targets) for source, targets in tasks}
+
+    meters_per_cell = math.radians(grid.resolution) * MEAN_EARTH_RADIUS
+    unreachable = 0
+    for i, j in zip(*np.nonzero(np.triu(blocked))):
+        a, b = tuple(cells[i]), tuple(cells[j])
+        # 每对站点只由其中一端做源计算，两端都可能是其他站点对的源，需两个方向都查
+        cost = 0.0 if a == b else results.get(a, {}).get(b)
+        if cost is None and a != b:
+            cost = results.get(b, {}).get(a)
+        if cost is None:
+            value = distances[i, j] + UNREACHABLE_PENALTY_M
+            unreachable += 1
+        else:
+            # 网格距离略大于实际航程，但不会小于大圆距离
+            value = max(distances[i, j], cost * meters_per_cell)
+        distances[i, j] = distances[j, i] = value
+    if unreachable:
+        print(f"巡航路线优化：{unreachable} 对站点之间没有海上通路")
+    return distances, blocked
+
+
+def tour_length(tour, distances: np.ndarray) -> float:
+    """闭合路线的长度"""
+    return float(distances[tour, np.roll(tour, -1)].sum())
+
+
+def nearest_neighbor_tour(distances: np.ndarray, start: int = 0) -> np.ndarray:
+    """最近邻构造初始路线"""
+    count = len(distances)
+    visited = np.zeros(count, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    current = start
+    for _ in range(count - 1):
+        row = np.where(visited, np.inf, distances[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        tour.append(current)
+    return np.array(tour, dtype=np.intp)
+
+
+def two_opt(tour: np.ndarray, distances: np.ndarray, deadline: float) -> bool:
+    """一轮 2-opt：对每条边一次算出与所有后续边交换的收益，取最好的一个"""
+    count = len(tour)
+    improved = False
+    following = np.roll(tour, -1)
+    for i in range(count - 2):
+        a, b = tour[i], tour[i + 1]
+        c, d = tour[i + 2:], following[i + 2:]
+        delta = distances[a, c] + distances[b, d] - distances[a, b] - distances[c, d]
+        if i == 0:
+            delta[-1] = 0.0  # 最后一条边与第一条边相邻
+        k = int(np.argmin(delta))
+        if delta[k] < -IMPROVEMENT_EPS:
+            j = i + 2 + k
+            tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1].copy()
+            following = np.roll(tour, -1)
+            improved = True
+        if time.perf_counter() > deadline:
+            break
+    return improved
+
+
+def or_opt(tour: np.ndarray, distances: np.ndarray, deadline: float) -> bool:
+    """一轮 Or-opt：把 1~3 个连续站点（可反向）移到其他两站之间"""
+    count = len(tour)
+    improved = False
+    for length in (1, 2, 3):
+        i = 1
+        while i + length <= count and count - length >= 3:
+            segment = tour[i:i + length]
+            first, last = segment[0], segment[-1]
+            prev_node, next_node = tour[i - 1], tour[(i + length) % count]
+            gain = (distances[prev_node, first] + distances[last, next_node]
+                    - distances[prev_node, next_node])
+            rest = np.concatenate((tour[:i], tour[i + length:]))
+            u, v = rest, np.roll(rest, -1)
+            forward = distances[u, first] + distances[last, v] - distances[u, v]
+            backward = distances[u, last] + distances[first, v] - distances[u, v]
+            cost = np.minimum(forward, backward)
+            k = int(np.argmin(cost))
+            if cost[k] < gain - IMPROVEMENT_EPS:
+                insert = segment if forward[k] <= backward[k] else segment[::-1]
+                tour[:] = np.concatenate((rest[:k + 1], insert, rest[k + 1:]))
+                improved = True
+            i += 1
+            if time.perf_counter() > deadline:
+                return improved
+    return improved
+
+
+def _local_search(tour: np.ndarray, distances: np.ndarray, deadline: float):
+    while time.perf_counter() < deadline:
+        changed = two_opt(tour, distances, deadline)
+        changed = or_opt(tour, distances, deadline) or changed
+        if not changed:
+            break
+
+
+def _double_bridge(tour: np.ndarray, rng) -> np.ndarray:
+    """double-bridge 扰动：把路线切成四段 A B C D，重排为 A C B D"""
+    count = len(tour)
+    a, b, c = sorted(rng.choice(np.arange(1, count), size=3, replace=False))
+    return np.concatenate((tour[:a], tour[b:c], tour[a:b], tour[c:]))
+
+
+def solve_tour(distances: np.ndarray, start: int = 0, time_budget: float = ROUTE_OPT_TIME_BUDGET,
+               seed: int = 0, progress=None):
+    """求闭合路线，返回 (从 start 开始的站点顺序, 长度, 改进记录 [(秒, 长度)])
+
+    progress(秒, 长度) 在每次找到更短路线时调用。
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    count = len(distances)
+    history = []
+
+    def record(length):
+        elapsed = time.perf_counter() - started
+        history.append((elapsed, length))
+        if progress:
+            progress(elapsed, length)
+
+    best = nearest_neighbor_tour(distances, start)
+    if count <= 3:
+        return best, tour_length(best, distances), [(0.0, tour_length(best, distances))]
+    best_length = tour_length(best, distances)
+    record(best_length)
+
+    _local_search(best, distances, deadline)
+    best_length = tour_length(best, distances)
+    record(best_length)
+
+    # 迭代局部搜索：扰动当前最优解后再局部搜索，更短则接受
+    rng = np.random.default_rng(seed)
+    while count >= 8 and time.perf_counter() < deadline:
+        candidate = _double_bridge(best, rng)
+        _local_search(candidate, distances, deadline)
+        length = tour_length(candidate, distances)
+        if length < best_length - IMPROVEMENT_EPS:
+            best, best_length = candidate, length
+            record(best_length)
+
+    position = int(np.flatnonzero(best == start)[0])
+    return np.roll(best, -position), best_length, history
+
+
+def solve_open_path(distances: np.ndarray, start: int = 0, time_budget: float = ROUTE_OPT_TIME_BUDGET,
+                    seed: int = 0, progress=None):
+    """求从 start 出发、不返回的路线
+
+    加入一个虚拟站点：到起点的距离为 0，到其他站点为同一个大常数，
+    最优闭合路线必然经过「虚拟站点 - 起点」，去掉虚拟站点即为开放路线。
+    """
+    count = len(distances)
+    big = float(distances.max()) * count + 1.0
+    extended = np.full((count + 1, count + 1), big)
+    extended[:count, :count] = distances
+    extended[count, count] = 0.0
+    extended[count, start] = extended[start, count] = 0.0
+    tour, length, history = solve_tour(extended, start, time_budget, seed, progress=(
+        (lambda elapsed, value: progress(elapsed, value - big)) if progress else None
+    ))
+    if tour[1] == count:
+        tour = np.concatenate((tour[:1], tour[2:][::-1]))
+    else:
+        tour = tour[tour != count]
+    return tour, length - big, [(elapsed, value - big) for elapsed, value in history]
+
+
+def split_trips(order, distances: np.ndarray, depot: int, max_length: float):
+    """把经过全部站点的顺序最优切分为若干往返航次（每个航次航程不超过 max_length）
+
+    order 不含起点；动态规划求航次总航程最小的切分，返回 [[站点...], ...]。
+    单个站点往返已超过上限时该站点单独成为一个航次。
+    """
+    count = len(order)
+    best = [0.0] + [math.inf] * count
+    previous = [0] * (count + 1)
+    for i in range(count):
+        if best[i] == math.inf:
+            continue
+        path = 0.0
+        for j in range(i, count):
+            if j > i:
+                path += distances[order[j - 1], order[j]]
+            trip = distances[depot, order[i]] + path + distances[order[j], depot]
+            if trip > max_length and j > i:
+                break
+            if best[i] + trip < best[j + 1]:
+                best[j + 1] = best[i] + trip
+                previous[j + 1] = i
+    trips = []
+    j = count
+    while j > 0:
+        i = previous[j]
+        trips.append(list(order[i:j]))
+        j = i
+    trips.reverse()
+    return trips
+
+
+def optimize_route(points, grid=None, depot: int = 0, return_to_depot: bool = True,
+                   max_trip_m: float = None, time_budget: float = ROUTE_OPT_TIME_BUDGET,
+                   workers: int = None, progress=None) -> dict:
+    """巡航路线优化
+
+    points 为站点 (经度, 纬度) 列表，depot 为出发站点的序号。
+    给出 max_trip_m 时切分为多个往返航次（此时总是返回起点）。
+    返回 {"trips": [[站点序号...], ...], "length_m", "history", "matrix_ms", "solve_ms",
+    "sea_pairs", "blocked"}，每个航次从起点开始，返回起点时以起点结尾。
+    """
+    started = time.perf_counter()
+    distances, blocked = build_distance_matrix(points, grid, workers)
+    matrix_ms = (time.perf_counter() - started) * 1000.0
+
+    solve_started = time.perf_counter()
+    if return_to_depot or max_trip_m:
+        order, length, history = solve_tour(distances, depot, time_budget, progress=progress)
+    else:
+        order, length, history = solve_open_path(distances, depot, time_budget, progress=progress)
+
+    if max_trip_m:
+        trips = []
+        parts = split_trips([int(i) for i in order[1:]], distances, depot, max_trip_m)
+        budget = time_budget / max(1, len(parts)) / 4.0
+        for part in parts:
+            stations = [depot] + part
+            sub = distances[np.ix_(stations, stations)]
+            sub_order, _, _ = solve_tour(sub, 0, budget)
+            trips.append([stations[i] for i in sub_order] + [depot])
+        length = sum(tour_length(np.array(trip[:-1]), distances) for trip in trips)
+    else:
+        trip = [int(i) for i in order]
+        trips = [trip + [depot] if return_to_depot else trip]
+
+    return {
+        "trips": trips,
+        "length_m": float(length),
+        "history": history,
+        "matrix_ms": matrix_ms,
+        "solve_ms": (time.perf_counter() - solve_started) * 1000.0,
+        "sea_pairs": int(np.triu(blocked).sum()),
+        "blocked": blocked,
+    }
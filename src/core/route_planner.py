@@ -0,0 +1,493 @@
+# -*- coding: utf-8 -*-
+"""
+航线规划模块 - 在陆地/水域导航网格上求两点间的最短海上航线
+
+- 陆地面数据一次性栅格化为经纬度导航网格（按离岸安全距离向外扩展陆地），
+  结果以 npz 保存在磁盘上，数据和参数不变时直接读取；
+- 网格按 ROUTE_LEVEL_FACTOR 逐级合并为多级网格（粗网格中只要包含水域即可通行）。
+  先在最粗一级上完整搜索，之后每一级沿上一级航线分段、只在航线周围的走廊内做 A* 搜索，
+  长距离航线不需要在最细网格上从头搜到尾；
+- 最细一级的格网路径再按视线拉直，去掉网格造成的锯齿。
+"""
+
+import hashlib
+import heapq
+import math
+import os
+import time
+
+import numpy as np
+from qgis.PyQt.QtCore import QPointF, Qt
+from qgis.PyQt.QtGui import QImage, QPainter, QPainterPath, QPen, QPolygonF, QTransform
+from qgis.core import (
+    QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsProject, QgsWkbTypes
+)
+
+from ..constants import (
+    ROUTE_CLEARANCE_CELLS, ROUTE_COARSE_MAX_CELLS, ROUTE_CORRIDOR_CELLS, ROUTE_GRID_BOUNDS,
+    ROUTE_GRID_CACHE_DIR, ROUTE_GRID_RESOLUTION, ROUTE_HEURISTIC_WEIGHT, ROUTE_LEVEL_FACTOR,
+    ROUTE_MAX_EXPANDED, ROUTE_SEGMENT_CELLS, ROUTE_SNAP_CELLS
+)
+from ..utils.geodesy import path_length_m
+
+GRID_FORMAT_VERSION = 1  # 栅格化方式变化时递增，使旧缓存失效
+
+# 8 邻域移动：(行偏移, 列偏移)
+_MOVES = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def dilate(mask: np.ndarray, cells: int) -> np.ndarray:
+    """布尔网格按 4 邻域向外扩展 cells 格"""
+    out = mask.copy()
+    for _ in range(cells):
+        grown = out.copy()
+        grown[1:, :] |= out[:-1, :]
+        grown[:-1, :] |= out[1:, :]
+        grown[:, 1:] |= out[:, :-1]
+        grown[:, :-1] |= out[:, 1:]
+        out = grown
+    return out
+
+
+def _polygons(geometry):
+    """几何体中的多边形列表（每个多边形为若干环）"""
+    if QgsWkbTypes.geometryType(geometry.wkbType()) != QgsWkbTypes.PolygonGeometry:
+        return []
+    if geometry.isMultipart():
+        return geometry.asMultiPolygon()
+    return [geometry.asPolygon()]
+
+
+def rasterize_land(geometries, bounds, resolution: float) -> np.ndarray:
+    """把经纬度面几何栅格化为陆地网格（True 为陆地，第 0 行在北）
+
+    用 QPainter 在灰度图上填充多边形（奇偶规则处理内环），并描一像素宽的边，
+    保证小于一个格网的岛礁也会被标记为陆地。
+    """
+    xmin, ymin, xmax, ymax = bounds
+    cols = int(math.ceil((xmax - xmin) / resolution))
+    rows = int(math.ceil((ymax - ymin) / resolution))
+    image = QImage(cols, rows, QImage.Format_Grayscale8)
+    image.fill(0)
+
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing, False)
+    painter.setTransform(QTransform(
+        1.0 / resolution, 0.0, 0.0, -1.0 / resolution, -xmin / resolution, ymax / resolution
+    ))
+    pen = QPen(Qt.white)
+    pen.setCosmetic(True)
+    pen.setWidth(0)
+    painter.setPen(pen)
+    painter.setBrush(Qt.white)
+    for geometry in geometries:
+        for polygon in _polygons(geometry):
+            path = QPainterPath()
+            path.setFillRule(Qt.OddEvenFill)
+            for ring in polygon:
+                path.addPolygon(QPolygonF([QPointF(p.x(), p.y()) for p in ring]))
+                path.closeSubpath()
+            painter.drawPath(path)
+    painter.end()
+
+    bits = image.constBits()
+    bits.setsize(image.bytesPerLine() * rows)
+    pixels = np.frombuffer(bits, np.uint8).reshape(rows, image.bytesPerLine())[:, :cols]
+    return pixels > 0
+
+
+class NavigationGrid:
+    """经纬度导航网格：water[行, 列] 为 True 表示可通行，第 0 行在北"""
+
+    def __init__(self, water: np.ndarray, xmin: float, ymax: float, resolution: float):
+        self.water = np.ascontiguousarray(water, dtype=bool)
+        self.rows, self.cols = self.water.shape
+        self.xmin = xmin
+        self.ymax = ymax
+        self.resolution = resolution
+        # 每行东西方向一格相对南北方向一格的长度（cos 纬度），用于移动代价
+        lats = ymax - (np.arange(self.rows) + 0.5) * resolution
+        self.row_scale = np.cos(np.radians(lats)).clip(0.01).tolist()
+        self.min_scale = min(self.row_scale)
+
+    @classmethod
+    def from_geometries(cls, geometries, bounds=ROUTE_GRID_BOUNDS,
+                        resolution: float = ROUTE_GRID_RESOLUTION,
+                        clearance_cells: int = ROUTE_CLEARANCE_CELLS):
+        land = rasterize_land(geometries, bounds, resolution)
+        if clearance_cells > 0:
+            land = dilate(land, clearance_cells)
+        return cls(~land, bounds[0], bounds[3], resolution)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            xmin, ymax, resolution = data["origin"].tolist()
+            return cls(data["water"], xmin, ymax, resolution)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            temp_path, water=self.water, origin=np.array([self.xmin, self.ymax, self.resolution])
+        )
+        os.replace(temp_path, path)
+
+    def downsample(self, factor: int):
+        """合并 factor x factor 个格网为一格（其中有水域即可通行）"""
+        rows = -(-self.rows // factor) * factor
+        cols = -(-self.cols // factor) * factor
+        padded = np.zeros((rows, cols), dtype=bool)
+        padded[:self.rows, :self.cols] = self.water
+        water = padded.reshape(rows // factor, factor, cols // factor, factor).any(axis=(1, 3))
+        return NavigationGrid(water, self.xmin, self.ymax, self.resolution * factor)
+
+    def cell(self, lon: float, lat: float):
+        """经纬度所在的格网 (行, 列)，超出网格返回 None"""
+        row = int(math.floor((self.ymax - lat) / self.resolution))
+        col = int(math.floor((lon - self.xmin) / self.resolution))
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def center(self, row: int, col: int):
+        """格网中心的经纬度"""
+        return self.xmin + (col + 0.5) * self.resolution, self.ymax - (row + 0.5) * self.resolution
+
+    def snap(self, lon: float, lat: float, max_cells: int = ROUTE_SNAP_CELLS):
+        """航点所在格网；位于陆地时取最近的水域格网，找不到返回 None"""
+        cell = self.cell(lon, lat)
+        if cell is None:
+            return None
+        row, col = cell
+        if self.water[row, col]:
+            return cell
+        for radius in range(1, max_cells + 1):
+            r0, c0 = max(0, row - radius), max(0, col - radius)
+            window = self.water[r0:row + radius + 1, c0:col + radius + 1]
+            found = np.argwhere(window)
+            if len(found):
+                distance = (found[:, 0] + r0 - row) ** 2 + (found[:, 1] + c0 - col) ** 2
+                r, c = found[int(np.argmin(distance))]
+                return int(r) + r0, int(c) + c0
+        return None
+
+    def line_clear(self, start, end) -> bool:
+        """两格网中心的连线是否全部经过水域"""
+        steps = 2 * max(abs(end[0] - start[0]), abs(end[1] - start[1])) + 1
+        t = np.arange(steps + 1) / steps
+        rows = np.rint(start[0] + (end[0] - start[0]) * t).astype(np.intp)
+        cols = np.rint(start[1] + (end[1] - start[1]) * t).astype(np.intp)
+        return bool(self.water[rows, cols].all())
+
+
+def astar(grid: NavigationGrid, start, goal, allowed: np.ndarray = None, origin=(0, 0),
+          weight: float = 1.0, max_expanded: int = None):
+    """8 邻域 A* 搜索，返回 (格网路径, 展开的格网数)，不可达时路径为 None
+
+    allowed 为可通行范围（默认整级网格的水域），可以只是网格的一个窗口，
+    窗口左上角在网格中的位置为 origin；起终点和返回的路径都使用整级网格的坐标。
+    代价以南北方向一格为单位，东西方向按所在行的 cos 纬度缩放；
+    启发函数为按窗口内最小缩放系数计算的八方向距离，weight 为 1 时保证不高估，
+    大于 1 时展开更少的格网、代价最多为最优值的 weight 倍。
+    f 值相同时优先展开 g 值较大（离终点较近）的格网。展开数超过 max_expanded 时放弃。
+    """
+    if allowed is None:
+        allowed = grid.water
+    rows, cols = allowed.shape
+    row0, col0 = origin
+    passable = allowed.tobytes()
+    row_scale = grid.row_scale[row0:row0 + rows]
+    start_row, start_col = start[0] - row0, start[1] - col0
+    goal_row, goal_col = goal[0] - row0, goal[1] - col0
+    if not (0 <= start_row < rows and 0 <= start_col < cols
+            and 0 <= goal_row < rows and 0 <= goal_col < cols):
+        return None, 0
+    start_index = start_row * cols + start_col
+    goal_index = goal_row * cols + goal_col
+    if not (passable[start_index] and passable[goal_index]):
+        return None, 0
+
+    # cos 纬度在窗口的上边或下边取得最小值
+    k = min(row_scale[0], row_scale[-1])
+    k_diagonal = math.sqrt(k * k + 1.0)
+
+    def heuristic(row, col):
+        # 无障碍时的八方向最短代价：先走斜线，剩余部分走直线
+        dr, dc = abs(row - goal_row), abs(col - goal_col)
+        if dc >= dr:
+            return weight * (dr * k_diagonal + (dc - dr) * k)
+        return weight * (dc * k_diagonal + (dr - dc))
+
+    best = {start_index: 0.0}
+    parent = {start_index: -1}
+    heap = [(heuristic(start_row, start_col), 0.0, start_index)]
+    closed = set()
+    while heap:
+        _, negative_cost, index = heapq.heappop(heap)
+        if index == goal_index:
+            path = []
+            while index != -1:
+                row, col = divmod(index, cols)
+                path.append((row + row0, col + col0))
+                index = parent[index]
+            path.reverse()
+            return path, len(closed)
+        if index in closed:
+            continue
+        closed.add(index)
+        if max_expanded is not None and len(closed) > max_expanded:
+            break
+        cost = -negative_cost
+        row, col = divmod(index, cols)
+        scale = row_scale[row]
+        diagonal = math.sqrt(scale * scale + 1.0)
+        for dr, dc in _MOVES:
+            nr, nc = row + dr, col + dc
+            if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
+                continue
+            neighbor = nr * cols + nc
+            if not passable[neighbor] or neighbor in closed:
+                continue
+            if dr and dc:
+                # 不允许斜穿两块陆地之间的角点
+                if not (passable[row * cols + nc] and passable[nr * cols + col]):
+                    continue
+                step = diagonal
+            else:
+                step = scale if dc else 1.0
+            new_cost = cost + step
+            if new_cost < best.get(neighbor, math.inf):
+                best[neighbor] = new_cost
+                parent[neighbor] = index
+                heapq.heappush(heap, (new_cost + heuristic(nr, nc), -new_cost, neighbor))
+    return None, len(closed)
+
+
+class RoutePlanner:
+    """多级网格航线规划器"""
+
+    def __init__(self, grid: NavigationGrid, level_factor: int = ROUTE_LEVEL_FACTOR,
+                 coarse_max_cells: int = ROUTE_COARSE_MAX_CELLS,
+                 corridor_cells: int = ROUTE_CORRIDOR_CELLS,
+                 weight: float = ROUTE_HEURISTIC_WEIGHT):
+        self.level_factor = level_factor
+        self.corridor_cells = corridor_cells
+        self.weight = weight
+        # levels[0] 为最细一级
+        self.levels = [grid]
+        while max(self.levels[-1].rows, self.levels[-1].cols) > coarse_max_cells:
+            self.levels.append(self.levels[-1].downsample(level_factor))
+
+    def _corridor(self, path, level_index: int, radius: int):
+        """上一级航线周围 radius 格的可通行范围，返回 (level_index 级网格上的窗口, 窗口左上角)"""
+        coarse = self.levels[level_index + 1]
+        fine = self.levels[level_index]
+        factor = self.level_factor
+        cells = np.asarray(path)
+        row0 = max(0, int(cells[:, 0].min()) - radius)
+        col0 = max(0, int(cells[:, 1].min()) - radius)
+        row1 = min(coarse.rows, int(cells[:, 0].max()) + radius + 1)
+        col1 = min(coarse.cols, int(cells[:, 1].max()) + radius + 1)
+        mask = np.zeros((row1 - row0, col1 - col0), dtype=bool)
+        mask[cells[:, 0] - row0, cells[:, 1] - col0] = True
+        mask = dilate(mask, radius)
+        mask = np.repeat(np.repeat(mask, factor, axis=0), factor, axis=1)
+        origin = (row0 * factor, col0 * factor)
+        window = fine.water[origin[0]:origin[0] + mask.shape[0], origin[1]:origin[1] + mask.shape[1]]
+        return window & mask[:window.shape[0], :window.shape[1]], origin
+
+    def _block_cell(self, level_index: int, coarse_cell):
+        """上一级格网所覆盖的本级格网中，离中心最近的水域格网"""
+        grid = self.levels[level_index]
+        factor = self.level_factor
+        row0, col0 = coarse_cell[0] * factor, coarse_cell[1] * factor
+        found = np.argwhere(grid.water[row0:row0 + factor, col0:col0 + factor])
+        if not len(found):
+            return None
+        center = (factor - 1) / 2.0
+        r, c = found[int(np.argmin(((found - center) ** 2).sum(axis=1)))]
+        return int(r) + row0, int(c) + col0
+
+    def _refine(self, level_index: int, start, goal, coarse_path):
+        """沿上一级航线分段搜索：每隔 ROUTE_SEGMENT_CELLS 个上级格网设一个中间目标，
+        每段只在该段航线的走廊内搜索（绕行障碍时启发函数不会把整条走廊都展开）"""
+        grid = self.levels[level_index]
+        anchors = list(range(ROUTE_SEGMENT_CELLS, len(coarse_path) - 1, ROUTE_SEGMENT_CELLS))
+        targets = [(0, start)]
+        for i in anchors:
+            cell = self._block_cell(level_index, coarse_path[i])
+            if cell is not None:
+                targets.append((i, cell))
+        targets.append((len(coarse_path) - 1, goal))
+
+        path = [start]
+        expanded = 0
+        for (i, a), (j, b) in zip(targets[:-1], targets[1:]):
+            allowed, origin = self._corridor(coarse_path[i:j + 1], level_index, self.corridor_cells)
+            segment, count = astar(grid, a, b, allowed, origin, self.weight)
+            expanded += count
+            if segment is None:
+                return None, expanded
+            path.extend(segment[1:])
+        return path, expanded
+
+    def _search_level(self, level_index: int, start, goal, coarse_path):
+        """在一级网格上搜索：先沿上一级航线分段搜索，不通时在整条走廊内搜索并逐步放宽，
+        最后搜索整级网格"""
+        grid = self.levels[level_index]
+        expanded = 0
+        if coarse_path is not None:
+            path, count = self._refine(level_index, start, goal, coarse_path)
+            expanded += count
+            if path is not None:
+                return path, expanded
+            for radius in (self.corridor_cells, self.corridor_cells * 4, self.corridor_cells * 16):
+                allowed, origin = self._corridor(coarse_path, level_index, radius)
+                path, count = astar(grid, start, goal, allowed, origin, self.weight)
+                expanded += count
+                if path is not None:
+                    return path, expanded
+        # 上一级网格认为连通、本级却不连通（如窄于上级格网的陆地）时可能展开大片水域，限制展开数
+        path, count = astar(grid, start, goal, weight=self.weight, max_expanded=ROUTE_MAX_EXPANDED)
+        return path, expanded + count
+
+    def _plan_leg(self, start, goal):
+        """两个航点之间的格网路径（最细一级），返回 (路径, 展开的格网数)"""
+        path = None
+        expanded = 0
+        for level_index in range(len(self.levels) - 1, -1, -1):
+            grid = self.levels[level_index]
+            start_cell = grid.snap(*start)
+            goal_cell = grid.snap(*goal)
+            if start_cell is None or goal_cell is None:
+                return None, expanded
+            path, count = self._search_level(level_index, start_cell, goal_cell, path)
+            expanded += count
+            if path is None:
+                return None, expanded
+        return path, expanded
+
+    def _straighten(self, path):
+        """按视线拉直格网路径：从当前锚点出发，找仍能直接看到的最远格网作为下一个锚点
+
+        先按 1、2、4… 的步长向前试探，再在最后一段内二分，每个锚点只需检查 O(log n) 条视线。
+        """
+        grid = self.levels[0]
+        last = len(path) - 1
+        result = [path[0]]
+        anchor = 0
+        while anchor < last:
+            step = 1
+            while anchor + step * 2 <= last and grid.line_clear(path[anchor], path[anchor + step * 2]):
+                step *= 2
+            low, high = anchor + step, min(last, anchor + step * 2)
+            if high != low and grid.line_clear(path[anchor], path[high]):
+                low = high
+            while high - low > 1:
+                middle = (low + high) // 2
+                if grid.line_clear(path[anchor], path[middle]):
+                    low = middle
+                else:
+                    high = middle
+            anchor = low
+            result.append(path[anchor])
+        return result
+
+    def plan(self, waypoints):
+        """依次经过各航点的海上航线
+
+        返回 {"points": [(经度, 纬度)], "length_m", "elapsed_ms", "expanded", "legs"}，
+        任一段不可达时返回 None。
+        """
+        started = time.perf_counter()
+        grid = self.levels[0]
+        points = []
+        expanded = 0
+        for start, goal in zip(waypoints[:-1], waypoints[1:]):
+            path, count = self._plan_leg(start, goal)
+            expanded += count
+            if path is None:
+                print(f"航线规划：{start} -> {goal} 不可达")
+                return None
+            leg = [grid.center(*cell) for cell in self._straighten(path)]
+            # 航段首尾使用航点本身（位于水域时），中间为拉直后的格网中心
+            if grid.water[path[0]]:
+                leg[0] = tuple(start)
+            if grid.water[path[-1]]:
+                leg[-1] = tuple(goal)
+            points.extend(leg if not points else leg[1:])
+        return {
+            "points": points,
+            "length_m": path_length_m(points),
+            "elapsed_ms": (time.perf_counter() - started) * 1000.0,
+            "expanded": expanded,
+            "legs": len(waypoints) - 1,
+        }
+
+
+def _grid_cache_key(land_layer, source, bounds, resolution: float, clearance_cells: int) -> str:
+    """陆地数据与网格参数的缓存键
+
+    给出数据文件时按文件路径、大小和修改时间判断数据是否变化，不需要先读取图层；
+    否则使用图层的数据源、要素数和范围。
+    """
+    if source:
+        stat = os.stat(source)
+        data_key = f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime}"
+    else:
+        data_key = f"{land_layer.source()}|{land_layer.featureCount()}|{land_layer.extent().toString()}"
+    key = f"{GRID_FORMAT_VERSION}|{data_key}|{bounds}|{resolution}|{clearance_cells}"
+    return hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _layer_geometries(layer):
+    """图层中的面几何（转换为 EPSG:4326）"""
+    wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
+    transform = None
+    if layer.crs() != wgs84:
+        transform = QgsCoordinateTransform(layer.crs(), wgs84, QgsProject.instance())
+    for feature in layer.getFeatures():
+        geometry = feature.geometry()
+        if geometry.isEmpty():
+            continue
+        if transform is not None:
+            geometry.transform(transform)
+        yield geometry
+
+
+def load_navigation_grid(land_layer=None, bounds=ROUTE_GRID_BOUNDS,
+                         resolution: float = ROUTE_GRID_RESOLUTION,
+                         clearance_cells: int = ROUTE_CLEARANCE_CELLS,
+                         cache_dir: str = ROUTE_GRID_CACHE_DIR, source: str = None,
+                         load_layer=None) -> NavigationGrid:
+    """由陆地面图层构建导航网格，数据和参数不变时读取磁盘缓存
+
+    source 为陆地数据文件；给出 source 时可以不传图层而传 load_layer（返回图层的函数），
+    只有缓存未命中时才读取数据文件。
+    """
+    key = _grid_cache_key(land_layer, source, bounds, resolution, clearance_cells)
+    path = os.path.join(cache_dir, f"navgrid-{key}.npz")
+    if os.path.exists(path):
+        try:
+            grid = NavigationGrid.load(path)
+            print(f"航线规划：已读取导航网格缓存 {grid.cols}x{grid.rows}")
+            return grid
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[WARN] 导航网格缓存读取失败，重新构建: {e}")
+
+    if land_layer is None:
+        land_layer = load_layer()
+        if land_layer is None:
+            return None
+    started = time.perf_counter()
+    grid = NavigationGrid.from_geometries(
+        _layer_geometries(land_layer), bounds, resolution, clearance_cells
+    )
+    print(f"航线规划：导航网格 {grid.cols}x{grid.rows} 构建完成，"
+          f"耗时 {time.perf_counter() - started:.1f}s")
+    try:
+        grid.save(path)
+    except OSError as e:
+        print(f"[WARN] 导航网格缓存写入失败: {e}")
+    return grid
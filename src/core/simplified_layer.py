@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+简化线图层模块 - 粗比例尺下显示按缩放级别预简化的线，放大后显示原始线
+
+原始线的顶点在加载时计算一次 Douglas-Peucker 显著度（SimplificationPyramid），
+比例尺变化时按当前缩放级别取出简化顶点，一次性替换简化图层的全部几何；
+同一级别的结果已缓存，平移不会触发重算。
+"""
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsFeature, QgsGeometry,
+    QgsPointXY, QgsProject, QgsVectorLayer
+)
+from ..constants import SIMPLIFY_MAX_ZOOM
+from .cluster_layer import zoom_to_scale
+from .simplify import SimplificationPyramid
+
+
+class SimplifiedLineLayer:
+    """原始线图层 + 简化线图层"""
+
+    def __init__(self, line_layer, max_zoom: int = SIMPLIFY_MAX_ZOOM):
+        self.line_layer = line_layer
+        self.max_zoom = max_zoom
+        self.pyramid = SimplificationPyramid(max_zoom)
+        self._parts = []  # 每个原始要素的各部分在金字塔中的序号
+        self._fids = []  # 简化图层中对应要素的ID
+        self._shown = None  # 当前显示的级别
+
+        wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
+        self._to_wgs84 = None
+        if line_layer.crs() != wgs84:
+            self._to_wgs84 = QgsCoordinateTransform(line_layer.crs(), wgs84, QgsProject.instance())
+
+        self.simplified_layer = QgsVectorLayer(
+            "MultiLineString?crs=EPSG:4326", f"{line_layer.name()}（简化）", "memory"
+        )
+        self.simplified_layer.dataProvider().addAttributes(line_layer.fields().toList())
+        self.simplified_layer.updateFields()
+        if line_layer.renderer() is not None:
+            self.simplified_layer.setRenderer(line_layer.renderer().clone())
+        self._setup_scale_visibility()
+        self._add_features(line_layer.getFeatures())
+
+    def _setup_scale_visibility(self):
+        """按比例尺切换：粗比例尺显示简化线，放大到 max_zoom 后显示原始线"""
+        threshold = zoom_to_scale(self.max_zoom - 0.5)
+        self.line_layer.setScaleBasedVisibility(True)
+        self.line_layer.setMinimumScale(threshold)
+        self.simplified_layer.setScaleBasedVisibility(True)
+        self.simplified_layer.setMaximumScale(threshold)
+
+    def _add_features(self, features):
+        """计算各要素每个部分的顶点显著度，并在简化图层中建立对应要素（几何在 update 时填入）"""
+        copies = []
+        for feature in features:
+            parts = []
+            if feature.hasGeometry():
+                geometry = QgsGeometry(feature.geometry())
+                if self._to_wgs84 is not None:
+                    geometry.transform(self._to_wgs84)
+                lines = geometry.asMultiPolyline() if geometry.isMultipart() else [geometry.asPolyline()]
+                parts = [self.pyramid.add([(p.x(), p.y()) for p in line]) for line in lines if len(line) >= 2]
+            self._parts.append(parts)
+            copy = QgsFeature(self.simplified_layer.fields())
+            copy.setAttributes(feature.attributes())
+            copies.append(copy)
+        ok, added = self.simplified_layer.dataProvider().addFeatures(copies)
+        if not ok:
+            raise RuntimeError("简化图层要素写入失败")
+        self._fids.extend(feature.id() for feature in added)
+        self._shown = None
+
+    def update(self, zoom: int) -> bool:
+        """按缩放级别替换简化线几何（级别未变化时跳过），返回是否更新"""
+        if zoom >= self.max_zoom:
+            return False
+        zoom = self.pyramid.clamp_zoom(zoom)
+        if zoom == self._shown:
+            return False
+
+        lines = self.pyramid.level(zoom)
+        geometries = {}
+        for fid, parts in zip(self._fids, self._parts):
+            polylines = [
+                [QgsPointXY(x, y) for x, y in lines[part].tolist()] for part in parts
+            ]
+            geometries[fid] = QgsGeometry.fromMultiPolylineXY(polylines) if polylines else QgsGeometry()
+        self.simplified_layer.dataProvider().changeGeometryValues(geometries)
+        self.simplified_layer.updateExtents()
+        self.simplified_layer.triggerRepaint()
+        self._shown = zoom
+        return True
+
+    def vertex_counts(self) -> dict:
+        """原始顶点数与当前级别的顶点数"""
+        shown = self.pyramid.level_vertex_count(self._shown) if self._shown is not None else None
+        return {"vertices": self.pyramid.vertex_count, "shown_vertices": shown}
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+线简化金字塔模块 - 为每条轨迹预计算各缩放级别的简化结果
+
+- 对每条线只做一次 Douglas-Peucker：记录每个顶点被保留所需的最大容差（显著度），
+  任意容差下的简化结果即"显著度大于容差的顶点"，与直接用该容差做 Douglas-Peucker 的结果相同；
+- Douglas-Peucker 按递归层次整体向量化：同一层的所有线段一起计算点到线段的距离，
+  各线段的最远点用 np.maximum.reduceat 求出，Python 循环次数只与递归深度有关；
+- 最远距离不超过最细一级容差的线段不再细分，其中的顶点在所有级别都被去掉；
+- 各级别容差为该缩放级别下 tolerance_pixels 个像素对应的经度跨度，
+  简化后的顶点数组按级别缓存。
+"""
+
+import numpy as np
+
+from ..constants import SIMPLIFY_MAX_ZOOM, SIMPLIFY_TOLERANCE_PIXELS
+
+
+def dp_significance(x: np.ndarray, y: np.ndarray, min_tolerance: float = 0.0) -> np.ndarray:
+    """Douglas-Peucker 顶点显著度：容差小于该值时顶点被保留（首末点为无穷大）"""
+    count = len(x)
+    significance = np.zeros(count)
+    if count == 0:
+        return significance
+    significance[0] = significance[-1] = np.inf
+    starts = np.array([0])
+    ends = np.array([count - 1])
+    caps = np.array([np.inf])  # 线段所在分支上已有的最小显著度
+    while len(starts):
+        lengths = ends - starts - 1
+        active = lengths > 0
+        starts, ends, caps, lengths = starts[active], ends[active], caps[active], lengths[active]
+        if not len(starts):
+            break
+        # 所有线段的内部顶点（各线段的内部顶点是连续的一段）
+        offsets = np.cumsum(lengths) - lengths
+        segment = np.repeat(np.arange(len(starts)), lengths)
+        index = np.arange(lengths.sum()) - offsets[segment] + starts[segment] + 1
+
+        ax, ay = x[starts][segment], y[starts][segment]
+        dx, dy = x[ends][segment] - ax, y[ends][segment] - ay
+        px, py = x[index] - ax, y[index] - ay
+        length2 = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(length2 > 0, (px * dx + py * dy) / length2, 0.0).clip(0.0, 1.0)
+        distance = np.hypot(px - t * dx, py - t * dy)
+
+        farthest = np.maximum.reduceat(distance, offsets)
+        # 每条线段中第一个达到最远距离的顶点
+        candidates = np.flatnonzero(distance == farthest[segment])
+        first = np.r_[True, segment[candidates[1:]] != segment[candidates[:-1]]]
+        split = index[candidates[first]]
+
+        value = np.minimum(farthest, caps)
+        divide = farthest > min_tolerance
+        split, value = split[divide], value[divide]
+        significance[split] = value
+        starts, ends = starts[divide], ends[divide]
+        starts, ends, caps = np.r_[starts, split], np.r_[split, ends], np.r_[value, value]
+    return significance
+
+
+def zoom_tolerance(zoom: int, tolerance_pixels: float = SIMPLIFY_TOLERANCE_PIXELS,
+                   tile_size: int = 256) -> float:
+    """缩放级别下 tolerance_pixels 个像素对应的经度跨度（度）"""
+    return 360.0 / (tile_size * (1 << zoom)) * tolerance_pixels
+
+
+class SimplificationPyramid:
+    """多条线的分级简化结果"""
+
+    def __init__(self, max_zoom: int = SIMPLIFY_MAX_ZOOM,
+                 tolerance_pixels: float = SIMPLIFY_TOLERANCE_PIXELS):
+        self.max_zoom = max_zoom
+        self.tolerances = [zoom_tolerance(z, tolerance_pixels) for z in range(max_zoom)]
+        self._lines = []  # (顶点坐标 N x 2, 显著度)
+        self._levels = {}  # 缩放级别 -> [各条线简化后的顶点坐标]
+        self.vertex_count = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def add(self, coords) -> int:
+        """加入一条线（经纬度顶点序列），返回其序号"""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        significance = dp_significance(coords[:, 0], coords[:, 1], self.tolerances[-1])
+        self._lines.append((coords, significance))
+        self.vertex_count += len(coords)
+        self._levels.clear()
+        return len(self._lines) - 1
+
+    def clamp_zoom(self, zoom: int) -> int:
+        return max(0, min(self.max_zoom - 1, zoom))
+
+    def level(self, zoom: int):
+        """缩放级别 zoom 下各条线的简化顶点（按级别缓存）"""
+        zoom = self.clamp_zoom(zoom)
+        lines = self._levels.get(zoom)
+        if lines is None:
+            tolerance = self.tolerances[zoom]
+            lines = self._levels[zoom] = [
+                coords[significance > tolerance] for coords, significance in self._lines
+            ]
+        return lines
+
+    def level_vertex_count(self, zoom: int) -> int:
+        return sum(len(coords) for coords in self.level(zoom))
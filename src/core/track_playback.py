@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+轨迹回放模块 - 在画布上只显示时间窗口 [t0, t1] 内的船位历史，并可按时间推进回放
+
+- 窗口内的定位点由 TrackStore 按时间分区查询，直接在 NumPy 中投影到屏幕像素并累加到
+  一张与画布等大的图像（np.bincount），颜色按轨迹区分、透明度随点密度增加；
+  每条轨迹在窗口内的最后位置画为圆点；
+- 图像由一个画布项（QgsMapCanvasItem）绘制，不经过矢量图层和要素迭代，
+  拖动时间滑块时同一轮事件循环内的多次窗口变化只重绘一次；
+- 窗口内点数超过 TRACK_DRAW_MAX_POINTS 时等间隔抽取，重绘耗时有上限。
+"""
+
+import math
+import time
+
+import numpy as np
+from qgis.PyQt.QtCore import QPointF, QTimer
+from qgis.PyQt.QtGui import QColor, QImage, QPainter, QPen
+from qgis.gui import QgsMapCanvasItem
+
+from ..constants import (
+    RENDER_STATS_WINDOW, TRACK_DRAW_MAX_POINTS, TRACK_HEAD_MAX_AGE, TRACK_PLAYBACK_DURATION,
+    TRACK_PLAYBACK_FPS, TRACK_WINDOW_FRACTION
+)
+from ..utils.stats import RollingHistogram
+
+WEB_MERCATOR_RADIUS = 6378137.0
+HEAD_RADIUS = 3.5
+PALETTE_SIZE = 64
+# 像素透明度随落入的点数增加，16 个点以上不再变化
+ALPHA_LEVELS = np.minimum(255, 110 + 45 * np.log2(np.maximum(np.arange(17), 1))).astype(np.uint32)
+ALPHA_LEVELS[0] = 0
+
+
+def _palette(size: int = PALETTE_SIZE) -> np.ndarray:
+    """轨迹颜色表（0xRRGGBB），色相按黄金角错开，相邻编号的轨迹颜色差别明显"""
+    colors = [QColor.fromHsv(int(index * 137.508) % 360, 200, 230).rgb() & 0xFFFFFF for index in range(size)]
+    return np.array(colors, dtype=np.uint32)
+
+
+def project_lonlat(lon, lat, authid: str):
+    """经纬度投影到画布坐标系（支持 EPSG:4326 与 EPSG:3857），不支持时返回 None"""
+    if authid == "EPSG:4326":
+        return lon, lat
+    if authid == "EPSG:3857":
+        lat = np.clip(lat, -85.05112878, 85.05112878)
+        x = np.radians(lon) * WEB_MERCATOR_RADIUS
+        y = np.log(np.tan(np.pi / 4.0 + np.radians(lat) / 2.0)) * WEB_MERCATOR_RADIUS
+        return x, y
+    return None
+
+
+def rasterize_tracks(x, y, tracks, extent, width: int, height: int, palette: np.ndarray) -> np.ndarray:
+    """把点累加为 height x width 的 ARGB32（预乘）像素数组
+
+    extent 为 (xmin, ymin, xmax, ymax)，palette 为 0xRRGGBB 颜色表；同一像素取最后落入的点的轨迹颜色。
+    """
+    xmin, ymin, xmax, ymax = extent
+    columns = ((x - xmin) * (width / (xmax - xmin))).astype(np.int32)
+    rows = ((ymax - y) * (height / (ymax - ymin))).astype(np.int32)
+    # 负数按无符号比较时很大，一次比较同时排除两侧
+    inside = (columns.view(np.uint32) < width) & (rows.view(np.uint32) < height)
+    pixels = rows[inside] * width + columns[inside]
+    counts = np.bincount(pixels, minlength=width * height)
+    # 逐像素只记录颜色序号（uint8），颜色表最多 256 种
+    color_index = np.zeros(width * height, dtype=np.uint8)
+    color_index[pixels] = (tracks[inside] % len(palette)).astype(np.uint8)
+
+    # 只对有点落入的像素计算颜色和透明度
+    hit = np.flatnonzero(counts)
+    alpha = ALPHA_LEVELS[np.minimum(counts[hit], len(ALPHA_LEVELS) - 1)]
+    color = palette[color_index[hit]]
+    red = ((color >> 16) & 0xFF) * alpha // 255
+    green = ((color >> 8) & 0xFF) * alpha // 255
+    blue = (color & 0xFF) * alpha // 255
+    argb = np.zeros(width * height, dtype=np.uint32)
+    argb[hit] = (alpha << 24) | (red << 16) | (green << 8) | blue
+    return argb.reshape(height, width)
+
+
+class TrackPlaybackItem(QgsMapCanvasItem):
+    """按地图范围放置的一张图像；平移缩放时随地图移动，直到重新生成"""
+
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        self.image = None
+        self.setZValue(50)
+
+    def set_image(self, image, extent):
+        self.image = image
+        self.setRect(extent)
+        self.update()
+
+    def paint(self, painter, option=None, widget=None):
+        if self.image is not None:
+            painter.drawImage(self.boundingRect(), self.image)
+
+
+class TrackPlayback:
+    """轨迹回放控制：时间窗口、播放推进与合并重绘"""
+
+    def __init__(self, canvas, store, state_callback=None):
+        self.canvas = canvas
+        self.store = store
+        self.state_callback = state_callback  # 窗口或播放状态变化时以 state() 调用
+        self.start, self.end = store.time_range()
+        span = max(self.end - self.start, 1.0)
+        self.t0 = self.start
+        self.t1 = self.start + span * TRACK_WINDOW_FRACTION
+        self.speed = span / TRACK_PLAYBACK_DURATION  # 每秒推进的数据时间（秒）
+        self.palette = _palette()
+        self.item = TrackPlaybackItem(canvas)
+        self.draw_times = RollingHistogram(RENDER_STATS_WINDOW)  # 每次重绘的耗时（毫秒）
+        self.drawn_points = 0
+        self._redraw_pending = False
+        self._last_tick = None
+
+        self.timer = QTimer()
+        self.timer.setInterval(int(1000 / TRACK_PLAYBACK_FPS))
+        self.timer.timeout.connect(self._advance)
+        canvas.extentsChanged.connect(self.request_redraw)
+        canvas.destinationCrsChanged.connect(self.request_redraw)
+        self.request_redraw()
+
+    @property
+    def playing(self) -> bool:
+        return self.timer.isActive()
+
+    def state(self) -> dict:
+        return {
+            "active": True, "start": self.start, "end": self.end,
+            "t0": self.t0, "t1": self.t1, "playing": self.playing,
+        }
+
+    def _notify(self):
+        if self.state_callback:
+            self.state_callback(self.state())
+
+    def set_window(self, t0: float, t1: float):
+        """设置显示的时间窗口（限制在数据范围内，整体越界时保持窗口宽度平移回来）"""
+        t0, t1 = min(t0, t1), max(t0, t1)
+        width = min(t1 - t0, self.end - self.start)
+        if t0 < self.start:
+            t0, t1 = self.start, self.start + width
+        if t1 > self.end:
+            t0, t1 = self.end - width, self.end
+        if (t0, t1) == (self.t0, self.t1):
+            return
+        self.t0, self.t1 = t0, t1
+        self._notify()
+        self.request_redraw()
+
+    def play(self):
+        if self.t1 >= self.end:
+            # 已到末尾时从头播放
+            self.set_window(self.start, self.start + (self.t1 - self.t0))
+        self._last_tick = time.perf_counter()
+        self.timer.start()
+        self._notify()
+
+    def pause(self):
+        self.timer.stop()
+        self._notify()
+
+    def toggle(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def _advance(self):
+        """按实际经过的时间推进窗口（重绘慢于节拍时不会变慢，只是跳过中间帧）"""
+        now = time.perf_counter()
+        step = (now - self._last_tick) * self.speed
+        self._last_tick = now
+        self.set_window(self.t0 + step, self.t1 + step)
+        if self.t1 >= self.end:
+            self.pause()
+
+    def request_redraw(self, *args):
+        """请求重绘：同一轮事件循环内的多次请求合并为一次"""
+        if self._redraw_pending:
+            return
+        self._redraw_pending = True
+        QTimer.singleShot(0, self._redraw)
+
+    def _redraw(self):
+        self._redraw_pending = False
+        started = time.perf_counter()
+        settings = self.canvas.mapSettings()
+        size = settings.outputSize()
+        width, height = size.width(), size.height()
+        extent = self.canvas.extent()
+        if width <= 0 or height <= 0 or extent.isEmpty():
+            return
+
+        total = self.store.count_between(self.t0, self.t1)
+        step = max(1, math.ceil(total / TRACK_DRAW_MAX_POINTS))
+        columns = self.store.query(self.t0, self.t1, step, ("lon", "lat", "track"))
+        authid = settings.destinationCrs().authid()
+        projected = project_lonlat(columns["lon"], columns["lat"], authid)
+        if projected is None:
+            print(f"轨迹回放：不支持画布坐标系 {authid}")
+            return
+        bounds = (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum())
+        pixels = rasterize_tracks(projected[0], projected[1], columns["track"], bounds, width, height, self.palette)
+        image = QImage(pixels.data, width, height, width * 4, QImage.Format_ARGB32_Premultiplied).copy()
+        self._draw_heads(image, bounds, authid)
+
+        self.item.set_image(image, extent)
+        self.drawn_points = len(columns["track"])
+        self.draw_times.add((time.perf_counter() - started) * 1000.0)
+
+    def _draw_heads(self, image, bounds, authid: str):
+        """每条轨迹在窗口内的最后位置（只显示 TRACK_HEAD_MAX_AGE 内有定位的轨迹）"""
+        tracks, lons, lats = self.store.latest_positions(max(self.t0, self.t1 - TRACK_HEAD_MAX_AGE), self.t1)
+        if not len(tracks):
+            return
+        x, y = project_lonlat(lons, lats, authid)
+        xmin, ymin, xmax, ymax = bounds
+        px = (x - xmin) * (image.width() / (xmax - xmin))
+        py = (ymax - y) * (image.height() / (ymax - ymin))
+        inside = (px >= 0) & (px < image.width()) & (py >= 0) & (py < image.height())
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor(255, 255, 255), 1.2))
+        for track, column, row in zip(tracks[inside].tolist(), px[inside].tolist(), py[inside].tolist()):
+            color = int(self.palette[track % len(self.palette)])
+            painter.setBrush(QColor((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF))
+            painter.drawEllipse(QPointF(column, row), HEAD_RADIUS, HEAD_RADIUS)
+        painter.end()
+
+    def close(self):
+        """结束回放并移除画布项"""
+        self.timer.stop()
+        self.canvas.extentsChanged.disconnect(self.request_redraw)
+        self.canvas.destinationCrsChanged.disconnect(self.request_redraw)
+        self.canvas.scene().removeItem(self.item)
+        if self.state_callback:
+            self.state_callback({"active": False, "start": self.start, "end": self.end,
+                                 "t0": self.t0, "t1": self.t1, "playing": False})
+
+    def stats(self) -> dict:
+        return {
+            "points": len(self.store),
+            "drawn_points": self.drawn_points,
+            "draw_ms": self.draw_times.summary(),
+        }
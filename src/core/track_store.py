@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+轨迹存储模块 - 按时间分区的列式船位历史，支持快速时间窗口查询
+
+- 每个定位点拆成四列：时间（秒）、经度、纬度、轨迹编号，保存在 NumPy 数组中；
+- 按 partition_seconds 把时间轴分区，每个分区内按时间排序；追加的数据先按分区暂存，
+  查询前合并，已有分区不受其他分区写入的影响；
+- 查询 [t0, t1] 时只访问与窗口相交的分区，中间的分区整块取用，首尾分区用二分查找截取，
+  耗时只与窗口内的点数有关，与历史总量无关；
+- 以未压缩的 npz 保存（各列按时间顺序整体保存），读取后按分区边界切成视图，不复制数据。
+"""
+
+import csv
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ..constants import TRACK_CACHE_DIR, TRACK_CSV_CHUNK_ROWS, TRACK_PARTITION_SECONDS
+
+TRACK_FORMAT_VERSION = 1
+COLUMNS = ("time", "lon", "lat", "track")
+DTYPES = {"time": np.float64, "lon": np.float32, "lat": np.float32, "track": np.int32}
+
+
+def _empty_columns() -> dict:
+    return {name: np.empty(0, dtype=DTYPES[name]) for name in COLUMNS}
+
+
+class TrackStore:
+    """时间分区的列式轨迹存储"""
+
+    def __init__(self, partition_seconds: float = TRACK_PARTITION_SECONDS):
+        self.partition_seconds = float(partition_seconds)
+        self.track_names = []  # 轨迹编号 -> 名称
+        self._track_ids = {}
+        self._partitions = {}  # 分区号 -> 按时间排序的各列
+        self._pending = {}  # 分区号 -> 尚未合并的列块
+        self._keys = np.empty(0, dtype=np.int64)  # 已排序的分区号
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def track_id(self, name) -> int:
+        """轨迹名称对应的编号（新名称自动分配）"""
+        name = str(name)
+        track = self._track_ids.get(name)
+        if track is None:
+            track = self._track_ids[name] = len(self.track_names)
+            self.track_names.append(name)
+        return track
+
+    def append(self, name, times, lons, lats):
+        """追加一条轨迹的定位点"""
+        times = np.asarray(times, dtype=np.float64)
+        tracks = np.full(len(times), self.track_id(name), dtype=np.int32)
+        self.append_columns(tracks, times, lons, lats)
+
+    def append_columns(self, tracks, times, lons, lats):
+        """按列追加定位点（tracks 为轨迹编号），各点可以属于不同分区、不必有序"""
+        columns = {
+            "time": np.asarray(times, dtype=np.float64),
+            "lon": np.asarray(lons, dtype=np.float32),
+            "lat": np.asarray(lats, dtype=np.float32),
+            "track": np.asarray(tracks, dtype=np.int32),
+        }
+        if not len(columns["time"]):
+            return
+        keys = np.floor(columns["time"] / self.partition_seconds).astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        for start, end in zip(starts, ends):
+            rows = order[start:end]
+            chunk = {name: values[rows] for name, values in columns.items()}
+            self._pending.setdefault(int(keys[start]), []).append(chunk)
+        self.count += len(keys)
+
+    def _compact(self):
+        """把暂存的数据块合并进各自的分区"""
+        if not self._pending:
+            return
+        for key, chunks in self._pending.items():
+            existing = self._partitions.get(key)
+            if existing is not None:
+                chunks = [existing] + chunks
+            merged = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in COLUMNS}
+            order = np.argsort(merged["time"], kind="stable")
+            self._partitions[key] = {name: values[order] for name, values in merged.items()}
+        self._pending = {}
+        self._keys = np.array(sorted(self._partitions), dtype=np.int64)
+
+    def time_range(self):
+        """数据的起止时间，没有数据时返回 None"""
+        self._compact()
+        if not len(self._keys):
+            return None
+        first = self._partitions[int(self._keys[0])]["time"]
+        last = self._partitions[int(self._keys[-1])]["time"]
+        return float(first[0]), float(last[-1])
+
+    def _slices(self, t0: float, t1: float):
+        """与窗口相交的各分区及其中 [t0, t1] 的下标范围"""
+        self._compact()
+        first = np.searchsorted(self._keys, np.floor(t0 / self.partition_seconds), side="left")
+        last = np.searchsorted(self._keys, np.floor(t1 / self.partition_seconds), side="right")
+        for index in range(first, last):
+            partition = self._partitions[int(self._keys[index])]
+            times = partition["time"]
+            # 中间的分区整块落在窗口内
+            start = np.searchsorted(times, t0, side="left") if index == first else 0
+            end = np.searchsorted(times, t1, side="right") if index == last - 1 else len(times)
+            if end > start:
+                yield partition, start, end
+
+    def count_between(self, t0: float, t1: float) -> int:
+        """窗口内的点数（不复制数据）"""
+        return sum(end - start for _, start, end in self._slices(t0, t1))
+
+    def query(self, t0: float, t1: float, step: int = 1, columns=COLUMNS) -> dict:
+        """时间窗口 [t0, t1] 内的定位点（按时间排序的各列），step > 1 时每 step 个点取一个
+
+        columns 为需要的列名，只复制这些列。
+        """
+        parts = [
+            {name: partition[name][start:end:step] for name in columns}
+            for partition, start, end in self._slices(t0, t1)
+        ]
+        if not parts:
+            empty = _empty_columns()
+            return {name: empty[name] for name in columns}
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name in columns}
+
+    def latest_positions(self, t0: float, t1: float):
+        """每条轨迹在 [t0, t1] 内的最后一个定位点：(轨迹编号, 经度, 纬度)
+
+        从最后一个分区往前找，所有轨迹都已找到时停止，不需要读取整个窗口。
+        """
+        seen = np.zeros(len(self.track_names), dtype=bool)
+        parts = []
+        for partition, start, end in reversed(list(self._slices(t0, t1))):
+            # 倒序后每条轨迹第一次出现的位置即最后一个定位点
+            unique, first = np.unique(partition["track"][start:end][::-1], return_index=True)
+            new = ~seen[unique]
+            rows = end - 1 - first[new]
+            seen[unique[new]] = True
+            parts.append((unique[new], partition["lon"][rows], partition["lat"][rows]))
+            if seen.all():
+                break
+        if not parts:
+            columns = _empty_columns()
+            return columns["track"], columns["lon"], columns["lat"]
+        return tuple(np.concatenate(values) for values in zip(*parts))
+
+    def save(self, path: str):
+        """保存为未压缩的 npz（写入临时文件后替换）"""
+        self._compact()
+        parts = [self._partitions[int(key)] for key in self._keys]
+        columns = {
+            name: np.concatenate([part[name] for part in parts]) if parts else _empty_columns()[name]
+            for name in COLUMNS
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp.npz"
+        np.savez(
+            temp_path, names=np.array(self.track_names, dtype=str),
+            meta=np.array([TRACK_FORMAT_VERSION, self.partition_seconds]), **columns
+        )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            version, partition_seconds = data["meta"].tolist()
+            if int(version) != TRACK_FORMAT_VERSION:
+                raise ValueError(f"不支持的轨迹文件版本 {version}")
+            store = cls(partition_seconds)
+            columns = {name: data[name] for name in COLUMNS}
+            names = data["names"].tolist()
+        store.track_names = [str(name) for name in names]
+        store._track_ids = {name: index for index, name in enumerate(store.track_names)}
+        # 各列整体按时间排序，按分区号的变化位置切成视图
+        keys = np.floor(columns["time"] / store.partition_seconds).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, np.intp)
+        ends = np.r_[starts[1:], len(keys)]
+        for start, end in zip(starts, ends):
+            store._partitions[int(keys[start])] = {
+                name: values[start:end] for name, values in columns.items()
+            }
+        store._keys = np.array(sorted(store._partitions), dtype=np.int64)
+        store.count = len(keys)
+        return store
+
+
+def parse_time(text: str) -> float:
+    """时间字段：Unix 秒或 ISO 8601（没有时区时按 UTC）"""
+    try:
+        return float(text)
+    except ValueError:
+        moment = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp()
+
+
+def read_track_csv(path: str, track_field: str = "track", time_field: str = "time",
+                   lon_field: str = "lon", lat_field: str = "lat",
+                   chunk_rows: int = TRACK_CSV_CHUNK_ROWS,
+                   partition_seconds: float = TRACK_PARTITION_SECONDS) -> TrackStore:
+    """按块读取 CSV 定位点（轨迹、时间、经度、纬度四列）"""
+    store = TrackStore(partition_seconds)
+    with open(path, "r", encoding="utf-8-sig", newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        try:
+            indexes = [header.index(field) for field in (track_field, time_field, lon_field, lat_field)]
+        except ValueError as e:
+            raise ValueError(f"轨迹 CSV 缺少字段：{e}") from None
+        track_index, time_index, lon_index, lat_index = indexes
+        track_id = store.track_id
+        while True:
+            rows = [row for _, row in zip(range(chunk_rows), reader)]
+            if not rows:
+                break
+            tracks, times, lons, lats = [], [], [], []
+            for row in rows:
+                try:
+                    fix = parse_time(row[time_index]), float(row[lon_index]), float(row[lat_index])
+                    track = track_id(row[track_index])
+                except (ValueError, IndexError):
+                    continue
+                times.append(fix[0])
+                lons.append(fix[1])
+                lats.append(fix[2])
+                tracks.append(track)
+            store.append_columns(tracks, times, lons, lats)
+    return store
+
+
+def _cache_key(path: str, fields) -> str:
+    stat = os.stat(path)
+    key = f"{TRACK_FORMAT_VERSION}|{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime}|{fields}"
+    return hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+
+
+def load_track_store(path: str, cache_dir: str = TRACK_CACHE_DIR, **fields) -> TrackStore:
+    """读取轨迹历史：npz 直接读取；CSV 首次读取后转换为 npz 缓存，文件不变时直接读缓存"""
+    if path.lower().endswith(".npz"):
+        return TrackStore.load(path)
+    cache_path = os.path.join(cache_dir, f"tracks-{_cache_key(path, sorted(fields.items()))}.npz")
+    if os.path.exists(cache_path):
+        try:
+            store = TrackStore.load(cache_path)
+            print(f"轨迹存储：已读取缓存，{len(store)} 个定位点")
+            return store
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[WARN] 轨迹缓存读取失败，重新读取: {e}")
+    started = time.perf_counter()
+    store = read_track_csv(path, **fields)
+    print(f"轨迹存储：已读取 {path}，{len(store)} 个定位点，"
+          f"{len(store.track_names)} 条轨迹，耗时 {time.perf_counter() - started:.1f}s")
+    try:
+        store.save(cache_path)
+    except OSError as e:
+        print(f"[WARN] 轨迹缓存写入失败: {e}")
+    return store
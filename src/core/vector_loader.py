@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+矢量文件流式读取模块 - 以生成器方式逐批读取大文件中的要素
+
+支持的格式：
+- CSV（经纬度列，自动识别 lon/lat、longitude/latitude、x/y、经度/纬度 等列名）
+- GeoJSON Lines（每行一个 Feature，扩展名 .geojsonl / .geojsons / .jsonl / .ndjson）
+- GeoPackage、GeoJSON 及其他 OGR 支持的格式（逐要素迭代）
+
+任何时刻 Python 侧只保留一个批次的要素。
+"""
+
+import csv
+import io
+import json
+import os
+from itertools import islice
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (
+    QgsCoordinateReferenceSystem, QgsFeature, QgsField, QgsFields, QgsGeometry,
+    QgsJsonUtils, QgsPointXY, QgsVectorLayer, QgsWkbTypes
+)
+
+GEOJSONL_EXTENSIONS = (".geojsonl", ".geojsons", ".jsonl", ".ndjson")
+CSV_EXTENSIONS = (".csv", ".txt")
+LON_FIELD_NAMES = ("lon", "lng", "long", "longitude", "x", "经度")
+LAT_FIELD_NAMES = ("lat", "latitude", "y", "纬度")
+JSON_PARSE_BATCH = 1000  # GeoJSON Lines 每次解析的行数
+GEOJSONL_SCHEMA_SAMPLE_LINES = 1000  # GeoJSON Lines 推断字段时读取的行数
+
+
+def iter_batches(iterable, size: int):
+    """将可迭代对象按固定大小切分为列表批次"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class VectorSource:
+    """流式矢量数据源基类"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.geometry_type = "Point"
+        self.crs = QgsCoordinateReferenceSystem("EPSG:4326")
+        self.fields = QgsFields()
+
+    def features(self):
+        """逐个产出 QgsFeature（生成器）"""
+        raise NotImplementedError
+
+    def progress(self) -> float:
+        """读取进度（0~1）"""
+        return 0.0
+
+    def close(self):
+        """释放文件句柄"""
+        pass
+
+
+class _ByteCountingSource(VectorSource):
+    """按已读取字节数估算进度的文本数据源"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._size = max(1, os.path.getsize(path))
+        self._raw = open(path, "rb")
+
+    def progress(self) -> float:
+        try:
+            return min(1.0, self._raw.tell() / self._size)
+        except (ValueError, OSError):
+            return 1.0
+
+    def close(self):
+        self._raw.close()
+
+
+class CsvSource(_ByteCountingSource):
+    """带经纬度列的CSV点数据"""
+
+    def __init__(self, path: str, lon_field: str = None, lat_field: str = None,
+                 encoding: str = "utf-8-sig", delimiter: str = ","):
+        super().__init__(path)
+        self._text = io.TextIOWrapper(self._raw, encoding=encoding, newline="")
+        self._reader = csv.reader(self._text, delimiter=delimiter)
+        header = next(self._reader, [])
+        lowered = [h.strip().lower() for h in header]
+
+        self._lon_index = self._find_column(lowered, lon_field, LON_FIELD_NAMES)
+        self._lat_index = self._find_column(lowered, lat_field, LAT_FIELD_NAMES)
+        if self._lon_index is None or self._lat_index is None:
+            raise ValueError(f"CSV 中找不到经纬度列: {header}")
+
+        self._attr_indexes = [
+            i for i in range(len(header)) if i not in (self._lon_index, self._lat_index)
+        ]
+        for i in self._attr_indexes:
+            self.fields.append(QgsField(header[i].strip(), QVariant.String))
+
+    @staticmethod
+    def _find_column(lowered, preferred, candidates):
+        names = (preferred.lower(),) if preferred else candidates
+        for name in names:
+            if name in lowered:
+                return lowered.index(name)
+        return None
+
+    def features(self):
+        width = max(self._lon_index, self._lat_index) + 1
+        for row in self._reader:
+            if len(row) < width:
+                continue
+            try:
+                lon = float(row[self._lon_index])
+                lat = float(row[self._lat_index])
+            except ValueError:
+                continue
+            feature = QgsFeature(self.fields)
+            feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(lon, lat)))
+            feature.setAttributes([row[i] if i < len(row) else None for i in self._attr_indexes])
+            yield feature
+
+    def close(self):
+        self._text.close()
+
+
+class GeoJsonLinesSource(_ByteCountingSource):
+    """每行一个 GeoJSON Feature 的文本文件
+
+    字段由前 GEOJSONL_SCHEMA_SAMPLE_LINES 行的 properties 合并推断，只在更靠后的行中出现的属性会被丢弃；
+    几何类型取自样本中第一个非空几何。
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        super().__init__(path)
+        try:
+            self._text = io.TextIOWrapper(self._raw, encoding=encoding)
+            self._sample = list(islice(self._iter_lines(), GEOJSONL_SCHEMA_SAMPLE_LINES))
+            if not self._sample:
+                raise ValueError(f"GeoJSON Lines 文件为空: {path}")
+            self.fields = self._merge_fields(self._sample)
+            self.geometry_type = self._detect_geometry_type(self._sample)
+        except Exception:
+            self._raw.close()
+            raise
+
+    @staticmethod
+    def _merge_fields(lines) -> QgsFields:
+        """合并样本各行的字段，按首次出现的顺序排列"""
+        fields = QgsFields()
+        for line in lines:
+            for field in QgsJsonUtils.stringToFields(line):
+                if fields.indexOf(field.name()) < 0:
+                    fields.append(field)
+        return fields
+
+    def _detect_geometry_type(self, lines) -> str:
+        for line in lines:
+            parsed = QgsJsonUtils.stringToFeatureList(line, self.fields)
+            if parsed and parsed[0].hasGeometry():
+                return QgsWkbTypes.displayString(parsed[0].geometry().wkbType())
+            geometry_type = (json.loads(line).get("geometry") or {}).get("type")
+            if geometry_type:
+                return geometry_type
+        return "Point"
+
+    def _iter_lines(self):
+        for line in self._text:
+            line = line.strip()
+            if line:
+                yield line
+
+    def _lines(self):
+        sample, self._sample = self._sample, []
+        yield from sample
+        yield from self._iter_lines()
+
+    def features(self):
+        # 多行拼成一个 FeatureCollection 一次解析，减少逐行调用开销
+        for lines in iter_batches(self._lines(), JSON_PARSE_BATCH):
+            collection = '{"type":"FeatureCollection","features":[' + ",".join(lines) + "]}"
+            for feature in QgsJsonUtils.stringToFeatureList(collection, self.fields):
+                yield feature
+
+    def close(self):
+        self._text.close()
+
+
+class OgrSource(VectorSource):
+    """GeoPackage / GeoJSON / Shapefile 等 OGR 数据源"""
+
+    def __init__(self, path: str, layer_name: str = None):
+        super().__init__(path)
+        uri = f"{path}|layername={layer_name}" if layer_name else path
+        self._layer = QgsVectorLayer(uri, self.name, "ogr")
+        if not self._layer.isValid():
+            raise ValueError(f"无法打开矢量文件: {uri}")
+        if layer_name:
+            self.name = layer_name
+        self.fields = self._layer.fields()
+        self.geometry_type = QgsWkbTypes.displayString(self._layer.wkbType())
+        self.crs = self._layer.crs()
+        self._total = max(1, self._layer.featureCount())
+        self._read = 0
+
+    def features(self):
+        for feature in self._layer.getFeatures():
+            self._read += 1
+            yield feature
+
+    def progress(self) -> float:
+        return min(1.0, self._read / self._total)
+
+    def close(self):
+        self._layer = None
+
+
+def open_vector_source(path: str, **options) -> VectorSource:
+    """根据扩展名打开流式矢量数据源"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in CSV_EXTENSIONS:
+        return CsvSource(path, **options)
+    if ext in GEOJSONL_EXTENSIONS:
+        return GeoJsonLinesSource(path, **options)
+    return OgrSource(path, **options)
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+无界面运行模块 - 不创建窗口、启动画面和QML叠加层，批量渲染 PNG/PDF 或以XYZ瓦片服务提供地图
+
+复用 LayerManager（底图服务、数据管理、地图引擎），画布由不显示任何内容的 HeadlessCanvas 代替，
+每个范围使用一个 QgsMapRendererParallelJob，同时最多运行 --workers 个渲染任务。
+默认使用 Qt 的 offscreen 平台，可在没有显示器的 Linux 服务器上运行。
+
+命令行用法：
+    quick-qgis-export --extent 120,30,123,32 --size 1600x1200 -o out
+    quick-qgis-export --jobs jobs.json --basemap OSM --workers 4 -o out
+    python -m src.headless --jobs jobs.json --data buoys.csv --no-sample -o out
+    quick-qgis-tiles --port 8090 --data buoys.csv       # 瓦片渲染服务，见 services/tile_server.py
+
+jobs.json 为列表，每项形如：
+    {"name": "zhoushan", "extent": [121.5, 29.5, 123.0, 30.5],
+     "width": 1600, "height": 1200, "format": "pdf", "dpi": 150}
+其中 width / height / format / dpi 缺省时使用命令行参数，extent 为 DEFAULT_CRS 下的坐标。
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+
+from qgis.PyQt.QtCore import QEventLoop, QMarginsF, QObject, QSize, QSizeF, QTimer, pyqtSignal
+from qgis.PyQt.QtGui import QColor, QPageLayout, QPageSize, QPainter, QPdfWriter
+from qgis.core import (
+    QgsApplication, QgsCoordinateReferenceSystem, QgsMapRendererCustomPainterJob,
+    QgsMapRendererParallelJob, QgsMapSettings, QgsRectangle
+)
+
+from .constants import DEFAULT_CRS, TILE_SERVER_METATILE, TILE_SERVER_PORT, TILE_SERVER_WORKERS
+
+DEFAULT_EXPORT_SIZE = (1600, 1200)
+DEFAULT_EXPORT_DPI = 96
+DEFAULT_EXPORT_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+EXPORT_FORMATS = ("png", "jpg", "pdf")
+
+
+class HeadlessCanvas(QObject):
+    """无界面画布：只保存地图设置，提供 LayerManager 用到的 QgsMapCanvas 接口子集"""
+
+    extentsChanged = pyqtSignal()
+    scaleChanged = pyqtSignal(float)
+    renderStarting = pyqtSignal()
+    mapCanvasRefreshed = pyqtSignal()
+
+    def __init__(self, width: int = DEFAULT_EXPORT_SIZE[0], height: int = DEFAULT_EXPORT_SIZE[1]):
+        super().__init__()
+        self._settings = QgsMapSettings()
+        self._settings.setOutputSize(QSize(width, height))
+        self._settings.setBackgroundColor(QColor(255, 255, 255))
+
+    def mapSettings(self) -> QgsMapSettings:
+        return QgsMapSettings(self._settings)
+
+    def layers(self):
+        return self._settings.layers()
+
+    def setLayers(self, layers):
+        self._settings.setLayers(layers)
+
+    def setDestinationCrs(self, crs):
+        self._settings.setDestinationCrs(crs)
+
+    def extent(self) -> QgsRectangle:
+        return self._settings.visibleExtent()
+
+    def setExtent(self, extent: QgsRectangle):
+        self._settings.setExtent(extent)
+        self.extentsChanged.emit()
+        self.scaleChanged.emit(self._settings.scale())
+
+    def scale(self) -> float:
+        return self._settings.scale()
+
+    def size(self) -> QSize:
+        return self._settings.outputSize()
+
+    def width(self) -> int:
+        return self._settings.outputSize().width()
+
+    def height(self) -> int:
+        return self._settings.outputSize().height()
+
+    def refresh(self):
+        """无界面时没有需要重绘的内容，出图由 BatchExporter 完成"""
+        pass
+
+    def setCachingEnabled(self, enabled: bool):
+        """无界面时没有画布图像缓存"""
+        pass
+
+
+class BatchExporter:
+    """批量出图：同时运行多个渲染任务，完成一个启动下一个"""
+
+    def __init__(self, canvas: HeadlessCanvas, output_dir: str,
+                 workers: int = DEFAULT_EXPORT_WORKERS, transparent: bool = False):
+        self.canvas = canvas
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.transparent = transparent
+        self.stats = {}
+
+    def _map_settings(self, spec: dict) -> QgsMapSettings:
+        """按出图参数生成地图设置（图层和坐标系来自画布）"""
+        settings = self.canvas.mapSettings()
+        settings.setOutputSize(QSize(spec["width"], spec["height"]))
+        settings.setOutputDpi(spec["dpi"])
+        if spec.get("crs"):
+            settings.setDestinationCrs(QgsCoordinateReferenceSystem(spec["crs"]))
+        settings.setExtent(QgsRectangle(*spec["extent"]))
+        if self.transparent and spec["format"] == "png":
+            settings.setBackgroundColor(QColor(0, 0, 0, 0))
+        return settings
+
+    def _output_path(self, spec: dict) -> str:
+        return os.path.join(self.output_dir, f"{spec['name']}.{spec['format']}")
+
+    def _start_job(self, spec: dict):
+        """启动一个渲染任务，返回 (任务, 完成时的保存函数)"""
+        settings = self._map_settings(spec)
+        path = self._output_path(spec)
+
+        if spec["format"] == "pdf":
+            # PDF 使用矢量输出：渲染直接画到 PDF 页面上
+            writer = QPdfWriter(path)
+            writer.setResolution(spec["dpi"])
+            page_points = QSizeF(spec["width"] * 72.0 / spec["dpi"], spec["height"] * 72.0 / spec["dpi"])
+            writer.setPageLayout(QPageLayout(
+                QPageSize(page_points, QPageSize.Point), QPageLayout.Portrait, QMarginsF(0, 0, 0, 0)
+            ))
+            painter = QPainter(writer)
+            job = QgsMapRendererCustomPainterJob(settings, painter)
+            # writer 需存活到渲染结束
+            resources = (writer, painter)
+
+            def save():
+                return resources[1].end()
+        else:
+            job = QgsMapRendererParallelJob(settings)
+
+            def save():
+                return job.renderedImage().save(path)
+
+        job.start()
+        return job, save
+
+    def export(self, specs) -> dict:
+        """渲染全部出图任务，返回统计信息"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        pending = deque(specs)
+        active = {}
+        loop = QEventLoop()
+        self.stats = {"total": len(pending), "written": 0, "failed": 0}
+        started = time.perf_counter()
+
+        def start_next():
+            while pending and len(active) < self.workers:
+                spec = pending.popleft()
+                job_started = time.perf_counter()
+                try:
+                    job, save = self._start_job(spec)
+                except Exception as e:
+                    print(f"批量出图：{spec['name']} 启动失败 - {e}")
+                    self.stats["failed"] += 1
+                    continue
+                active[id(job)] = job
+                job.finished.connect(
+                    lambda job=job, save=save, spec=spec, t=job_started: on_finished(job, save, spec, t)
+                )
+            if not pending and not active:
+                loop.quit()
+
+        def on_finished(job, save, spec, job_started):
+            active.pop(id(job), None)
+            for error in job.errors():
+                print(f"[WARN] 批量出图：{spec['name']} 图层 {error.layerID} 渲染出错 - {error.message}")
+            if save():
+                self.stats["written"] += 1
+                print(f"批量出图：{self._output_path(spec)} "
+                      f"({(time.perf_counter() - job_started) * 1000.0:.0f}ms)")
+            else:
+                self.stats["failed"] += 1
+                print(f"[ERROR] 批量出图：{self._output_path(spec)} 写入失败")
+            start_next()
+
+        start_next()
+        if active:
+            loop.exec_()
+        self.stats["elapsed"] = time.perf_counter() - started
+        return self.stats
+
+
+def _parse_extent(text: str):
+    values = [float(v) for v in text.split(",")]
+    if len(values) != 4:
+        raise argparse.ArgumentTypeError("extent 格式应为 xmin,ymin,xmax,ymax")
+    return values
+
+
+def _parse_size(text: str):
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("size 格式应为 宽x高，如 1600x1200")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError("size 必须为正数")
+    return width, height
+
+
+def load_specs(args) -> list:
+    """合并 --jobs 文件与 --extent 参数，补全缺省值"""
+    raw = []
+    if args.jobs:
+        with open(args.jobs, "r", encoding="utf-8") as f:
+            raw.extend(json.load(f))
+    for extent in args.extent or []:
+        raw.append({"extent": extent})
+
+    specs = []
+    for index, item in enumerate(raw):
+        spec = {
+            "name": item.get("name") or f"map_{index:04d}",
+            "extent": [float(v) for v in item["extent"]],
+            "width": int(item.get("width", args.size[0])),
+            "height": int(item.get("height", args.size[1])),
+            "dpi": int(item.get("dpi", args.dpi)),
+            "format": str(item.get("format", args.format)).lower(),
+            "crs": item.get("crs"),
+        }
+        if spec["format"] not in EXPORT_FORMATS:
+            raise ValueError(f"{spec['name']}: 不支持的格式 {spec['format']}")
+        specs.append(spec)
+    return specs
+
+
+def _init_qgis():
+    """初始化无界面的QGIS环境（没有显示器时使用 offscreen 平台）"""
+    # 必须在创建 QgsApplication 之前设置
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from .config import setup_qgis_environment
+    setup_qgis_environment()
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    return qgs
+
+
+def _add_layer_arguments(parser):
+    """出图与瓦片服务共用的图层参数"""
+    parser.add_argument("--basemap", type=str.upper, default="OSM",
+                        help="底图键（BASEMAP_SOURCES 或离线瓦片包），NONE 表示不加载底图")
+    parser.add_argument("--data", action="append", default=[], help="要叠加的矢量文件（可重复）")
+    parser.add_argument("--no-sample", action="store_true", help="不加载示例数据")
+
+
+def _load_layers(canvas: HeadlessCanvas, args, label: str):
+    """按命令行参数通过 LayerManager 加载示例数据、矢量文件和底图"""
+    # 延迟导入：LayerManager 依赖已初始化的 QGIS 环境
+    from .layer_manager import LayerManager
+
+    canvas.setDestinationCrs(QgsCoordinateReferenceSystem(DEFAULT_CRS))
+    layer_manager = LayerManager(canvas)
+    if not args.no_sample:
+        layer_manager.add_sample_vector_data()
+    for path in args.data:
+        if layer_manager.load_vector_file(path) is None:
+            print(f"[WARN] {label}：矢量文件加载失败 {path}")
+    if args.basemap != "NONE" and not layer_manager.load_basemap_by(args.basemap):
+        print(f"[WARN] {label}：底图 {args.basemap} 加载失败，仅输出矢量数据")
+    return layer_manager
+
+
+def main(argv=None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        prog="quick-qgis-export", description="无界面批量渲染地图快照（PNG/PDF）"
+    )
+    parser.add_argument("--jobs", help="出图任务 JSON 文件")
+    parser.add_argument("--extent", type=_parse_extent, action="append",
+                        help="出图范围 xmin,ymin,xmax,ymax（可重复）")
+    parser.add_argument("--size", type=_parse_size, default=DEFAULT_EXPORT_SIZE,
+                        help="默认图片尺寸，如 1600x1200")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_EXPORT_DPI, help="默认输出DPI")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="png", help="默认输出格式")
+    _add_layer_arguments(parser)
+    parser.add_argument("--workers", type=int, default=DEFAULT_EXPORT_WORKERS, help="同时渲染的任务数")
+    parser.add_argument("--transparent", action="store_true", help="PNG 使用透明背景")
+    parser.add_argument("-o", "--output-dir", default="export", help="输出目录")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = load_specs(args)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"出图任务无效: {e}")
+    if not specs:
+        parser.error("请通过 --jobs 或 --extent 指定至少一个出图范围")
+
+    qgs = _init_qgis()
+    layer_manager = None
+    try:
+        canvas = HeadlessCanvas(*args.size)
+        layer_manager = _load_layers(canvas, args, "批量出图")
+
+        print(f"批量出图：{len(specs)} 个任务，{args.workers} 个并发渲染 -> {args.output_dir}")
+        exporter = BatchExporter(canvas, args.output_dir, args.workers, args.transparent)
+        stats = exporter.export(specs)
+        rate = stats["written"] / stats["elapsed"] if stats["elapsed"] > 0 else 0.0
+        print(f"批量出图：完成 {stats['written']}/{stats['total']}，失败 {stats['failed']}，"
+              f"用时 {stats['elapsed']:.1f} 秒（{rate:.2f} 张/秒）")
+        return 1 if stats["failed"] else 0
+    finally:
+        if layer_manager:
+            layer_manager.cancel_loading()
+            layer_manager.shutdown()
+        qgs.exitQgis()
+
+
+def serve_main(argv=None) -> int:
+    """瓦片渲染服务命令行入口：加载图层后以XYZ瓦片提供，Ctrl+C 退出"""
+    parser = argparse.ArgumentParser(
+        prog="quick-qgis-tiles", description="将地图图层渲染为本机XYZ瓦片服务"
+    )
+    _add_layer_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=TILE_SERVER_PORT, help="监听端口")
+    parser.add_argument("--workers", type=int, default=TILE_SERVER_WORKERS, help="同时进行的渲染任务数")
+    parser.add_argument("--metatile", type=int, default=TILE_SERVER_METATILE,
+                        help="元瓦片边长，一次渲染 N x N 个瓦片（1 表示逐个渲染）")
+    args = parser.parse_args(argv)
+
+    qgs = _init_qgis()
+
+    layer_manager = None
+    try:
+        canvas = HeadlessCanvas()
+        layer_manager = _load_layers(canvas, args, "瓦片渲染服务")
+        layer_manager.start_tile_server(host=args.host, port=args.port, workers=args.workers,
+                                         metatile=args.metatile)
+        # Ctrl+C 时退出事件循环
+        signal.signal(signal.SIGINT, lambda *a: qgs.quit())
+        keep_alive = QTimer()
+        keep_alive.timeout.connect(lambda: None)  # 定期回到 Python，使信号处理函数得以执行
+        keep_alive.start(500)
+        qgs.exec_()
+        return 0
+    finally:
+        if layer_manager:
+            layer_manager.cancel_loading()
+            layer_manager.shutdown()
+        qgs.exitQgis()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,20 +4,39 @@
 重构版本：使用新的服务模块
 """
 
+import os
+
 from qgis.gui import QgsMapCanvas
 from .services.basemap_service import BasemapService
 from .core.data_manager import DataManager
 from .core.map_engine import MapEngine
+from .constants import (
+    LIVE_FEED_PORT, ROUTE_LAND_DATA, ROUTE_MATRIX_MAX_CELLS, ROUTE_OPT_TIME_BUDGET,
+    TILE_SERVER_METATILE, TILE_SERVER_PORT, TILE_SERVER_WORKERS
+)
 
 class LayerManager:
     """图层管理器 - 整合底图服务、数据管理和地图引擎"""
     
-    def __init__(self, canvas: QgsMapCanvas):
+    def __init__(self, canvas: QgsMapCanvas, status_callback=None, loading_callback=None,
+                 render_callback=None, measuring_callback=None, playback_callback=None):
         self.canvas = canvas
-        # 初始化各个服务
-        self.basemap_service = BasemapService(canvas)
-        self.data_manager = DataManager(canvas)
-        self.map_engine = MapEngine(canvas)
+        self.status_callback = status_callback
+        self.measuring_callback = measuring_callback
+        self.playback_callback = playback_callback  # 轨迹回放的时间窗口与播放状态
+        self.measure_tool = None
+        self.playback = None
+        self.route_planner = None
+        # 初始化各个服务（画布刷新统一经由地图引擎合并）
+        self.map_engine = MapEngine(canvas, render_callback)
+        self.basemap_service = BasemapService(
+            canvas, refresh_callback=self.map_engine.request_refresh
+        )
+        self.map_engine.set_tile_stats_provider(self.basemap_service.get_tile_stats)
+        self.tile_server = None
+        self.data_manager = DataManager(
+            canvas, status_callback, loading_callback, self.map_engine.request_refresh
+        )
     
     def load_basemap_by(self, key: str) -> bool:
         """按键加载并切换底图（委托给底图服务）"""
@@ -27,6 +46,30 @@ class LayerManager:
         """添加示例矢量数据（委托给数据管理器）"""
         self.data_manager.create_sample_data()
     
+    def add_sample_vector_data_async(self, on_done=None):
+        """在后台添加示例矢量数据（委托给数据管理器）"""
+        self.data_manager.create_sample_data_async(on_done)
+    
+    def load_vector_file(self, path: str, **options):
+        """流式加载矢量文件（委托给数据管理器）"""
+        return self.data_manager.load_vector_file(path, **options)
+    
+    def load_vector_file_async(self, path: str, **options):
+        """在后台流式加载矢量文件（委托给数据管理器）"""
+        self.data_manager.load_vector_file_async(path, **options)
+    
+    def enable_point_clustering(self, point_layer):
+        """为点图层启用聚合模式（委托给数据管理器）"""
+        return self.data_manager.create_cluster_layer(point_layer)
+    
+    def enable_line_simplification(self, line_layer):
+        """为线图层启用按缩放级别的分级简化（委托给数据管理器）"""
+        return self.data_manager.create_simplified_layer(line_layer)
+    
+    def cancel_loading(self):
+        """取消后台加载（委托给数据管理器）"""
+        self.data_manager.cancel_loading()
+    
     def set_canvas_extent(self):
         """设置画布显示范围（委托给地图引擎）"""
         self.map_engine.set_default_extent()
@@ -35,12 +78,169 @@ class LayerManager:
         """刷新画布（委托给地图引擎）"""
         self.map_engine.refresh()
 
+    def get_render_stats(self):
+        """渲染耗时与瓦片统计（委托给地图引擎）"""
+        return self.map_engine.get_render_stats()
+    
+    def get_refresh_stats(self):
+        """画布刷新统计（委托给地图引擎）"""
+        return self.map_engine.get_refresh_stats()
+
     def zoom_in(self):
         self.map_engine.zoom_in()
 
     def zoom_out(self):
         self.map_engine.zoom_out()
     
+    def toggle_measure(self) -> bool:
+        """启用/停用测量工具，返回是否处于测量模式"""
+        if self.measure_tool is None:
+            # 延迟导入：仅在首次测量时创建橡皮筋图形
+            from .core.measure_tool import MeasureTool
+            self.measure_tool = MeasureTool(
+                self.canvas, self.status_callback, self.measuring_callback
+            )
+        if self.canvas.mapTool() is self.measure_tool:
+            self.canvas.unsetMapTool(self.measure_tool)
+            return False
+        self.canvas.setMapTool(self.measure_tool)
+        return True
+    
+    def load_land_data(self, path: str = ROUTE_LAND_DATA) -> bool:
+        """读取陆地面数据并构建（或从磁盘缓存读取）航线规划用的导航网格"""
+        # 延迟导入：numpy 与导航网格只在航线规划时需要
+        from .core.route_planner import RoutePlanner, load_navigation_grid
+        if not os.path.exists(path):
+            print(f"图层管理器：陆地数据不存在 {path}")
+            return False
+        grid = load_navigation_grid(
+            source=path,
+            load_layer=lambda: self.data_manager.load_vector_file(path, add_to_canvas=False)
+        )
+        if grid is None:
+            return False
+        self.route_planner = RoutePlanner(grid)
+        return True
+    
+    def plan_route(self, waypoints, name: str = "规划航线"):
+        """规划依次经过各航点（经度, 纬度）的海上航线并显示为线图层，返回规划结果"""
+        if self.route_planner is None and not self.load_land_data():
+            print("图层管理器：没有陆地数据，无法规划航线")
+            return None
+        route = self.route_planner.plan(waypoints)
+        if route is None:
+            if self.status_callback:
+                self.status_callback("航线规划失败：航点之间没有海上通路")
+            return None
+        self.data_manager.create_route_layer(route, name)
+        if self.status_callback:
+            self.status_callback(
+                f"{name}：{route['length_m'] / 1000.0:.1f} km，规划耗时 {route['elapsed_ms']:.0f}ms"
+            )
+        return route
+    
+    def optimize_stations(self, point_layer, depot: int = 0, return_to_depot: bool = True,
+                          max_trip_m: float = None, time_budget: float = ROUTE_OPT_TIME_BUDGET):
+        """把点图层中的监测站点排成巡航路线（每个航次一个线图层），返回优化结果
+        
+        有陆地数据时，穿过陆地的站点对使用导航网格上的海上距离，对应航段按航线规划绕行；
+        否则全部使用大圆距离。depot 为出发站点在图层要素中的序号。
+        """
+        # 延迟导入：numpy 与优化器只在巡航路线优化时需要
+        from qgis.core import QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsProject
+        from .core.route_optimizer import optimize_route
+        
+        transform = QgsCoordinateTransform(
+            point_layer.crs(), QgsCoordinateReferenceSystem("EPSG:4326"), QgsProject.instance()
+        )
+        points = []
+        for feature in point_layer.getFeatures():
+            geometry = feature.geometry()
+            if geometry.isEmpty():
+                continue
+            point = transform.transform(geometry.asPoint())
+            points.append((point.x(), point.y()))
+        if len(points) < 2:
+            print("图层管理器：巡航路线优化至少需要两个站点")
+            return None
+        
+        grid = None
+        if self.route_planner is not None or os.path.exists(ROUTE_LAND_DATA) and self.load_land_data():
+            # 取边长不超过 ROUTE_MATRIX_MAX_CELLS 的最细一级计算距离矩阵
+            grid = next(
+                (level for level in self.route_planner.levels
+                 if max(level.rows, level.cols) <= ROUTE_MATRIX_MAX_CELLS),
+                self.route_planner.levels[-1]
+            )
+        result = optimize_route(points, grid, depot, return_to_depot, max_trip_m, time_budget)
+        
+        for number, trip in enumerate(result["trips"], 1):
+            name = f"巡航路线 {number}" if len(result["trips"]) > 1 else "巡航路线"
+            self.data_manager.create_route_layer(self._trip_route(trip, points, result["blocked"]), name)
+        if self.status_callback:
+            self.status_callback(
+                f"巡航路线：{len(points)} 个站点，{len(result['trips'])} 个航次，"
+                f"{result['length_m'] / 1000.0:.1f} km，距离矩阵 {result['matrix_ms']:.0f}ms，"
+                f"求解 {result['solve_ms']:.0f}ms"
+            )
+        return result
+    
+    def _trip_route(self, trip, points, blocked) -> dict:
+        """把航次的站点序列连成航线：穿过陆地的航段用航线规划绕行，其余为直线"""
+        from .utils.geodesy import path_length_m
+        
+        route_points = [points[trip[0]]]
+        for a, b in zip(trip, trip[1:]):
+            leg = None
+            if blocked[a, b] and self.route_planner is not None:
+                leg = self.route_planner.plan([points[a], points[b]])
+            route_points.extend(leg["points"][1:] if leg else [points[b]])
+        return {"points": route_points, "length_m": path_length_m(route_points)}
+    
+    def start_live_feed(self, source: str = f"udp://0.0.0.0:{LIVE_FEED_PORT}", name: str = "实时船位",
+                        from_start: bool = False):
+        """接收实时船位（udp://、tcp:// 或文件路径；AIS NMEA 或 JSON Lines）并显示为图层"""
+        # 延迟导入：仅在使用实时船位时加载
+        from .services.position_feed import PositionFeed
+        live = self.data_manager.create_live_layer(PositionFeed(source, from_start), name)
+        if self.status_callback:
+            self.status_callback(f"{name}：正在接收 {source}")
+        return live
+    
+    def stop_live_feeds(self):
+        """停止接收实时船位"""
+        self.data_manager.stop_live_layers()
+    
+    def start_playback(self, path: str = None, **fields):
+        """进入轨迹回放模式：画布只显示时间窗口内的船位历史（path 为空时使用已读取的历史）"""
+        if path:
+            self.data_manager.load_track_history(path, **fields)
+        store = self.data_manager.track_store
+        if store is None or not len(store):
+            print("图层管理器：没有船位历史，无法回放")
+            return None
+        self.stop_playback()
+        # 延迟导入：仅在轨迹回放时创建画布项
+        from .core.track_playback import TrackPlayback
+        self.playback = TrackPlayback(self.canvas, store, self.playback_callback)
+        if self.playback_callback:
+            self.playback_callback(self.playback.state())
+        return self.playback
+    
+    def set_playback_window(self, t0: float, t1: float):
+        if self.playback:
+            self.playback.set_window(t0, t1)
+    
+    def toggle_playback(self):
+        if self.playback:
+            self.playback.toggle()
+    
+    def stop_playback(self):
+        """退出轨迹回放模式"""
+        if self.playback:
+            self.playback.close()
+            self.playback = None
+    
     def get_available_basemaps(self):
         """获取可用的底图列表"""
         return self.basemap_service.get_available_basemaps()
@@ -49,6 +249,36 @@ class LayerManager:
         """获取当前底图"""
         return self.basemap_service.get_current_basemap()
     
+    def get_tile_package_info(self):
+        """获取离线瓦片包的缩放级别与范围"""
+        return self.basemap_service.get_tile_package_info()
+    
+    def start_tile_server(self, host: str = "127.0.0.1", port: int = TILE_SERVER_PORT,
+                          workers: int = TILE_SERVER_WORKERS,
+                          metatile: int = TILE_SERVER_METATILE) -> str:
+        """以XYZ瓦片服务提供画布上的图层，返回瓦片URL模板"""
+        if self.tile_server is None:
+            # 延迟导入：仅在启用瓦片服务时加载
+            from .services.tile_server import TileRenderServer
+            self.tile_server = TileRenderServer(
+                self.canvas.layers, self.basemap_service.tile_cache,
+                workers=workers, host=host, port=port, metatile=metatile
+            )
+        self.tile_server.start()
+        return self.tile_server.url_template()
+    
+    def stop_tile_server(self):
+        """停止瓦片服务"""
+        if self.tile_server:
+            self.tile_server.stop()
+    
+    def shutdown(self):
+        """释放服务资源（瓦片服务、底图缓存代理等）"""
+        self.stop_tile_server()
+        self.stop_live_feeds()
+        self.stop_playback()
+        self.basemap_service.close()
+    
     def debug_canvas_status(self):
         """调试画布状态"""
         print("\n=== 画布调试信息 ===")
@@ -72,5 +302,13 @@ class LayerManager:
             crs = self.canvas.mapSettings().destinationCrs()
             # print(f"画布坐标系统: {crs.description()}")
             
+            stats = self.map_engine.get_refresh_stats()
+            print(f"画布刷新: 请求 {stats['requests']} 次，重绘 {stats['renders']} 次，合并 {stats['suppressed']} 次")
+            
+            render = self.map_engine.get_render_stats()["render_ms"]
+            if render.get("count"):
+                print(f"渲染耗时: 最近 {render['last']:.0f}ms，p50 {render['p50']:.0f}ms，"
+                      f"p90 {render['p90']:.0f}ms（{render['count']} 次）")
+            
         except Exception as e:
             print(f"调试信息获取失败: {e}")
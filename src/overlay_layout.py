@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+叠加层布局模块 - 用一个事件过滤器统一计算地图画布上所有叠加部件的位置
+
+画布尺寸变化时不立即重排，而是每个显示帧最多重排一次（窗口拖动时会连续收到大量
+Resize 事件），并且只对位置确实改变的部件调用 setGeometry。
+"""
+
+from PyQt5.QtCore import QEvent, QObject, QRect, QTimer
+
+DEFAULT_REFRESH_RATE = 60.0
+
+# 锚点：部件相对宿主的位置
+ANCHORS = (
+    "fill", "top", "bottom", "left", "right",
+    "top_left", "top_right", "bottom_left", "bottom_right", "center",
+)
+
+
+class _OverlayItem:
+    """一个叠加部件的布局参数"""
+
+    __slots__ = ("widget", "anchor", "size", "margin", "on_layout")
+
+    def __init__(self, widget, anchor: str, size, margin: int, on_layout):
+        self.widget = widget
+        self.anchor = anchor
+        self.size = size  # (宽, 高)；None 表示该方向随宿主拉伸
+        self.margin = margin
+        self.on_layout = on_layout  # 位置改变后的回调
+
+
+class OverlayLayout(QObject):
+    """画布叠加层布局管理器"""
+
+    def __init__(self, host):
+        super().__init__(host)
+        self.host = host
+        self._items = []
+        self.layout_count = 0  # 实际重排次数
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.apply)
+        host.installEventFilter(self)
+
+    def _frame_interval(self) -> int:
+        """宿主所在屏幕一帧的毫秒数"""
+        rate = DEFAULT_REFRESH_RATE
+        try:
+            screen = self.host.screen()
+            if screen is not None and screen.refreshRate() > 0:
+                rate = screen.refreshRate()
+        except AttributeError:
+            pass
+        return max(1, int(1000.0 / rate))
+
+    def add(self, widget, anchor: str = "fill", size=None, margin: int = 0, on_layout=None):
+        """添加叠加部件并立即布局
+
+        anchor 取 ANCHORS 中的值；size 为 (宽, 高)，其中为 None 的方向随宿主拉伸。
+        """
+        if anchor not in ANCHORS:
+            raise ValueError(f"未知的锚点: {anchor}")
+        self.remove(widget)
+        item = _OverlayItem(widget, anchor, size, margin, on_layout)
+        self._items.append(item)
+        widget.raise_()
+        self._apply_item(item)
+
+    def remove(self, widget):
+        """移除叠加部件（不删除部件本身）"""
+        self._items = [item for item in self._items if item.widget is not widget]
+
+    def schedule(self):
+        """在下一帧重排（同一帧内的多次请求合并为一次）"""
+        if not self._timer.isActive():
+            self._timer.start(self._frame_interval())
+
+    def eventFilter(self, obj, event):
+        if obj is self.host and event.type() in (QEvent.Resize, QEvent.Show):
+            self.schedule()
+        return False
+
+    def geometry_for(self, item) -> QRect:
+        """计算部件在宿主中的位置"""
+        host_w, host_h = self.host.width(), self.host.height()
+        m = item.margin
+        width, height = item.size or (None, None)
+        anchor = item.anchor
+        if anchor == "fill":
+            return QRect(m, m, max(0, host_w - 2 * m), max(0, host_h - 2 * m))
+
+        # 未指定的方向：上下锚点横向拉伸，左右锚点纵向拉伸
+        if width is None:
+            width = max(0, host_w - 2 * m)
+        if height is None:
+            height = max(0, host_h - 2 * m)
+
+        if anchor in ("left", "top_left", "bottom_left"):
+            x = m
+        elif anchor in ("right", "top_right", "bottom_right"):
+            x = host_w - width - m
+        else:
+            x = (host_w - width) // 2
+        if anchor in ("top", "top_left", "top_right"):
+            y = m
+        elif anchor in ("bottom", "bottom_left", "bottom_right"):
+            y = host_h - height - m
+        else:
+            y = (host_h - height) // 2
+        return QRect(max(0, x), max(0, y), width, height)
+
+    def _apply_item(self, item):
+        rect = self.geometry_for(item)
+        if item.widget.geometry() == rect:
+            return
+        item.widget.setGeometry(rect)
+        if item.on_layout:
+            item.on_layout()
+
+    def apply(self):
+        """立即重排所有叠加部件"""
+        self.layout_count += 1
+        for item in list(self._items):
+            try:
+                self._apply_item(item)
+            except RuntimeError:
+                # 部件已被删除
+                self._items.remove(item)
@@ -3,40 +3,152 @@
 底图服务模块 - 负责底图的加载和切换
 """
 
+import os
+from collections import OrderedDict
+
 from qgis.core import QgsRasterLayer, QgsProject
-from ..constants import BASEMAP_SOURCES
+from ..constants import (
+    BASEMAP_SOURCES, BASEMAP_POOL_SIZE, TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES,
+    OFFLINE_TILE_DIR, TILE_PACKAGE_EXTENSIONS
+)
+from .tile_cache import TileCache
+from .tile_package import TilePackage
+from .tile_proxy import TileProxyServer, xyz_template
+from ..core.map_engine import canvas_lonlat_extent, canvas_zoom_level
 
 class BasemapService:
     """底图服务 - 负责底图的加载和切换"""
     
-    def __init__(self, canvas):
+    def __init__(self, canvas, cache_dir: str = TILE_CACHE_DIR,
+                 cache_max_bytes: int = TILE_CACHE_MAX_BYTES,
+                 pool_size: int = BASEMAP_POOL_SIZE, refresh_callback=None):
         self.canvas = canvas
-        self.basemap_layers = {}  # 存储底图图层引用
+        # 画布刷新回调（通常为 MapEngine.request_refresh，合并同一轮的多次刷新）
+        self.refresh_callback = refresh_callback or canvas.refresh
+        # 底图图层池：底图键 -> 图层，按最近使用排序（末尾为最近使用）
+        self.basemap_layers = OrderedDict()
+        self.pool_size = max(1, pool_size)
+        # 可用底图源（在线XYZ源 + 离线瓦片包）
+        self.sources = {k: dict(v) for k, v in BASEMAP_SOURCES.items() if 'url' in v}
+        self.tile_packages = {}  # 底图键 -> 离线瓦片包
+        self.tile_cache = None
+        self.tile_proxy = None
+        self._setup_tile_cache(cache_dir, cache_max_bytes)
+        self._setup_tile_packages()
+        
+        # 视口变化时通知瓦片调度器，优先下载视口中心的瓦片并取消过期请求
+        if self.tile_proxy:
+            self.canvas.extentsChanged.connect(self._update_tile_viewport)
+    
+    def _setup_tile_cache(self, cache_dir: str, max_bytes: int):
+        """创建磁盘瓦片缓存并启动本机读穿透代理"""
+        try:
+            self.tile_cache = TileCache(cache_dir, max_bytes)
+            self.tile_proxy = TileProxyServer(self.tile_cache)
+            for key, src in self.sources.items():
+                self.tile_proxy.register_source(key, xyz_template(src['url']))
+            self.tile_proxy.start()
+            print(f"底图服务：瓦片缓存目录 - {cache_dir}")
+        except Exception as e:
+            # 缓存不可用时退回直连在线地图源
+            print(f"底图服务：瓦片缓存不可用，直接访问在线地图源 - {e}")
+            self.tile_cache = None
+            self.tile_proxy = None
+    
+    def _update_tile_viewport(self):
+        """将画布当前范围（经纬度）和对应的瓦片缩放级别告知瓦片代理"""
+        if not (self.tile_proxy and self.tile_proxy.running):
+            return
+        try:
+            extent = canvas_lonlat_extent(self.canvas)
+            zoom = canvas_zoom_level(self.canvas)
+            self.tile_proxy.set_viewport(
+                (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()), zoom
+            )
+        except Exception as e:
+            print(f"底图服务：更新瓦片视口失败 - {e}")
+    
+    def _setup_tile_packages(self):
+        """注册配置中的离线瓦片包，并扫描离线瓦片目录"""
+        for key, src in BASEMAP_SOURCES.items():
+            if src.get('type') in ('mbtiles', 'gpkg') and src.get('path'):
+                self.register_tile_package(src['path'], key, src.get('name'))
+        
+        if os.path.isdir(OFFLINE_TILE_DIR):
+            for filename in sorted(os.listdir(OFFLINE_TILE_DIR)):
+                if filename.lower().endswith(TILE_PACKAGE_EXTENSIONS):
+                    path = os.path.join(OFFLINE_TILE_DIR, filename)
+                    if all(pkg.path != os.path.abspath(path) for pkg in self.tile_packages.values()):
+                        self.register_tile_package(path)
+    
+    def register_tile_package(self, path: str, key: str = None, name: str = None):
+        """注册离线瓦片包（MBTiles / GeoPackage）为底图源，返回底图键"""
+        try:
+            package = TilePackage(path)
+        except Exception as e:
+            print(f"底图服务：离线瓦片包打开失败 - {path} - {e}")
+            return None
+        
+        key = (key or os.path.splitext(os.path.basename(path))[0]).upper()
+        self.sources[key] = {
+            "name": name or package.name,
+            "type": package.format,
+            "path": package.path,
+        }
+        self.tile_packages[key] = package
+        if self.tile_proxy:
+            self.tile_proxy.register_package(key, package)
+        print(f"底图服务：已注册离线瓦片包 - {key} "
+              f"(z{package.minzoom}-{package.maxzoom}, 范围 {package.bounds})")
+        return key
+    
+    def _layer_source(self, key: str):
+        """底图图层的数据源和提供者：优先经由本机缓存代理"""
+        package = self.tile_packages.get(key)
+        if self.tile_proxy and self.tile_proxy.running:
+            if package:
+                # 限定缩放级别，避免请求包内不存在的瓦片
+                return self.tile_proxy.layer_uri(key, package.minzoom, package.maxzoom), "wms"
+            return self.tile_proxy.layer_uri(key), "wms"
+        if package:
+            # 代理不可用时由 GDAL 直接读取瓦片包
+            return package.path, "gdal"
+        return self.sources[key]['url'], "wms"
     
     def load_basemap(self, key: str) -> bool:
-        """加载底图"""
+        """加载底图（优先复用图层池中已创建的图层）"""
         key = (key or "").upper()
-        if key not in BASEMAP_SOURCES:
+        if key not in self.sources:
             print(f"底图服务：未知底图键 - {key}")
             return False
 
-        src = BASEMAP_SOURCES[key]
+        src = self.sources[key]
         print(f"底图服务：切换底图 - {src['name']}")
 
         try:
-            # 创建栅格图层
-            layer = QgsRasterLayer(src['url'], src['name'], "wms")
-            
-            if not layer.isValid():
-                print(f"底图服务：底图加载失败 - {src['name']}")
-                print(f"错误信息：{layer.error().message()}")
-                return False
+            layer = self._pooled_layer(key)
+            if layer is None:
+                # 创建栅格图层
+                uri, provider = self._layer_source(key)
+                layer = QgsRasterLayer(uri, src['name'], provider)
+                
+                if not layer.isValid():
+                    print(f"底图服务：底图加载失败 - {src['name']}")
+                    print(f"错误信息：{layer.error().message()}")
+                    return False
+                
+                # 加入项目后由项目持有，切换走时只隐藏不销毁
+                QgsProject.instance().addMapLayer(layer, True)
+                self.basemap_layers[key] = layer
+            else:
+                print(f"底图服务：复用已缓存的底图图层 - {src['name']}")
 
-            # 移除旧的底图图层
-            self._remove_old_basemaps()
+            # 标记为最近使用，并在画布上只显示该底图
+            self.basemap_layers.move_to_end(key)
+            self._show_basemap_layer(layer)
             
-            # 添加新底图图层
-            self._add_basemap_layer(layer, key)
+            # 超出图层池容量时淘汰最久未使用的底图
+            self._evict_basemaps()
             
             print(f"底图服务：底图已切换到 - {src['name']}")
             return True
@@ -45,47 +157,52 @@ class BasemapService:
             print(f"底图服务：切换底图出错 - {e}")
             return False
     
-    def _remove_old_basemaps(self):
-        """移除旧的底图图层"""
-        known_names = {v['name'] for v in BASEMAP_SOURCES.values()}
-        current_layers = self.canvas.layers()
-        
-        def _get_name(lyr):
-            try:
-                return lyr.name()
-            except Exception:
-                return ""
-        
-        # 保留非底图图层
-        kept_layers = [lyr for lyr in current_layers if _get_name(lyr) not in known_names]
-        
-        # 从项目中移除底图图层
-        for layer in current_layers:
-            if _get_name(layer) in known_names:
-                QgsProject.instance().removeMapLayer(layer)
-        
-        # 更新画布图层
-        self.canvas.setLayers(kept_layers)
+    def _pooled_layer(self, key: str):
+        """从图层池取出图层；图层已被外部删除时将其移出图层池"""
+        layer = self.basemap_layers.get(key)
+        if layer is None:
+            return None
+        try:
+            if layer.isValid():
+                return layer
+        except RuntimeError:
+            # 底层C++对象已被销毁（例如项目被清空）
+            pass
+        del self.basemap_layers[key]
+        return None
     
-    def _add_basemap_layer(self, layer, key: str):
-        """添加底图图层"""
-        # 添加到项目
-        QgsProject.instance().addMapLayer(layer, True)
-        
-        # 添加到画布（底图置底）
-        current_layers = self.canvas.layers()
-        new_layers = current_layers + [layer]
-        self.canvas.setLayers(new_layers)
-        
-        # 存储引用
-        self.basemap_layers[key] = layer
+    def _show_basemap_layer(self, layer):
+        """在画布上隐藏其他底图，显示指定底图（底图置底）"""
+        pooled = list(self.basemap_layers.values())
+        kept_layers = [lyr for lyr in self.canvas.layers() if lyr not in pooled]
+        self.canvas.setLayers(kept_layers + [layer])
         
         # 刷新画布
-        self.canvas.refresh()
+        self.refresh_callback()
+    
+    def _evict_basemaps(self):
+        """淘汰超出图层池容量的底图图层（从不淘汰当前显示的底图）"""
+        visible = self.canvas.layers()
+        while len(self.basemap_layers) > self.pool_size:
+            evict_key = next(
+                (k for k, lyr in self.basemap_layers.items() if lyr not in visible), None
+            )
+            if evict_key is None:
+                break
+            layer = self.basemap_layers.pop(evict_key)
+            try:
+                QgsProject.instance().removeMapLayer(layer)
+            except RuntimeError:
+                pass
+            print(f"底图服务：底图图层已移出图层池 - {evict_key}")
     
     def get_available_basemaps(self):
         """获取可用的底图列表"""
-        return list(BASEMAP_SOURCES.keys())
+        return list(self.sources.keys())
+    
+    def get_tile_package_info(self):
+        """获取各离线瓦片包的缩放级别范围与经纬度范围"""
+        return {key: package.info() for key, package in self.tile_packages.items()}
     
     def get_current_basemap(self):
         """获取当前底图"""
@@ -93,3 +210,27 @@ class BasemapService:
             if layer in self.canvas.layers():
                 return key
         return None
+    
+    def get_cache_stats(self):
+        """获取瓦片缓存统计信息"""
+        if self.tile_cache:
+            return self.tile_cache.stats()
+        return {}
+    
+    def get_tile_stats(self):
+        """获取瓦片请求统计（代理未启动时为空）"""
+        if self.tile_proxy:
+            return self.tile_proxy.stats()
+        return {}
+    
+    def close(self):
+        """停止缓存代理并关闭缓存"""
+        if self.tile_proxy:
+            self.tile_proxy.stop()
+            self.tile_proxy = None
+        if self.tile_cache:
+            self.tile_cache.close()
+            self.tile_cache = None
+        for package in self.tile_packages.values():
+            package.close()
+        self.tile_packages.clear()
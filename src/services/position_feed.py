@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+船位数据源模块 - 在后台线程中接收实时船位消息，只保留每艘船的最新位置
+
+- 数据源：udp://主机:端口（监听）、tcp://主机:端口（连接，断开后自动重连）或文件路径（持续读取追加内容）；
+- 消息格式：NMEA 0183 的 AIS 位置报告（!AIVDM / !AIVDO，消息类型 1/2/3/18）或 JSON Lines
+  （{"id": ..., "lon": ..., "lat": ..., "sog": ..., "cog": ...}，id 也可写作 mmsi），同一数据源可混合；
+- 每次收到的一批行先在锁外解析，再一次性合并到"船舶ID -> 最新位置"表中；
+  图层定时取走这张表（drain），两次取走之间同一艘船的多次更新只保留最后一次。
+
+本模块不依赖 QGIS。
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+
+from ..constants import LIVE_FEED_RECONNECT_SECONDS
+
+READ_TIMEOUT = 0.5  # 读取超时（秒），用于及时响应停止请求
+TAIL_POLL_SECONDS = 0.05  # 文件没有新内容时的等待间隔
+UDP_RECEIVE_BUFFER = 4 * 1024 * 1024  # 突发消息时避免内核丢包
+
+# AIS 经纬度的"不可用"取值（1/10000 分）
+AIS_LON_UNAVAILABLE = 181 * 600000
+AIS_LAT_UNAVAILABLE = 91 * 600000
+
+
+def _signed(value: int, bits: int) -> int:
+    return value - (1 << bits) if value & (1 << (bits - 1)) else value
+
+
+def decode_ais_payload(payload: str):
+    """解码 AIS 位置报告的 6-bit 载荷，返回 (MMSI, 经度, 纬度, 航速节, 航向度)，不支持的消息返回 None"""
+    value = 0
+    for char in payload:
+        code = ord(char) - 48
+        if code > 40:
+            code -= 8
+        value = (value << 6) | code
+    length = 6 * len(payload)
+
+    def bits(start: int, count: int) -> int:
+        return (value >> (length - start - count)) & ((1 << count) - 1)
+
+    if length < 168:
+        return None
+    message_type = bits(0, 6)
+    if message_type in (1, 2, 3):
+        offset = 0
+    elif message_type == 18:
+        offset = -4  # B 类报告没有航行状态和转向率，其后字段整体前移
+    else:
+        return None
+    mmsi = bits(8, 30)
+    sog = bits(50 + offset, 10)
+    lon = _signed(bits(61 + offset, 28), 28)
+    lat = _signed(bits(89 + offset, 27), 27)
+    cog = bits(116 + offset, 12)
+    if lon == AIS_LON_UNAVAILABLE or lat == AIS_LAT_UNAVAILABLE:
+        return None
+    return (
+        str(mmsi), lon / 600000.0, lat / 600000.0,
+        sog / 10.0 if sog != 1023 else None,
+        cog / 10.0 if cog != 3600 else None,
+    )
+
+
+def parse_position(line: str):
+    """解析一行船位消息，返回 (船舶ID, 经度, 纬度, 航速, 航向)，无法解析时返回 None"""
+    line = line.strip()
+    if not line:
+        return None
+    if line[0] == "{":
+        try:
+            message = json.loads(line)
+            vessel = message.get("id", message.get("mmsi"))
+            lon, lat = float(message["lon"]), float(message["lat"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None
+        if vessel is None or not (-180.0 <= lon <= 180.0 and -90.0 <= lat <= 90.0):
+            return None
+        sog, cog = message.get("sog"), message.get("cog")
+        return (
+            str(vessel), lon, lat,
+            float(sog) if isinstance(sog, (int, float)) else None,
+            float(cog) if isinstance(cog, (int, float)) else None,
+        )
+    # NMEA 标签块（\...\!AIVDM）
+    if line[0] == "\\":
+        line = line[line.find("\\", 1) + 1:]
+    if not line.startswith(("!AIVDM", "!AIVDO")):
+        return None
+    fields = line.split(",")
+    # 位置报告均为单句消息，多句消息（静态信息等）忽略
+    if len(fields) < 7 or fields[1] != "1":
+        return None
+    try:
+        return decode_ais_payload(fields[5])
+    except ValueError:
+        return None
+
+
+class PositionFeed:
+    """船位数据源：后台线程接收并解析消息，drain() 取走各船的最新位置"""
+
+    def __init__(self, source: str, from_start: bool = False):
+        self.source = source
+        self.from_start = from_start  # 文件数据源：从头读取已有内容（默认只读取新追加的内容）
+        self._latest = {}  # 船舶ID -> (经度, 纬度, 航速, 航向, 接收时间)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.received = 0  # 收到的消息行数
+        self.invalid = 0  # 无法解析的行数
+        self.coalesced = 0  # 被同一艘船更新的消息覆盖的位置数
+        self.error = None
+
+    def start(self):
+        if self.running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="position-feed", daemon=True)
+        self._thread.start()
+        print(f"船位数据源：开始接收 {self.source}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def drain(self) -> dict:
+        """取走自上次调用以来各船的最新位置"""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        return latest
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._latest)
+        return {
+            "received": self.received,
+            "invalid": self.invalid,
+            "coalesced": self.coalesced,
+            "pending": pending,
+        }
+
+    def feed_lines(self, lines):
+        """解析一批消息行并合并（接收线程调用，也可直接喂入数据）"""
+        now = time.time()
+        parsed = []
+        for line in lines:
+            position = parse_position(line)
+            if position is not None:
+                parsed.append(position)
+        with self._lock:
+            latest = self._latest
+            before = len(latest)
+            for vessel, lon, lat, sog, cog in parsed:
+                latest[vessel] = (lon, lat, sog, cog, now)
+            self.coalesced += len(parsed) - (len(latest) - before)
+            self.received += len(lines)
+            self.invalid += len(lines) - len(parsed)
+
+    def _run(self):
+        try:
+            if self.source.startswith("udp://"):
+                self._run_udp(*self._address("udp://"))
+            elif self.source.startswith("tcp://"):
+                self._run_tcp(*self._address("tcp://"))
+            else:
+                self._run_tail(self.source)
+        except Exception as e:
+            self.error = e
+            print(f"船位数据源：接收失败 {self.source} - {e}")
+
+    def _address(self, prefix: str):
+        host, _, port = self.source[len(prefix):].rstrip("/").rpartition(":")
+        return host or "0.0.0.0", int(port)
+
+    def _run_udp(self, host: str, port: int):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER)
+            sock.bind((host, port))
+            sock.settimeout(READ_TIMEOUT)
+            while not self._stop.is_set():
+                try:
+                    data = sock.recv(65535)
+                except socket.timeout:
+                    continue
+                self.feed_lines(data.decode("ascii", "replace").splitlines())
+        finally:
+            sock.close()
+
+    def _run_tcp(self, host: str, port: int):
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection((host, port), timeout=LIVE_FEED_RECONNECT_SECONDS)
+            except OSError as e:
+                print(f"船位数据源：连接 {host}:{port} 失败，{LIVE_FEED_RECONNECT_SECONDS}s 后重试 - {e}")
+                self._stop.wait(LIVE_FEED_RECONNECT_SECONDS)
+                continue
+            try:
+                sock.settimeout(READ_TIMEOUT)
+                self._read_stream(sock.recv)
+            except OSError as e:
+                print(f"船位数据源：连接中断 - {e}")
+            finally:
+                sock.close()
+            self._stop.wait(LIVE_FEED_RECONNECT_SECONDS)
+
+    def _read_stream(self, read):
+        """按块读取字节流并拆分为行，不完整的行留到下一块"""
+        partial = b""
+        while not self._stop.is_set():
+            try:
+                data = read(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                return
+            lines = (partial + data).split(b"\n")
+            partial = lines.pop()
+            self.feed_lines([line.decode("ascii", "replace") for line in lines])
+
+    def _run_tail(self, path: str):
+        """持续读取文件追加的内容；文件被截断或替换时从头读取"""
+        while not self._stop.is_set() and not os.path.exists(path):
+            self._stop.wait(LIVE_FEED_RECONNECT_SECONDS)
+        partial = b""
+        handle = open(path, "rb")
+        try:
+            if not self.from_start:
+                handle.seek(0, os.SEEK_END)
+            identity = os.fstat(handle.fileno()).st_ino
+            while not self._stop.is_set():
+                data = handle.read(65536)
+                if data:
+                    lines = (partial + data).split(b"\n")
+                    partial = lines.pop()
+                    self.feed_lines([line.decode("utf-8", "replace") for line in lines])
+                    continue
+                self._stop.wait(TAIL_POLL_SECONDS)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                if status.st_ino != identity or status.st_size < handle.tell():
+                    handle.close()
+                    handle = open(path, "rb")
+                    identity = os.fstat(handle.fileno()).st_ino
+                    partial = b""
+        finally:
+            handle.close()
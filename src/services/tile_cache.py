@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+瓦片缓存模块 - 按 (底图键, z, x, y) 持久化存储瓦片，按字节上限做LRU淘汰
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from ..constants import (
+    TILE_CACHE_ACCESS_FLUSH_SECONDS, TILE_CACHE_DIR, TILE_CACHE_LOW_WATERMARK, TILE_CACHE_MAX_BYTES
+)
+
+
+class TileCache:
+    """磁盘瓦片缓存
+
+    瓦片数据与索引（大小、最近访问时间）存放在同一个 SQLite 文件中，
+    重启后索引仍然有效。写入后若总字节数超出上限，按最近最少使用顺序淘汰。
+    命中时的访问时间先记在内存中，在写入瓦片、淘汰、清空或关闭时，以及攒够 ACCESS_FLUSH_BATCH 条
+    或距上次写回超过 TILE_CACHE_ACCESS_FLUSH_SECONDS 时批量写回，读取不触发写事务。
+    """
+
+    DB_NAME = "tiles.sqlite"
+    EVICT_BATCH = 256
+    ACCESS_FLUSH_BATCH = 1024
+
+    def __init__(self, cache_dir: str = TILE_CACHE_DIR, max_bytes: int = TILE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._access = {}  # (source, z, x, y) -> 尚未写回的最近访问时间
+        self._access_flushed = time.monotonic()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, self.DB_NAME)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._setup_schema()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM tiles"
+        ).fetchone()[0]
+
+    def _setup_schema(self):
+        """创建表结构"""
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tiles ("
+            " source TEXT NOT NULL, z INTEGER NOT NULL, x INTEGER NOT NULL, y INTEGER NOT NULL,"
+            " data BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL,"
+            " PRIMARY KEY (source, z, x, y))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tiles_access ON tiles (last_access)")
+        self._conn.commit()
+
+    def get(self, source: str, z: int, x: int, y: int):
+        """读取瓦片，命中时记录访问时间（批量写回）；未命中返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM tiles WHERE source=? AND z=? AND x=? AND y=?",
+                (source, z, x, y)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._access[(source, z, x, y)] = time.time()
+            if (len(self._access) >= self.ACCESS_FLUSH_BATCH
+                    or time.monotonic() - self._access_flushed >= TILE_CACHE_ACCESS_FLUSH_SECONDS):
+                self._flush_access_locked()
+                self._conn.commit()
+            self.hits += 1
+            return bytes(row[0])
+
+    def _flush_access_locked(self):
+        """把内存中记录的访问时间写回索引（调用方需持有锁并负责提交）"""
+        self._access_flushed = time.monotonic()
+        if not self._access:
+            return
+        self._conn.executemany(
+            "UPDATE tiles SET last_access=? WHERE source=? AND z=? AND x=? AND y=?",
+            [(stamp,) + key for key, stamp in self._access.items()]
+        )
+        self._access = {}
+
+    def contains(self, source: str, z: int, x: int, y: int) -> bool:
+        """检查瓦片是否已缓存（不影响LRU顺序）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM tiles WHERE source=? AND z=? AND x=? AND y=?",
+                (source, z, x, y)
+            ).fetchone()
+            return row is not None
+
+    def put(self, source: str, z: int, x: int, y: int, data: bytes):
+        """写入瓦片，必要时触发淘汰"""
+        if not data:
+            return
+        size = len(data)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM tiles WHERE source=? AND z=? AND x=? AND y=?",
+                (source, z, x, y)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tiles (source, z, x, y, data, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, z, x, y, sqlite3.Binary(data), size, time.time())
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._access.pop((source, z, x, y), None)
+            # 与写入同一个事务写回访问时间，淘汰时按最新的访问顺序
+            self._flush_access_locked()
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        """按最近访问时间淘汰，直到低于低水位线（调用方需持有锁）"""
+        target = int(self.max_bytes * TILE_CACHE_LOW_WATERMARK)
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT source, z, x, y, size FROM tiles ORDER BY last_access LIMIT ?",
+                (self.EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for source, z, x, y, size in rows:
+                self._conn.execute(
+                    "DELETE FROM tiles WHERE source=? AND z=? AND x=? AND y=?",
+                    (source, z, x, y)
+                )
+                self._total_bytes -= size
+                self.evictions += 1
+                if self._total_bytes <= target:
+                    break
+
+    def clear(self, source: str = None):
+        """清空缓存（可只清空指定底图）"""
+        with self._lock:
+            self._flush_access_locked()
+            if source is None:
+                self._conn.execute("DELETE FROM tiles")
+            else:
+                self._conn.execute("DELETE FROM tiles WHERE source=?", (source,))
+            self._conn.commit()
+            self._total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM tiles"
+            ).fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        """当前缓存占用字节数"""
+        return self._total_bytes
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            try:
+                self._flush_access_locked()
+                self._conn.commit()
+                self._conn.close()
+            except sqlite3.ProgrammingError:
+                pass
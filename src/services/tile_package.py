@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+离线瓦片包模块 - 读取本地 MBTiles / GeoPackage 栅格瓦片包
+
+瓦片包只打开一次，以只读方式通过 SQLite（启用内存映射）读取瓦片，
+并提供缩放级别范围与地理范围，供底图服务避免请求不存在的瓦片。
+
+GeoPackage 按 gpkg_tile_matrix_set / gpkg_tile_matrix 把 XYZ 编号换算为瓦片矩阵的行列：
+矩阵集须为 EPSG:3857，且各级矩阵的瓦片大小与原点与 XYZ 瓦片网格对齐（允许只覆盖部分范围、
+缩放级别编号有偏移），否则打开时报错。
+"""
+
+import math
+import os
+import sqlite3
+import threading
+
+from ..utils.tile_math import ORIGIN_SHIFT, mercator_to_lonlat, tile_range
+
+MMAP_SIZE = 256 * 1024 * 1024  # SQLite 内存映射上限（字节）
+GRID_TOLERANCE = 1e-6  # 瓦片矩阵与 XYZ 网格对齐的容差（以瓦片为单位）
+
+
+class TilePackage:
+    """离线瓦片包（MBTiles 或 GeoPackage）"""
+
+    def __init__(self, path: str, table: str = None):
+        self.path = os.path.abspath(path)
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.format = None  # "mbtiles" 或 "gpkg"
+        self.table = table
+        self.minzoom = 0
+        self.maxzoom = 0
+        self.bounds = (-180.0, -85.0511287798066, 180.0, 85.0511287798066)
+        self._matrices = {}  # GeoPackage：XYZ 缩放级别 -> (矩阵级别, 列偏移, 行偏移, 列数, 行数)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        self._read_metadata()
+
+    def _table_names(self):
+        rows = self._conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+        return {row[0] for row in rows}
+
+    def _read_metadata(self):
+        """识别包格式并读取缩放级别和范围"""
+        tables = self._table_names()
+        if "gpkg_contents" in tables:
+            self.format = "gpkg"
+            self._read_gpkg_metadata()
+        elif "tiles" in tables:
+            self.format = "mbtiles"
+            self._read_mbtiles_metadata("metadata" in tables)
+        else:
+            raise ValueError(f"不是有效的 MBTiles/GeoPackage 瓦片包: {self.path}")
+
+    def _read_mbtiles_metadata(self, has_metadata: bool):
+        meta = {}
+        if has_metadata:
+            meta = dict(self._conn.execute("SELECT name, value FROM metadata").fetchall())
+        self.name = meta.get("name") or self.name
+
+        if "minzoom" in meta and "maxzoom" in meta:
+            self.minzoom, self.maxzoom = int(meta["minzoom"]), int(meta["maxzoom"])
+        else:
+            row = self._conn.execute("SELECT MIN(zoom_level), MAX(zoom_level) FROM tiles").fetchone()
+            self.minzoom, self.maxzoom = int(row[0] or 0), int(row[1] or 0)
+
+        if meta.get("bounds"):
+            self.bounds = tuple(float(v) for v in meta["bounds"].split(","))
+
+    def _read_gpkg_metadata(self):
+        if self.table is None:
+            row = self._conn.execute(
+                "SELECT table_name FROM gpkg_contents WHERE data_type='tiles' LIMIT 1"
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"GeoPackage 中没有栅格瓦片表: {self.path}")
+            self.table = row[0]
+
+        row = self._conn.execute(
+            "SELECT identifier, min_x, min_y, max_x, max_y, srs_id FROM gpkg_contents"
+            " WHERE table_name=?", (self.table,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"GeoPackage 中没有瓦片表 {self.table}: {self.path}")
+        identifier, min_x, min_y, max_x, max_y, srs_id = row
+        self.name = identifier or self.table
+
+        self._read_gpkg_matrices()
+        self.minzoom, self.maxzoom = min(self._matrices), max(self._matrices)
+
+        if None not in (min_x, min_y, max_x, max_y):
+            epsg = self._gpkg_epsg(srs_id)
+            if epsg == 3857:
+                west, south = mercator_to_lonlat(min_x, min_y)
+                east, north = mercator_to_lonlat(max_x, max_y)
+                self.bounds = (west, south, east, north)
+            elif epsg == 4326:
+                self.bounds = (min_x, min_y, max_x, max_y)
+
+    def _gpkg_epsg(self, srs_id):
+        """GeoPackage 坐标系编号对应的 EPSG 代码，不是 EPSG 坐标系时返回 None"""
+        row = self._conn.execute(
+            "SELECT organization, organization_coordsys_id FROM gpkg_spatial_ref_sys WHERE srs_id=?",
+            (srs_id,)
+        ).fetchone()
+        if row is None or str(row[0]).upper() != "EPSG":
+            return None
+        return int(row[1])
+
+    def _read_gpkg_matrices(self):
+        """把各级瓦片矩阵对应到 XYZ 缩放级别与行列偏移，不能对应时报错"""
+        matrix_set = self._conn.execute(
+            "SELECT srs_id, min_x, max_y FROM gpkg_tile_matrix_set WHERE table_name=?", (self.table,)
+        ).fetchone()
+        if matrix_set is None:
+            raise ValueError(f"GeoPackage 瓦片表 {self.table} 缺少瓦片矩阵集: {self.path}")
+        srs_id, origin_x, origin_y = matrix_set
+        epsg = self._gpkg_epsg(srs_id)
+        if epsg != 3857:
+            raise ValueError(
+                f"GeoPackage 瓦片矩阵集坐标系为 {f'EPSG:{epsg}' if epsg else f'srs_id {srs_id}'}，"
+                f"只支持 EPSG:3857: {self.path}"
+            )
+
+        rows = self._conn.execute(
+            "SELECT zoom_level, matrix_width, matrix_height, tile_width, tile_height,"
+            " pixel_x_size, pixel_y_size FROM gpkg_tile_matrix WHERE table_name=? ORDER BY zoom_level",
+            (self.table,)
+        ).fetchall()
+        for level, width, height, tile_width, tile_height, pixel_x, pixel_y in rows:
+            span = tile_width * pixel_x  # 一个瓦片的宽度（米）
+            z = math.log2(2.0 * ORIGIN_SHIFT / span)
+            columns = (origin_x + ORIGIN_SHIFT) / span
+            first_row = (ORIGIN_SHIFT - origin_y) / span
+            aligned = (
+                abs(z - round(z)) < GRID_TOLERANCE and round(z) >= 0
+                and abs(tile_height * pixel_y - span) < GRID_TOLERANCE * span
+                and abs(columns - round(columns)) < GRID_TOLERANCE
+                and abs(first_row - round(first_row)) < GRID_TOLERANCE
+            )
+            if not aligned:
+                raise ValueError(
+                    f"GeoPackage 瓦片矩阵第 {level} 级与 XYZ 瓦片网格不对齐"
+                    f"（瓦片宽 {span:.3f} 米，原点 {origin_x:.3f}, {origin_y:.3f}）: {self.path}"
+                )
+            self._matrices[int(round(z))] = (level, int(round(columns)), int(round(first_row)), width, height)
+        if not self._matrices:
+            raise ValueError(f"GeoPackage 瓦片表 {self.table} 没有瓦片矩阵: {self.path}")
+
+    def contains_tile(self, z: int, x: int, y: int) -> bool:
+        """判断瓦片是否可能存在于包内（按缩放级别与范围判断）"""
+        if z < self.minzoom or z > self.maxzoom:
+            return False
+        if self.format == "gpkg" and z not in self._matrices:
+            return False
+        xmin, ymin, xmax, ymax = tile_range(self.bounds, z)
+        return xmin <= x <= xmax and ymin <= y <= ymax
+
+    def get_tile(self, z: int, x: int, y: int):
+        """读取 XYZ 编号的瓦片，不存在返回 None"""
+        if not self.contains_tile(z, x, y):
+            return None
+        with self._lock:
+            if self.format == "mbtiles":
+                # MBTiles 行号采用TMS（原点在左下）
+                row = self._conn.execute(
+                    "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                    (z, x, (1 << z) - 1 - y)
+                ).fetchone()
+            else:
+                # GeoPackage 行号原点在矩阵左上角，按矩阵原点相对 XYZ 网格的偏移换算
+                level, column_offset, row_offset, width, height = self._matrices[z]
+                column, tile_row = x - column_offset, y - row_offset
+                if not (0 <= column < width and 0 <= tile_row < height):
+                    return None
+                row = self._conn.execute(
+                    f'SELECT tile_data FROM "{self.table}"'
+                    " WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                    (level, column, tile_row)
+                ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def info(self) -> dict:
+        """瓦片包信息：缩放级别范围与经纬度范围"""
+        return {
+            "name": self.name,
+            "path": self.path,
+            "format": self.format,
+            "minzoom": self.minzoom,
+            "maxzoom": self.maxzoom,
+            "bounds": self.bounds,
+        }
+
+    def close(self):
+        """关闭瓦片包"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+瓦片代理模块 - 在本机提供读穿透（read-through）的XYZ瓦片服务
+
+底图图层不再直接访问在线地图源，而是访问本机代理：
+代理先查询磁盘缓存，未命中时再从上游下载并写入缓存。
+"""
+
+import http.client
+import re
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from ..constants import TILE_USER_AGENT, TILE_FETCH_TIMEOUT
+from .tile_scheduler import TileScheduler, TileRequestCancelled
+
+
+def xyz_template(uri: str) -> str:
+    """从QGIS的XYZ数据源字符串中提取瓦片URL模板"""
+    for name, value in parse_qsl(uri, keep_blank_values=True):
+        if name == "url":
+            return value
+    return ""
+
+
+def format_tile_url(template: str, z: int, x: int, y: int) -> str:
+    """将 z/x/y 填入URL模板（支持TMS风格的 {-y}）"""
+    return (template.replace("{z}", str(z))
+            .replace("{x}", str(x))
+            .replace("{-y}", str((1 << z) - 1 - y))
+            .replace("{y}", str(y)))
+
+
+def guess_content_type(data: bytes) -> str:
+    """根据文件头判断瓦片图片类型"""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class TileFetcher:
+    """上游瓦片下载器
+
+    每个线程为每个上游主机保持一条长连接，并发线程数即连接池上限。
+    """
+
+    def __init__(self, user_agent: str = TILE_USER_AGENT, timeout: float = TILE_FETCH_TIMEOUT):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, scheme: str, netloc: str, fresh: bool = False):
+        """获取当前线程到指定主机的连接"""
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        key = (scheme, netloc)
+        conn = conns.get(key)
+        if conn is not None and fresh:
+            conn.close()
+            conn = None
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[key] = conn_class(netloc, timeout=self.timeout)
+        return conn
+
+    def fetch(self, url: str):
+        """下载单个瓦片，失败返回 None"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            print(f"瓦片代理：不支持的瓦片地址 {url}")
+            return None
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = {"User-Agent": self.user_agent, "Connection": "keep-alive"}
+
+        # 长连接可能已被服务器关闭，失败时用新连接重试一次
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc, fresh=attempt > 0)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                if response.status != 200:
+                    return None
+                return data
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if attempt > 0:
+                    print(f"瓦片代理：下载失败 {url} - {e}")
+        return None
+
+
+class _TileRequestHandler(BaseHTTPRequestHandler):
+    """处理 /<底图键>/<z>/<x>/<y> 形式的瓦片请求"""
+
+    PATH_PATTERN = re.compile(r"^/([^/]+)/(\d+)/(\d+)/(\d+)(?:\.\w+)?$")
+
+    def do_GET(self):
+        match = self.PATH_PATTERN.match(self.path.split("?", 1)[0])
+        if not match:
+            self.send_error(404)
+            return
+        key = match.group(1)
+        z, x, y = (int(v) for v in match.groups()[1:])
+
+        try:
+            data = self.server.proxy.get_tile(key, z, x, y)
+        except TileRequestCancelled:
+            # 视口已变化，该瓦片不再需要
+            self.send_error(503)
+            return
+        if data is None:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", guess_content_type(data))
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # QGIS 取消过期请求时会直接断开连接
+            pass
+
+    def log_message(self, format, *args):
+        """关闭默认的逐请求日志"""
+        pass
+
+
+class TileProxyServer:
+    """本机读穿透瓦片代理"""
+
+    def __init__(self, cache, fetcher: TileFetcher = None, host: str = "127.0.0.1", port: int = 0):
+        self.cache = cache
+        self.fetcher = fetcher or TileFetcher()
+        self.scheduler = TileScheduler(self._fetch_and_store)
+        self.host = host
+        self.port = port
+        self.sources = {}  # 底图键 -> 上游URL模板
+        self.packages = {}  # 底图键 -> 离线瓦片包
+        # 请求统计：代理收到的瓦片请求数、直接由缓存或离线包提供的数量
+        self.requests = 0
+        self.local_hits = 0
+        self._stats_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def register_source(self, key: str, template: str):
+        """注册上游瓦片源"""
+        self.sources[key] = template
+
+    def register_package(self, key: str, package):
+        """注册离线瓦片包（直接从包内读取，不经过磁盘缓存）"""
+        self.packages[key] = package
+
+    def start(self):
+        """在后台线程中启动代理"""
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), _TileRequestHandler)
+        self._server.daemon_threads = True
+        self._server.proxy = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="TileProxyServer", daemon=True
+        )
+        self._thread.start()
+        print(f"瓦片代理：已启动 http://{self.host}:{self.port}")
+
+    def stop(self):
+        """停止代理"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+        print("瓦片代理：已停止")
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def layer_uri(self, key: str, zmin: int = None, zmax: int = None) -> str:
+        """生成指向本代理的QGIS XYZ数据源字符串"""
+        uri = f"type=xyz&url=http://{self.host}:{self.port}/{key}/{{z}}/{{x}}/{{y}}"
+        if zmin is not None:
+            uri += f"&zmin={zmin}"
+        if zmax is not None:
+            uri += f"&zmax={zmax}"
+        return uri
+
+    def set_viewport(self, bounds, zoom: int):
+        """通知当前视口，供调度器排序并取消过期请求"""
+        self.scheduler.set_viewport(bounds, zoom)
+
+    def get_tile(self, key: str, z: int, x: int, y: int):
+        """先读缓存，未命中时交给调度器从上游下载
+
+        瓦片请求因视口变化被取消时抛出 TileRequestCancelled。
+        """
+        with self._stats_lock:
+            self.requests += 1
+        package = self.packages.get(key)
+        if package is not None:
+            data = package.get_tile(z, x, y)
+            if data is not None:
+                self._count_local_hit()
+            return data
+
+        data = self.cache.get(key, z, x, y)
+        if data is not None:
+            self._count_local_hit()
+            return data
+
+        template = self.sources.get(key)
+        if not template:
+            return None
+        future = self.scheduler.request(key, z, x, y, format_tile_url(template, z, x, y))
+        try:
+            return future.result(timeout=TILE_FETCH_TIMEOUT * 3)
+        except FutureTimeoutError:
+            return None
+
+    def _count_local_hit(self):
+        with self._stats_lock:
+            self.local_hits += 1
+
+    def stats(self) -> dict:
+        """代理统计：请求数、本地命中数（缓存或离线包）、上游下载数、排队数"""
+        with self._stats_lock:
+            requests, local_hits = self.requests, self.local_hits
+        return {
+            "requests": requests,
+            "local_hits": local_hits,
+            "downloads": self.scheduler.completed,
+            "cancelled": self.scheduler.cancelled,
+            "pending": self.scheduler.pending_count(),
+        }
+
+    def _fetch_and_store(self, key: str, z: int, x: int, y: int, url: str):
+        """下载瓦片并写入缓存（由调度器的下载线程调用）"""
+        data = self.fetcher.fetch(url)
+        if data:
+            self.cache.put(key, z, x, y, data)
+        return data
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+瓦片请求调度模块 - 按视口优先级下载底图瓦片
+
+- 排队中的瓦片按与视口中心的距离排序，离中心越近越先下载；
+- 视口变化后，排队中但已不可见的瓦片（范围外或缩放级别已过期）直接取消；
+- 每个上游主机的并发下载数有上限。
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+from ..constants import TILE_MAX_REQUESTS_PER_HOST
+from ..utils.tile_math import lonlat_to_tile_fraction, tile_bounds
+
+WORKER_IDLE_TIMEOUT = 5.0  # 下载线程空闲多久后退出（秒）
+VIEWPORT_MARGIN = 0.25  # 判断可见性时视口向外扩展的比例
+
+
+class TileRequestCancelled(Exception):
+    """瓦片请求因视口变化被取消"""
+
+
+class _TileRequest:
+    """排队中的瓦片请求"""
+
+    __slots__ = ("tile", "url", "host", "future")
+
+    def __init__(self, tile, url: str, host: str):
+        self.tile = tile  # (底图键, z, x, y)
+        self.url = url
+        self.host = host
+        self.future = Future()
+
+
+class TileScheduler:
+    """视口优先的瓦片请求调度器"""
+
+    def __init__(self, fetch, max_per_host: int = TILE_MAX_REQUESTS_PER_HOST):
+        self._fetch = fetch  # 下载函数：(底图键, z, x, y, url) -> bytes 或 None
+        self.max_per_host = max(1, max_per_host)
+        self._cond = threading.Condition()
+        self._queues = {}  # 主机 -> [(优先级, 序号, 请求)]
+        self._active = {}  # 主机 -> 下载线程数
+        self._idle = {}  # 主机 -> 空闲等待中的线程数
+        self._inflight = {}  # (底图键, z, x, y) -> 请求
+        self._counter = itertools.count()
+        self._viewport = None  # ((west, south, east, north), zoom)
+        self.completed = 0
+        self.cancelled = 0
+
+    def set_viewport(self, bounds, zoom: int):
+        """更新当前视口（经纬度范围与瓦片缩放级别），取消已不可见的排队请求"""
+        with self._cond:
+            self._viewport = (tuple(bounds), zoom)
+            for host, queue in self._queues.items():
+                kept = []
+                for _, seq, request in queue:
+                    if self._is_visible(request.tile):
+                        kept.append((self._priority(request.tile), seq, request))
+                    else:
+                        self._inflight.pop(request.tile, None)
+                        request.future.set_exception(TileRequestCancelled())
+                        self.cancelled += 1
+                heapq.heapify(kept)
+                self._queues[host] = kept
+
+    def request(self, key: str, z: int, x: int, y: int, url: str) -> Future:
+        """提交瓦片下载请求；同一瓦片的重复请求共享同一个结果"""
+        tile = (key, z, x, y)
+        with self._cond:
+            request = self._inflight.get(tile)
+            if request is not None:
+                return request.future
+
+            request = _TileRequest(tile, url, urlsplit(url).netloc)
+            self._inflight[tile] = request
+            queue = self._queues.setdefault(request.host, [])
+            heapq.heappush(queue, (self._priority(tile), next(self._counter), request))
+
+            idle = self._idle.get(request.host, 0)
+            if idle > 0:
+                self._cond.notify_all()
+            if len(queue) > idle and self._active.get(request.host, 0) < self.max_per_host:
+                self._active[request.host] = self._active.get(request.host, 0) + 1
+                threading.Thread(
+                    target=self._worker, args=(request.host,),
+                    name=f"TileScheduler-{request.host}", daemon=True
+                ).start()
+            return request.future
+
+    def pending_count(self) -> int:
+        """排队中的请求数"""
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _worker(self, host: str):
+        """单个主机的下载线程：按优先级取出请求，空闲超时后退出"""
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + WORKER_IDLE_TIMEOUT
+                while not self._queues.get(host):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._active[host] -= 1
+                        return
+                    self._idle[host] = self._idle.get(host, 0) + 1
+                    self._cond.wait(remaining)
+                    self._idle[host] -= 1
+                _, _, request = heapq.heappop(self._queues[host])
+
+            try:
+                data = self._fetch(*request.tile, request.url)
+            except Exception as e:
+                data = None
+                print(f"瓦片调度：下载出错 {request.url} - {e}")
+
+            with self._cond:
+                self._inflight.pop(request.tile, None)
+                self.completed += 1
+            request.future.set_result(data)
+
+    def _is_visible(self, tile) -> bool:
+        """瓦片是否与当前视口相交且缩放级别未过期"""
+        if self._viewport is None:
+            return True
+        (west, south, east, north), zoom = self._viewport
+        _, z, x, y = tile
+        if abs(z - zoom) > 1:
+            return False
+        dx = (east - west) * VIEWPORT_MARGIN
+        dy = (north - south) * VIEWPORT_MARGIN
+        t_west, t_south, t_east, t_north = tile_bounds(z, x, y)
+        return (t_east >= west - dx and t_west <= east + dx
+                and t_north >= south - dy and t_south <= north + dy)
+
+    def _priority(self, tile):
+        """优先级：(不可见标记, 与视口中心的瓦片距离)，越小越优先"""
+        if self._viewport is None:
+            return (0, 0.0)
+        (west, south, east, north), zoom = self._viewport
+        _, z, x, y = tile
+        cx, cy = lonlat_to_tile_fraction((west + east) / 2.0, (south + north) / 2.0, z)
+        distance = math.hypot(x + 0.5 - cx, y + 0.5 - cy)
+        return (0 if self._is_visible(tile) else 1, distance)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+瓦片预下载模块 - 将指定区域和缩放级别范围的底图瓦片预先写入本地瓦片缓存
+
+命令行用法：
+    quick-qgis-seed --basemap OSM --bbox 120,30,123,32 --zoom 3-12
+    python -m src.services.tile_seeder --basemap OSM --bbox 120,30,123,32 --zoom 3-12
+
+已在缓存中的瓦片会被跳过，中断后重新执行同一命令即可从断点继续。
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from ..constants import BASEMAP_SOURCES, TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES
+from ..utils.tile_math import tile_range
+from .tile_cache import TileCache
+from .tile_proxy import TileFetcher, format_tile_url, xyz_template
+
+DEFAULT_SEED_WORKERS = 4
+PROGRESS_INTERVAL = 2.0  # 进度输出间隔（秒）
+
+
+class RateLimiter:
+    """令牌桶限速器（线程安全）"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._allowance = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一个令牌，必要时等待"""
+        if not self.rate or self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+                self._last = now
+                if self._allowance >= 1.0:
+                    self._allowance -= 1.0
+                    return
+                delay = (1.0 - self._allowance) / self.rate
+            time.sleep(delay)
+
+
+class TileSeeder:
+    """瓦片预下载器"""
+
+    def __init__(self, cache: TileCache, source_key: str, template: str,
+                 workers: int = DEFAULT_SEED_WORKERS, rate: float = None,
+                 fetcher: TileFetcher = None):
+        self.cache = cache
+        self.source_key = source_key
+        self.template = template
+        self.workers = max(1, workers)
+        self.limiter = RateLimiter(rate) if rate else None
+        self.fetcher = fetcher or TileFetcher()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {}
+
+    @staticmethod
+    def iter_tiles(bounds, min_zoom: int, max_zoom: int):
+        """按缩放级别由低到高遍历范围内的瓦片"""
+        for z in range(min_zoom, max_zoom + 1):
+            xmin, ymin, xmax, ymax = tile_range(bounds, z)
+            for x in range(xmin, xmax + 1):
+                for y in range(ymin, ymax + 1):
+                    yield z, x, y
+
+    @staticmethod
+    def count_tiles(bounds, min_zoom: int, max_zoom: int) -> int:
+        """统计范围内的瓦片数量"""
+        total = 0
+        for z in range(min_zoom, max_zoom + 1):
+            xmin, ymin, xmax, ymax = tile_range(bounds, z)
+            total += (xmax - xmin + 1) * (ymax - ymin + 1)
+        return total
+
+    def stop(self):
+        """请求停止（已提交的下载会完成）"""
+        self._stop.set()
+
+    def _seed_one(self, z: int, x: int, y: int):
+        """下载单个瓦片并写入缓存"""
+        if self.limiter:
+            self.limiter.acquire()
+        data = self.fetcher.fetch(format_tile_url(self.template, z, x, y))
+        if data:
+            self.cache.put(self.source_key, z, x, y, data)
+        with self._lock:
+            if data:
+                self.stats["downloaded"] += 1
+                self.stats["bytes"] += len(data)
+            else:
+                self.stats["failed"] += 1
+
+    def run(self, bounds, min_zoom: int, max_zoom: int, progress_callback=None) -> dict:
+        """执行预下载，返回统计信息"""
+        self._stop.clear()
+        self.stats = {
+            "total": self.count_tiles(bounds, min_zoom, max_zoom),
+            "skipped": 0, "downloaded": 0, "failed": 0, "bytes": 0,
+        }
+        started = time.monotonic()
+        last_report = started
+        # 限制在途任务数量，避免为海量瓦片一次性创建任务
+        max_pending = self.workers * 4
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="TileSeeder") as pool:
+            for z, x, y in self.iter_tiles(bounds, min_zoom, max_zoom):
+                if self._stop.is_set():
+                    break
+                if self.cache.contains(self.source_key, z, x, y):
+                    self.stats["skipped"] += 1
+                    continue
+                pending.add(pool.submit(self._seed_one, z, x, y))
+                if len(pending) >= max_pending:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                now = time.monotonic()
+                if progress_callback and now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    progress_callback(dict(self.stats), now - started)
+            wait(pending)
+
+        self.stats["elapsed"] = time.monotonic() - started
+        if progress_callback:
+            progress_callback(dict(self.stats), self.stats["elapsed"])
+        return self.stats
+
+
+def _parse_bbox(text: str):
+    values = [float(v) for v in text.split(",")]
+    if len(values) != 4:
+        raise argparse.ArgumentTypeError("bbox 格式应为 west,south,east,north")
+    west, south, east, north = values
+    if west >= east or south >= north:
+        raise argparse.ArgumentTypeError("bbox 范围无效")
+    return west, south, east, north
+
+
+def _parse_zoom(text: str):
+    parts = text.split("-")
+    try:
+        zooms = [int(v) for v in parts]
+    except ValueError:
+        raise argparse.ArgumentTypeError("zoom 格式应为 N 或 MIN-MAX")
+    if len(zooms) == 1:
+        zooms = zooms * 2
+    if len(zooms) != 2 or not 0 <= zooms[0] <= zooms[1] <= 22:
+        raise argparse.ArgumentTypeError("zoom 范围应在 0-22 之间且 MIN<=MAX")
+    return zooms[0], zooms[1]
+
+
+def _print_progress(stats: dict, elapsed: float):
+    done = stats["skipped"] + stats["downloaded"] + stats["failed"]
+    percent = done * 100.0 / stats["total"] if stats["total"] else 100.0
+    rate = stats["downloaded"] / elapsed if elapsed > 0 else 0.0
+    print(f"瓦片预下载：{done}/{stats['total']} ({percent:.1f}%) "
+          f"下载 {stats['downloaded']} 跳过 {stats['skipped']} 失败 {stats['failed']} "
+          f"{rate:.1f} 瓦片/秒")
+
+
+def main(argv=None) -> int:
+    """命令行入口"""
+    xyz_keys = [key for key, src in BASEMAP_SOURCES.items() if 'url' in src]
+    parser = argparse.ArgumentParser(
+        prog="quick-qgis-seed", description="预下载底图瓦片到本地瓦片缓存"
+    )
+    parser.add_argument("--basemap", required=True, type=str.upper, choices=xyz_keys,
+                        help="BASEMAP_SOURCES 中的底图键")
+    parser.add_argument("--bbox", required=True, type=_parse_bbox,
+                        help="经纬度范围 west,south,east,north")
+    parser.add_argument("--zoom", required=True, type=_parse_zoom, help="缩放级别，如 3-12")
+    parser.add_argument("--workers", type=int, default=DEFAULT_SEED_WORKERS,
+                        help="并发下载数（即连接池大小）")
+    parser.add_argument("--rate", type=float, default=None, help="限速：每秒最多下载的瓦片数")
+    parser.add_argument("--url", default=None,
+                        help="覆盖上游瓦片URL模板（如本地测试瓦片服务）")
+    parser.add_argument("--cache-dir", default=TILE_CACHE_DIR, help="瓦片缓存目录")
+    parser.add_argument("--cache-max-mb", type=int, default=TILE_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="瓦片缓存容量上限（MB）")
+    args = parser.parse_args(argv)
+
+    template = args.url or xyz_template(BASEMAP_SOURCES[args.basemap]['url'])
+    min_zoom, max_zoom = args.zoom
+    cache = TileCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    seeder = TileSeeder(cache, args.basemap, template, workers=args.workers, rate=args.rate)
+
+    total = seeder.count_tiles(args.bbox, min_zoom, max_zoom)
+    print(f"瓦片预下载：{args.basemap} z{min_zoom}-{max_zoom} 共 {total} 个瓦片 -> {args.cache_dir}")
+    try:
+        stats = seeder.run(args.bbox, min_zoom, max_zoom, progress_callback=_print_progress)
+    except KeyboardInterrupt:
+        seeder.stop()
+        print("瓦片预下载：已中断，重新执行同一命令可继续")
+        return 130
+    finally:
+        cache.close()
+
+    if cache.evictions:
+        print(f"[WARN] 缓存容量不足，预下载期间淘汰了 {cache.evictions} 个瓦片")
+    print(f"瓦片预下载：完成，用时 {stats['elapsed']:.1f} 秒")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+"""
+本机瓦片渲染服务模块 - 将当前显示的图层（矢量数据 + 底图）按需渲染为 256px XYZ 瓦片
+
+- HTTP 请求由后台线程处理：先查内存 LRU，再查磁盘瓦片缓存，都未命中时提交渲染；
+- 渲染在主线程的事件循环中调度（图层属于主线程），同时最多进行 workers 个
+  QgsMapRendererParallelJob；
+- 以 N x N 元瓦片为单位渲染再切分（图层准备、符号化和要素遍历只做一次），
+  同一元瓦片内的并发请求共享一次渲染，切分出的瓦片全部写入缓存；
+- 磁盘缓存按图层数据源与样式的摘要分键，图层和样式不变时重启后仍可直接使用，
+  图层增删或样式变化后换用新的键（旧键的瓦片由缓存按 LRU 淘汰）；
+- 图层请求重绘（数据变化）时只使与该图层范围相交的内存瓦片和进行中的元瓦片失效，
+  本次运行中发生过变化的范围内的瓦片只保存在内存中，不读写磁盘缓存。
+
+瓦片地址：http://127.0.0.1:<端口>/{z}/{x}/{y}.png，统计信息：/stats
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from qgis.PyQt.QtCore import QBuffer, QByteArray, QIODevice, QObject, QTimer, pyqtSignal, pyqtSlot
+from qgis.core import (
+    QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsCsException, QgsMapLayerStyle,
+    QgsMapRendererParallelJob, QgsProject
+)
+
+from ..constants import (
+    TILE_FETCH_TIMEOUT, TILE_SERVER_CACHE_KEY, TILE_SERVER_MEMORY_TILES, TILE_SERVER_METATILE,
+    TILE_SERVER_PORT, TILE_SERVER_WORKERS, TILE_SIZE
+)
+from ..core.map_engine import metatile_map_settings, metatile_origin, slice_metatile
+from ..utils.tile_math import ORIGIN_SHIFT, tile_mercator_bounds
+
+MAX_TILE_ZOOM = 22
+WORLD_BOUNDS = (-ORIGIN_SHIFT, -ORIGIN_SHIFT, ORIGIN_SHIFT, ORIGIN_SHIFT)
+INVALIDATION_HISTORY = 256  # 保留的失效记录数，更早开始的渲染结果一律不写入缓存
+
+
+def encode_png(image) -> bytes:
+    """QImage 编码为 PNG（可在任意线程调用）"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    buffer.close()
+    return bytes(data)
+
+
+def _intersects(a, b) -> bool:
+    """两个 (xmin, ymin, xmax, ymax) 范围是否相交"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _union(a, b):
+    if a is None or b is None:
+        return a or b
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def metatile_bounds(metatile):
+    """元瓦片 (z, 左上角x, 左上角y, 边长) 的Web墨卡托范围"""
+    z, x, y, size = metatile
+    xmin, _, _, ymax = tile_mercator_bounds(z, x, y)
+    _, ymin, xmax, _ = tile_mercator_bounds(z, x + size - 1, y + size - 1)
+    return xmin, ymin, xmax, ymax
+
+
+def layer_signature(layer) -> str:
+    """图层数据源与样式的摘要：同一文件、同一样式的图层在重启后得到相同的摘要"""
+    style = QgsMapLayerStyle()
+    style.readFromLayer(layer)
+    source = layer.source()
+    parts = [layer.providerType(), source, style.xmlData()]
+    path = source.split("|", 1)[0]
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        parts.append(f"{stat.st_size}:{stat.st_mtime}")
+    return hashlib.md5("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class _MetatileResult:
+    """一次元瓦片渲染的结果，由第一个取得结果的请求负责编码并写入缓存"""
+
+    def __init__(self, metatile, images: dict, version: int):
+        self.metatile = metatile
+        self.z = metatile[0]
+        self.images = images  # {(x, y): QImage}
+        self.version = version
+        self._claimed = False
+        self._lock = threading.Lock()
+
+    def claim(self) -> bool:
+        """只有第一次调用返回 True"""
+        with self._lock:
+            claimed, self._claimed = self._claimed, True
+            return not claimed
+
+
+class _RenderDispatcher(QObject):
+    """在主线程中调度渲染任务
+
+    HTTP 线程把瓦片放入队列并发出 requested 信号，信号以排队方式送到主线程，
+    主线程在并发上限内启动渲染任务。
+    """
+
+    requested = pyqtSignal()
+
+    def __init__(self, layers_provider, workers: int, tile_size: int, metatile: int):
+        super().__init__()
+        self.layers_provider = layers_provider
+        self.workers = max(1, workers)
+        self.tile_size = tile_size
+        self.metatile = max(1, metatile)
+        self._lock = threading.Lock()
+        self._queue = deque()  # [(z, 左上角x, 左上角y, 边长)]
+        self._inflight = {}  # 元瓦片 -> Future，结果为 _MetatileResult
+        self._active = {}  # id(job) -> job
+        self.version = 0
+        self._invalidations = deque(maxlen=INVALIDATION_HISTORY)  # (版本, 失效范围，None 为全部)
+        self.rendered = 0  # 渲染次数（元瓦片）
+        self.rendered_tiles = 0  # 切分得到的瓦片数
+        self.requested.connect(self._dispatch)
+
+    def submit(self, z: int, x: int, y: int) -> Future:
+        """提交渲染请求（任意线程）；同一元瓦片内的请求共享结果"""
+        metatile = (z,) + metatile_origin(z, x, y, self.metatile)
+        with self._lock:
+            future = self._inflight.get(metatile)
+            if future is not None:
+                return future
+            future = Future()
+            self._inflight[metatile] = future
+            self._queue.append(metatile)
+        self.requested.emit()
+        return future
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    @pyqtSlot()
+    def _dispatch(self):
+        """主线程：在并发上限内启动渲染"""
+        while len(self._active) < self.workers:
+            with self._lock:
+                if not self._queue:
+                    return
+                metatile = self._queue.popleft()
+                version = self.version
+            layers = self.layers_provider()
+            job = QgsMapRendererParallelJob(metatile_map_settings(layers, *metatile, self.tile_size))
+            self._active[id(job)] = job
+            job.finished.connect(
+                lambda job=job, metatile=metatile, version=version:
+                self._on_finished(job, metatile, version)
+            )
+            job.start()
+
+    def _on_finished(self, job, metatile, version: int):
+        """主线程：渲染完成，切分元瓦片并继续调度"""
+        self._active.pop(id(job), None)
+        z, x, y, size = metatile
+        images = slice_metatile(job.renderedImage(), x, y, size, self.tile_size)
+        self.rendered += 1
+        self.rendered_tiles += len(images)
+        with self._lock:
+            future = self._inflight.pop(metatile, None)
+        if future is not None:
+            future.set_result(_MetatileResult(metatile, images, version))
+        self._dispatch()
+
+    def invalidate(self, bounds=None):
+        """图层变化：递增版本号，此前开始、与 bounds（Web墨卡托，None 为全部）相交的渲染结果不再写入缓存"""
+        with self._lock:
+            self.version += 1
+            self._invalidations.append((self.version, bounds))
+
+    def is_current(self, result: _MetatileResult) -> bool:
+        """渲染开始后元瓦片范围内没有发生变化"""
+        with self._lock:
+            if result.version == self.version:
+                return True
+            if not self._invalidations or self._invalidations[0][0] > result.version + 1:
+                return False  # 失效记录已不完整
+            bounds = metatile_bounds(result.metatile)
+            return not any(
+                version > result.version and (changed is None or _intersects(changed, bounds))
+                for version, changed in self._invalidations
+            )
+
+
+class _TileServerHandler(BaseHTTPRequestHandler):
+    """处理 /<z>/<x>/<y>.png 与 /stats 请求"""
+
+    PATH_PATTERN = re.compile(r"^/(\d+)/(\d+)/(\d+)(?:\.png)?$")
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/stats":
+            self._send(json.dumps(self.server.tile_server.stats()).encode("utf-8"), "application/json")
+            return
+        match = self.PATH_PATTERN.match(path)
+        if not match:
+            self.send_error(404)
+            return
+        z, x, y = (int(v) for v in match.groups())
+        if z > MAX_TILE_ZOOM or x >= (1 << z) or y >= (1 << z):
+            self.send_error(404)
+            return
+
+        data = self.server.tile_server.get_tile(z, x, y)
+        if data is None:
+            self.send_error(503)
+            return
+        self._send(data, "image/png")
+
+    def _send(self, data: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        """关闭默认的逐请求日志"""
+        pass
+
+
+class TileRenderServer:
+    """本机XYZ瓦片渲染服务"""
+
+    def __init__(self, layers_provider, cache=None, workers: int = TILE_SERVER_WORKERS,
+                 memory_tiles: int = TILE_SERVER_MEMORY_TILES, host: str = "127.0.0.1",
+                 port: int = TILE_SERVER_PORT, tile_size: int = TILE_SIZE,
+                 metatile: int = TILE_SERVER_METATILE):
+        self.cache = cache  # 磁盘瓦片缓存（TileCache，可选）
+        self.cache_key = TILE_SERVER_CACHE_KEY  # 随图层与样式变化，见 _refresh_cache_key
+        self.layers_provider = layers_provider
+        self.host = host
+        self.port = port
+        self.memory_tiles = memory_tiles
+        self._memory = OrderedDict()  # (z, x, y) -> PNG 字节
+        self._memory_lock = threading.Lock()
+        self.dispatcher = _RenderDispatcher(self._render_layers, workers, tile_size, metatile)
+        self.requests = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self._server = None
+        self._thread = None
+        self._watched_layers = set()
+        self._signatures = {}  # 图层ID -> 数据源与样式摘要
+        self._layer_ids = None  # 上次计算缓存键时的图层ID列表
+        self._layer_bounds = {}  # 图层ID -> 上次已知的Web墨卡托范围
+        self._volatile = {}  # 图层ID -> 本次运行中发生过变化的范围（不读写磁盘缓存）
+        self._to_mercator = QgsCoordinateReferenceSystem("EPSG:3857")
+
+        project = QgsProject.instance()
+        project.layersAdded.connect(self._on_layers_added)
+        project.layersRemoved.connect(self._on_layers_removed)
+        self._on_layers_added(list(project.mapLayers().values()))
+        self._refresh_cache_key()
+
+    def start(self):
+        """在后台线程中启动HTTP服务"""
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), _TileServerHandler)
+        self._server.daemon_threads = True
+        self._server.tile_server = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="TileRenderServer", daemon=True
+        )
+        self._thread.start()
+        print(f"瓦片渲染服务：已启动 {self.url_template()}")
+
+    def stop(self):
+        """停止HTTP服务"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+        print("瓦片渲染服务：已停止")
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def url_template(self) -> str:
+        return f"http://{self.host}:{self.port}/{{z}}/{{x}}/{{y}}.png"
+
+    def _on_layers_added(self, layers):
+        """监听图层的重绘请求（数据变化）与样式变化"""
+        for layer in layers:
+            if layer.id() in self._watched_layers:
+                continue
+            self._watched_layers.add(layer.id())
+            bounds = self._layer_bounds[layer.id()] = self._mercator_bounds(layer)
+            if layer.providerType() == "memory" and bounds is not None:
+                # 内存图层的内容无法跨重启识别，其范围内的瓦片只缓存在内存中
+                with self._memory_lock:
+                    self._volatile[layer.id()] = bounds
+            layer.repaintRequested.connect(lambda *args, layer=layer: self._on_layer_repaint(layer))
+            layer.styleChanged.connect(lambda layer=layer: self._on_style_changed(layer))
+        # 图层可能稍后才加入画布，下一轮事件循环再计算缓存键
+        QTimer.singleShot(0, self._refresh_cache_key)
+
+    def _on_layers_removed(self, layer_ids):
+        self._watched_layers.difference_update(layer_ids)
+        with self._memory_lock:
+            for layer_id in layer_ids:
+                self._volatile.pop(layer_id, None)
+        for layer_id in layer_ids:
+            self._signatures.pop(layer_id, None)
+            self._layer_bounds.pop(layer_id, None)
+        QTimer.singleShot(0, self._refresh_cache_key)
+
+    def _on_style_changed(self, layer):
+        self._signatures.pop(layer.id(), None)
+        self._refresh_cache_key()
+
+    def _on_layer_repaint(self, layer):
+        """图层数据变化：只使该图层新旧范围内的瓦片失效，并把该范围标记为不使用磁盘缓存"""
+        if layer.id() not in self._watched_layers:
+            return
+        old = self._layer_bounds.get(layer.id())
+        new = self._layer_bounds[layer.id()] = self._mercator_bounds(layer)
+        changed = _union(old, new)
+        if changed is None:
+            return  # 变化前后都没有要素
+        with self._memory_lock:
+            self._volatile[layer.id()] = _union(self._volatile.get(layer.id()), changed)
+        self.invalidate(changed)
+
+    def _mercator_bounds(self, layer):
+        """图层范围（Web墨卡托），图层为空时返回 None，无法换算时为整个世界"""
+        extent = layer.extent()
+        if extent.isNull():
+            return None
+        try:
+            transform = QgsCoordinateTransform(layer.crs(), self._to_mercator, QgsProject.instance())
+            extent = transform.transformBoundingBox(extent)
+        except QgsCsException:
+            return WORLD_BOUNDS
+        return extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()
+
+    def _render_layers(self):
+        """渲染用的图层（主线程）；图层列表变化时先更新缓存键"""
+        layers = self.layers_provider()
+        if [layer.id() for layer in layers] != self._layer_ids:
+            self._refresh_cache_key(layers)
+        return layers
+
+    def _refresh_cache_key(self, layers=None):
+        """按当前图层的数据源与样式计算磁盘缓存键（主线程）；键变化时清空内存瓦片"""
+        layers = self.layers_provider() if layers is None else layers
+        self._layer_ids = [layer.id() for layer in layers]
+        digest = hashlib.md5(str(self.dispatcher.tile_size).encode("utf-8"))
+        for layer in layers:
+            signature = self._signatures.get(layer.id())
+            if signature is None:
+                signature = self._signatures[layer.id()] = layer_signature(layer)
+            digest.update(signature.encode("utf-8"))
+        key = f"{TILE_SERVER_CACHE_KEY}-{digest.hexdigest()[:16]}"
+        if key != self.cache_key:
+            self.cache_key = key
+            self.invalidate()
+
+    def invalidate(self, bounds=None):
+        """使内存中与 bounds（Web墨卡托，None 为全部）相交的瓦片和进行中的渲染失效（不清空磁盘缓存）"""
+        self.dispatcher.invalidate(bounds)
+        with self._memory_lock:
+            if bounds is None:
+                self._memory.clear()
+                return
+            stale = [tile for tile in self._memory if _intersects(tile_mercator_bounds(*tile), bounds)]
+            for tile in stale:
+                del self._memory[tile]
+
+    def _use_disk(self, bounds) -> bool:
+        """范围内没有本次运行中变化过的图层数据时才读写磁盘缓存（调用方需持有内存锁）"""
+        return self.cache is not None and not any(
+            _intersects(changed, bounds) for changed in self._volatile.values()
+        )
+
+    def _remember(self, tile, data: bytes):
+        with self._memory_lock:
+            self._memory[tile] = data
+            self._memory.move_to_end(tile)
+            while len(self._memory) > self.memory_tiles:
+                self._memory.popitem(last=False)
+
+    def _from_memory(self, tile):
+        with self._memory_lock:
+            data = self._memory.get(tile)
+            if data is not None:
+                self._memory.move_to_end(tile)
+            return data
+
+    def get_tile(self, z: int, x: int, y: int):
+        """取得瓦片PNG（HTTP线程调用）：内存 -> 磁盘 -> 渲染"""
+        tile = (z, x, y)
+        with self._memory_lock:
+            self.requests += 1
+        data = self._from_memory(tile)
+        if data is not None:
+            with self._memory_lock:
+                self.memory_hits += 1
+            return data
+
+        with self._memory_lock:
+            use_disk = self._use_disk(tile_mercator_bounds(z, x, y))
+        if use_disk:
+            data = self.cache.get(self.cache_key, z, x, y)
+            if data is not None:
+                with self._memory_lock:
+                    self.disk_hits += 1
+                self._remember(tile, data)
+                return data
+
+        try:
+            result = self.dispatcher.submit(z, x, y).result(timeout=TILE_FETCH_TIMEOUT * 3)
+        except FutureTimeoutError:
+            return None
+
+        if not result.claim():
+            # 其他请求负责写入整个元瓦片，这里只编码自己的瓦片
+            return self._from_memory(tile) or encode_png(result.images[(x, y)])
+        return self._store_metatile(result)[(x, y)]
+
+    def _store_metatile(self, result: _MetatileResult) -> dict:
+        """编码元瓦片切分出的全部瓦片；渲染期间范围内的图层未变化时写入内存缓存，
+        范围内没有本次运行中变化过的数据时同时写入磁盘缓存"""
+        encoded = {xy: encode_png(image) for xy, image in result.images.items()}
+        if self.dispatcher.is_current(result):
+            cache_key = self.cache_key
+            with self._memory_lock:
+                use_disk = self._use_disk(metatile_bounds(result.metatile))
+            for (x, y), data in encoded.items():
+                self._remember((result.z, x, y), data)
+                if use_disk:
+                    self.cache.put(cache_key, result.z, x, y, data)
+        return encoded
+
+    def stats(self) -> dict:
+        """服务统计"""
+        with self._memory_lock:
+            memory_size = len(self._memory)
+            requests, memory_hits, disk_hits = self.requests, self.memory_hits, self.disk_hits
+        return {
+            "requests": requests,
+            "memory_hits": memory_hits,
+            "disk_hits": disk_hits,
+            "rendered": self.dispatcher.rendered,
+            "rendered_tiles": self.dispatcher.rendered_tiles,
+            "metatile": self.dispatcher.metatile,
+            "pending": self.dispatcher.pending_count(),
+            "memory_tiles": memory_size,
+            "version": self.dispatcher.version,
+            "cache_key": self.cache_key,
+        }
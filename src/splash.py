@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+启动画面模块 - 预渲染并缓存启动画面图片，按真实的启动阶段显示进度
+
+启动画面在 QgsApplication.initQgis 之前显示，监听启动计时器的阶段事件更新提示文字，
+在首次完整渲染地图后关闭。
+"""
+
+import hashlib
+import os
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QColor, QFont, QPainter, QPixmap
+from PyQt5.QtWidgets import QSplashScreen
+
+from .constants import APP_VERSION, SPLASH_CACHE_DIR, SPLASH_MAX_SECONDS
+from .utils.startup_tracer import tracer
+
+SPLASH_SIZE = (800, 600)
+SPLASH_TITLE = "海洋移动监测路径规划系统"
+SPLASH_SUBTITLE = "v1.0.0"
+SPLASH_BACKGROUND = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "assets", "images", "first-screen.png"
+)
+
+# 启动阶段 -> 启动画面提示文字（阶段开始时显示）
+PHASE_MESSAGES = {
+    "init_qgis": "正在初始化 QGIS...",
+    "app_initialize": "正在初始化系统...",
+    "canvas": "正在创建地图画布...",
+    "layer_manager": "正在启动地图服务...",
+    "sample_data": "正在加载数据...",
+    "first_basemap": "正在加载底图...",
+    "first_render": "正在绘制地图...",
+}
+
+
+def _cache_path() -> str:
+    """缓存图片路径：背景图、尺寸、文字或版本变化后重新生成"""
+    try:
+        background_mtime = os.path.getmtime(SPLASH_BACKGROUND)
+    except OSError:
+        background_mtime = 0
+    key = f"{APP_VERSION}|{SPLASH_SIZE}|{SPLASH_TITLE}|{SPLASH_SUBTITLE}|{background_mtime}"
+    digest = hashlib.md5(key.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(SPLASH_CACHE_DIR, f"splash-{digest}.png")
+
+
+def render_splash_pixmap() -> QPixmap:
+    """绘制启动画面（背景图缩放、遮罩和标题文字）"""
+    splash_pixmap = QPixmap(*SPLASH_SIZE)
+    background_pixmap = QPixmap(SPLASH_BACKGROUND) if os.path.exists(SPLASH_BACKGROUND) else QPixmap()
+    if not background_pixmap.isNull():
+        # 缩放背景图片以填充启动画面
+        scaled_background = background_pixmap.scaled(
+            splash_pixmap.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
+        )
+        painter = QPainter(splash_pixmap)
+        painter.drawPixmap(0, 0, scaled_background)
+    else:
+        # 没有背景图片时使用默认背景
+        splash_pixmap.fill(QColor(0, 100, 0))  # 深绿色背景
+        painter = QPainter(splash_pixmap)
+
+    painter.setRenderHint(QPainter.Antialiasing)
+    # 半透明遮罩层，让文字更清晰
+    painter.fillRect(splash_pixmap.rect(), QColor(0, 0, 0, 100))
+
+    # 主标题 - 大号白色粗体
+    painter.setPen(QColor(255, 255, 255))
+    painter.setFont(QFont("Microsoft YaHei", 26, QFont.Bold))
+    painter.drawText(splash_pixmap.rect().adjusted(0, 150, 0, -200), Qt.AlignCenter, SPLASH_TITLE)
+
+    # 副标题 - 中等白色字体
+    painter.setFont(QFont("Microsoft YaHei", 18, QFont.Normal))
+    painter.drawText(splash_pixmap.rect().adjusted(0, 220, 0, -150), Qt.AlignCenter, SPLASH_SUBTITLE)
+    painter.end()
+    return splash_pixmap
+
+
+def load_splash_pixmap() -> QPixmap:
+    """读取缓存的启动画面图片，没有缓存时绘制并保存"""
+    path = _cache_path()
+    if os.path.exists(path):
+        pixmap = QPixmap(path)
+        if not pixmap.isNull():
+            return pixmap
+
+    pixmap = render_splash_pixmap()
+    try:
+        os.makedirs(SPLASH_CACHE_DIR, exist_ok=True)
+        pixmap.save(path, "PNG")
+    except OSError as e:
+        print(f"[WARN] 启动画面缓存写入失败: {e}")
+    return pixmap
+
+
+class StartupSplash:
+    """跟随启动阶段更新提示、首次渲染完成后关闭的启动画面"""
+
+    def __init__(self):
+        self.splash = None
+        self._timeout = None
+
+    def show(self):
+        """显示启动画面并开始监听启动阶段"""
+        try:
+            self.splash = QSplashScreen(load_splash_pixmap())
+            self.splash.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.SplashScreen)
+            self.splash.show()
+            self._show_message("正在启动...")
+            tracer.add_listener(self._on_phase_event)
+
+            # 首次渲染迟迟不完成（如网络不可用）时也不一直遮挡窗口
+            self._timeout = QTimer()
+            self._timeout.setSingleShot(True)
+            self._timeout.timeout.connect(self.close)
+            self._timeout.start(SPLASH_MAX_SECONDS * 1000)
+            print("启动画面显示成功")
+        except Exception as e:
+            print(f"显示启动画面失败: {e}")
+            self.splash = None
+
+    def _show_message(self, message: str):
+        if self.splash:
+            # showMessage 会立即重绘启动画面，不需要等待事件循环
+            self.splash.showMessage(message, Qt.AlignBottom | Qt.AlignCenter, QColor(255, 255, 255))
+
+    def _on_phase_event(self, event: str, name: str):
+        """启动计时器事件：阶段开始时更新提示，首次渲染结束后关闭"""
+        if event == "begin" and name in PHASE_MESSAGES:
+            self._show_message(PHASE_MESSAGES[name])
+        elif event == "end" and name == "first_render":
+            self.close()
+
+    def close(self):
+        """关闭启动画面"""
+        if self._timeout:
+            self._timeout.stop()
+            self._timeout = None
+        if self.splash:
+            self.splash.close()
+            self.splash = None
+            print("启动画面已关闭")
@@ -6,15 +6,18 @@ UI管理模块 - 负责主窗口和QML界面的创建
 import os
 from qgis.PyQt.QtWidgets import QWidget, QVBoxLayout
 
-from PyQt5.QtQuick import QQuickView, QQuickWindow
+from PyQt5.QtQuick import QQuickItem, QQuickView, QQuickWindow
 from PyQt5.QtQuickWidgets import QQuickWidget
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QRegion
 QML_AVAILABLE = True
  
 from qgis.PyQt.QtCore import QUrl
 from qgis.gui import QgsMapCanvas
 from .bridge import QmlBridge
-from .constants import DEFAULT_WINDOW_TITLE
+from .overlay_layout import OverlayLayout
+from .constants import DEFAULT_WINDOW_TITLE, OVERLAY_QML, OVERLAY_INPUT_ITEMS, QML_CACHE_WARM_DELAY_MS
+from .utils.startup_tracer import tracer
 
 class UIManager:
     """UI管理器"""
@@ -27,12 +30,11 @@ class UIManager:
         self.qml_view = None
         self.qml_container = None
         self.qml_overlay = None
+        self.overlay_layout = None
     
     def create_main_window(self):
         """创建主窗口和地图画布"""
         print("正在创建主窗口...")
-        # 显示启动画面
-        self._show_splash_screen()
         # 创建主窗口
         self.window = QWidget()
         self.window.setWindowTitle(DEFAULT_WINDOW_TITLE)
@@ -42,17 +44,18 @@ class UIManager:
         layout = QVBoxLayout(self.window)
         
         # 创建地图画布
-        self._create_map_canvas(layout)
+        with tracer.phase("canvas"):
+            self._create_map_canvas(layout)
 
-        # 在地图之上创建顶部QML控制条
-        self._create_qml_overlay()
-        # 在地图之上创建右下角工具栏
-        self._create_tools_overlay()
+        # 桥接对象先于QML创建，叠加层加载前发出的状态由桥接对象保存
+        self.bridge = QmlBridge(self.app_ref)
         
         # 显示窗口
-        self.window.show()
-        # 立即关闭启动画面
-        self.close_splash_screen()
+        with tracer.phase("window_show"):
+            self.window.show()
+        
+        # 窗口显示后再创建QML叠加层（顶部控制条 + 右下角工具栏），不阻塞画布首帧
+        QTimer.singleShot(0, self._create_qml_overlay)
         
         print("主窗口创建完成")
         return self.window, self.canvas
@@ -104,6 +107,8 @@ class UIManager:
             # 创建地图画布
             self.canvas = QgsMapCanvas(self.window)
             layout.addWidget(self.canvas)
+            # 画布上所有叠加部件的位置由布局管理器统一计算
+            self.overlay_layout = OverlayLayout(self.canvas)
             print("地图画布创建完成")
             
         except Exception as e:
@@ -111,7 +116,11 @@ class UIManager:
             self.canvas = None
 
     def _create_qml_overlay(self):
-        """创建叠加在地图上的QML控制层"""
+        """创建叠加在地图上的QML控制层
+        
+        顶部控制条、右下角工具栏与底部回放时间轴由 overlay.qml 加载到同一个 QQuickWidget 中，
+        共用一个 QML 引擎和离屏渲染目标；通过窗口遮罩只让按钮区域拦截鼠标。
+        """
         try:
             if self.canvas is None:
                 return
@@ -142,101 +151,95 @@ class UIManager:
             self.qml_overlay.setParent(self.canvas)
             self.qml_overlay.raise_()
 
-            # 加载 QML（顶部控制条）
-            qml_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ui", "main.qml")
+            # 按钮区域变化（状态文本变长、画布尺寸变化）时更新遮罩，同一轮事件循环只更新一次
+            self._mask_timer = QTimer(self.qml_overlay)
+            self._mask_timer.setSingleShot(True)
+            self._mask_timer.setInterval(0)
+            self._mask_timer.timeout.connect(self._update_overlay_mask)
+            self._overlay_pending = {"headerLoader", "toolsLoader", "timelineLoader"}
+            self.bridge.overlayLoaded.connect(self._on_overlay_part_loaded)
+
+            # 加载 QML：overlay.qml 本身很小，控制条与工具栏由其中的 Loader 异步加载
+            qml_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ui", OVERLAY_QML)
             if not os.path.exists(qml_path):
                 print(f"[WARN] 叠加QML文件不存在: {qml_path}")
                 return
+            tracer.begin("qml_overlay")
             self.qml_overlay.setSource(QUrl.fromLocalFile(qml_path))
+            if self.qml_overlay.status() == QQuickWidget.Error:
+                print(f"[ERROR] QML加载错误: {self.qml_overlay.errors()}")
+                return
 
-            # 顶部栏仅占用高度 60，避免拦截整个画布鼠标
-            def _sync_overlay_geometry():
-                if self.canvas and self.qml_overlay:
-                    self.qml_overlay.setGeometry(0, 0, self.canvas.width(), 60)
-                    self.qml_overlay.raise_()
-
-            _sync_overlay_geometry()
-
-            # 监听画布尺寸变化
-            original_resize = getattr(self.canvas, 'resizeEvent', None)
-
-            def wrapped_resize(event):
-                try:
-                    if callable(original_resize):
-                        original_resize(event)
-                finally:
-                    _sync_overlay_geometry()
-
-            self.canvas.resizeEvent = wrapped_resize
+            # 叠加层覆盖整个画布，鼠标拦截范围由遮罩决定；画布尺寸变化后由布局管理器重排
+            self.overlay_layout.add(self.qml_overlay, "fill", on_layout=self._mask_timer.start)
+            self.qml_overlay.show()
 
-            print("QML叠加控制层创建完成，位于地图之上")
+            print("QML叠加层已创建（控制条与工具栏共用一个场景），正在异步加载界面")
 
         except Exception as e:
             print(f"[ERROR] 创建QML叠加层失败: {e}")
 
-    def _create_tools_overlay(self):
-        """创建右下角工具栏叠加层（独立的 QQuickWidget，避免遮挡画布）"""
-        try:
-            if self.canvas is None:
-                return
-
-            tools = QQuickWidget(self.window)
-            tools.setResizeMode(QQuickWidget.SizeRootObjectToView)
-            tools.setAttribute(Qt.WA_TranslucentBackground)
-            tools.setClearColor(Qt.transparent)
-            tools.setAttribute(Qt.WA_AlwaysStackOnTop)
-            tools.setStyleSheet("background: transparent;")
-
-            # 与主桥接对象共享上下文
-            if self.bridge is None:
-                self.bridge = QmlBridge(self.app_ref)
-            tools.rootContext().setContextProperty("qgisBridge", self.bridge)
-
-            tools.setParent(self.canvas)
-            tools.raise_()
-
-            qml_tools = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ui", "tools.qml")
-            if not os.path.exists(qml_tools):
-                print(f"[WARN] 工具栏QML不存在: {qml_tools}")
-                return
-            tools.setSource(QUrl.fromLocalFile(qml_tools))
-
-            TOOLBAR_W = 56
-            TOOLBAR_H = 314  # 6*44 + 5*10
-            MARGIN = 16
-
-            def _sync_tools_geometry():
-                if self.canvas and tools:
-                    x = max(0, self.canvas.width() - TOOLBAR_W - MARGIN)
-                    y = max(0, self.canvas.height() - TOOLBAR_H - MARGIN)
-                    tools.setGeometry(x, y, TOOLBAR_W, TOOLBAR_H)
-                    tools.raise_()
-
-            _sync_tools_geometry()
-
-            original_resize = getattr(self.canvas, 'resizeEvent', None)
-
-            def wrapped_resize_tools(event):
-                try:
-                    if callable(original_resize):
-                        original_resize(event)
-                finally:
-                    # 顶部栏
-                    if hasattr(self, 'qml_overlay'):
-                        try:
-                            self.qml_overlay.setGeometry(0, 0, self.canvas.width(), 60)
-                        except Exception:
-                            pass
-                    _sync_tools_geometry()
-
-            self.canvas.resizeEvent = wrapped_resize_tools
-
-            self.tools_overlay = tools
-            print("右下角工具栏叠加层创建完成")
+    def add_overlay(self, widget, anchor: str = "fill", size=None, margin: int = 0, on_layout=None):
+        """在地图画布上添加叠加部件，位置随画布尺寸自动调整（见 OverlayLayout.add）"""
+        if self.overlay_layout is None:
+            return
+        widget.setParent(self.canvas)
+        self.overlay_layout.add(widget, anchor, size, margin, on_layout)
+        widget.show()
+
+    def _on_overlay_part_loaded(self, name: str):
+        """叠加层的一部分异步加载完成：跟踪其按钮区域并更新遮罩"""
+        schedule_mask = lambda *args: self._mask_timer.start()
+        for item in self._overlay_input_items():
+            # 每个按钮区域只连接一次
+            if item.property("maskTracked"):
+                continue
+            item.setProperty("maskTracked", True)
+            item.childrenRectChanged.connect(schedule_mask)
+            item.xChanged.connect(schedule_mask)
+            item.yChanged.connect(schedule_mask)
+            item.visibleChanged.connect(schedule_mask)
+        self._mask_timer.start()
+
+        self._overlay_pending.discard(name)
+        if not self._overlay_pending:
+            tracer.end("qml_overlay")
+            print("QML叠加层加载完成")
+            QTimer.singleShot(QML_CACHE_WARM_DELAY_MS, self._warm_qml_cache)
+
+    def _warm_qml_cache(self):
+        """在安装位置预热QML磁盘缓存（含尚未加载的界面），QML 文件未变化时跳过"""
+        # 延迟导入：只在首次启动或 QML 文件变化后需要
+        from .utils.qml_cache import is_warm, warm_qml_cache
+        if self.qml_overlay is None or is_warm():
+            return
+        results = warm_qml_cache(self.qml_overlay.engine())
+        elapsed_ms = sum(result[2] for result in results)
+        failed = [os.path.basename(path) for path, ok, _, _ in results if not ok]
+        print(f"QML磁盘缓存已预热：{len(results)} 个文件，{elapsed_ms:.0f}ms" + (f"，失败 {failed}" if failed else ""))
+
+    def _overlay_input_items(self):
+        """叠加层中需要拦截鼠标的按钮区域"""
+        root = self.qml_overlay.rootObject() if self.qml_overlay else None
+        if root is None:
+            return []
+        items = [root.findChild(QQuickItem, name) for name in OVERLAY_INPUT_ITEMS]
+        return [item for item in items if item is not None]
+
+    def _update_overlay_mask(self):
+        """按按钮区域设置叠加层遮罩，区域外的鼠标事件落到地图画布上"""
+        if not self.qml_overlay:
+            return
+        region = QRegion()
+        for item in self._overlay_input_items():
+            if item.isVisible():
+                rect = item.mapRectToScene(item.childrenRect())
+                region = region.united(QRegion(rect.toAlignedRect()))
+        if region.isEmpty():
+            # 空遮罩等同于不设遮罩，用一个像素代替
+            region = QRegion(0, 0, 1, 1)
+        self.qml_overlay.setMask(region)
 
-        except Exception as e:
-            print(f"[ERROR] 创建工具栏叠加层失败: {e}")
-    
     def update_status(self, message: str):
         """更新状态信息：通过桥接发射信号到QML"""
         if self.bridge:
@@ -245,94 +248,60 @@ class UIManager:
             except Exception as e:
                 print(f"[WARN] 状态更新失败: {e}")
     
-    def refresh_canvas(self):
-        """刷新画布"""
-        if self.canvas:
-            self.canvas.refresh()
+    def set_loading(self, loading: bool, percent: float = None):
+        """更新后台加载状态与进度（百分比，None 表示未知）：通过桥接发射信号到QML"""
+        if self.bridge:
+            try:
+                self.bridge.setLoadingProgress(-1.0 if percent is None else float(percent))
+                self.bridge.setLoading(loading)
+            except Exception as e:
+                print(f"[WARN] 加载状态更新失败: {e}")
     
-    def get_bridge(self):
-        """获取桥接对象"""
-        return self.bridge
-    def _show_splash_screen(self):
-        """显示启动画面"""
-        try:
-            from PyQt5.QtWidgets import QSplashScreen
-            from PyQt5.QtGui import QPixmap, QPainter, QFont, QColor
-            from PyQt5.QtCore import Qt, QTimer
-            import os
-            
-            # 获取背景图片路径
-            background_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                         "assets", "images", "first-screen.png")
-            
-            # 创建启动画面
-            splash_pixmap = QPixmap(800, 600)  # 增大尺寸以匹配QGIS风格
-            
-            # 尝试加载背景图片
-            if os.path.exists(background_path):
-                background_pixmap = QPixmap(background_path)
-                if not background_pixmap.isNull():
-                    # 缩放背景图片以填充启动画面
-                    scaled_background = background_pixmap.scaled(
-                        splash_pixmap.size(), 
-                        Qt.KeepAspectRatioByExpanding, 
-                        Qt.SmoothTransformation
-                    )
-                    # 将背景图片绘制到启动画面上
-                    painter = QPainter(splash_pixmap)
-                    painter.drawPixmap(0, 0, scaled_background)
-                else:
-                    # 如果图片加载失败，使用默认背景
-                    splash_pixmap.fill(QColor(0, 100, 0))  # 深绿色背景
-                    painter = QPainter(splash_pixmap)
-            else:
-                # 如果没有背景图片，使用默认背景
-                splash_pixmap.fill(QColor(0, 100, 0))  # 深绿色背景
-                painter = QPainter(splash_pixmap)
-            
-            painter.setRenderHint(QPainter.Antialiasing)
-            
-            # 添加半透明遮罩层，让文字更清晰
-            painter.fillRect(splash_pixmap.rect(), QColor(0, 0, 0, 100))
-            
-            # 绘制主标题 - 大号白色粗体
-            painter.setPen(QColor(255, 255, 255))
-            painter.setFont(QFont("Microsoft YaHei", 26, QFont.Bold))
-            main_title_rect = splash_pixmap.rect().adjusted(0, 150, 0, -200)
-            painter.drawText(main_title_rect, Qt.AlignCenter, 
-                           "海洋移动监测路径规划系统")
-            
-            # 绘制副标题 - 中等白色字体
-            painter.setFont(QFont("Microsoft YaHei", 18, QFont.Normal))
-            subtitle_rect = splash_pixmap.rect().adjusted(0, 220, 0, -150)
-            painter.drawText(subtitle_rect, Qt.AlignCenter, "v1.0.0")
-            
-            painter.end()
-            
-            # 创建启动画面
-            self.splash = QSplashScreen(splash_pixmap)
-            self.splash.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.SplashScreen)
-            self.splash.show()
-            
-            # 底部状态消息 - 白色文字
-            self.splash.showMessage("正在初始化系统...", Qt.AlignBottom | Qt.AlignCenter, 
-                                  QColor(255, 255, 255))
-            
-            print("启动画面显示成功")
-            
-
-        except Exception as e:
-            print(f"显示启动画面失败: {e}")
-            self.splash = None
+    def set_measuring(self, active: bool):
+        """更新测量模式状态：通过桥接发射信号到QML"""
+        if self.bridge:
+            try:
+                self.bridge.setMeasuring(active)
+            except Exception as e:
+                print(f"[WARN] 测量状态更新失败: {e}")
+    
+    def set_playback(self, state: dict):
+        """更新轨迹回放状态（时间范围、窗口、是否播放）：通过桥接发射信号到QML"""
+        if self.bridge:
+            try:
+                self.bridge.setPlayback(
+                    state["active"], state["start"], state["end"], state["t0"], state["t1"], state["playing"]
+                )
+            except Exception as e:
+                print(f"[WARN] 回放状态更新失败: {e}")
     
-    def close_splash_screen(self):
-        """关闭启动画面"""
+    def update_render_stats(self, stats: dict):
+        """渲染完成后更新性能统计：格式化为一行文本发送到QML"""
+        if not self.bridge:
+            return
+        render = stats.get("render_ms", {})
+        if not render.get("count"):
+            return
+        text = f"渲染 {render['last']:.0f}ms · p50 {render['p50']:.0f} · p90 {render['p90']:.0f}"
+        tiles = stats.get("tiles_per_render", {})
+        if tiles.get("count"):
+            hits = stats.get("tile_hits_per_render", {}).get("last", 0)
+            text += f" · 瓦片 {tiles['last']} (命中 {hits})"
+        layers = stats.get("layers_ms", {})
+        if layers:
+            # 最近一次计时中最慢的图层
+            name, summary = max(layers.items(), key=lambda item: item[1].get("last", 0))
+            text += f" · 最慢 {name} {summary['last']:.0f}ms"
         try:
-            if hasattr(self, 'splash') and self.splash:
-                self.splash.close()
-                self.splash = None
-                print("启动画面已关闭")
+            self.bridge.updateRenderStats(text)
         except Exception as e:
-            print(f"关闭启动画面失败: {e}")
+            print(f"[WARN] 渲染统计更新失败: {e}")
     
-
+    def refresh_canvas(self):
+        """刷新画布（经由应用的刷新协调）"""
+        if self.app_ref:
+            self.app_ref.refresh_canvas()
+    
+    def get_bridge(self):
+        """获取桥接对象"""
+        return self.bridge
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+大圆距离工具模块 - 经纬度点之间的球面距离（numpy 向量化）
+"""
+
+import numpy as np
+
+MEAN_EARTH_RADIUS = 6371008.8  # 平均地球半径（米）
+
+
+def great_circle_m(lon1, lat1, lon2, lat2):
+    """大圆距离（米），参数可以是数值或 numpy 数组（按广播规则计算）"""
+    lon1, lat1, lon2, lat2 = (np.radians(v) for v in (lon1, lat1, lon2, lat2))
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2.0 * MEAN_EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+
+def path_length_m(points) -> float:
+    """经纬度折线的大圆长度（米）"""
+    if len(points) < 2:
+        return 0.0
+    coords = np.asarray(points, dtype=float)
+    return float(great_circle_m(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1]).sum())
+
+
+def distance_matrix_m(points) -> np.ndarray:
+    """经纬度点两两之间的大圆距离矩阵（米）"""
+    coords = np.asarray(points, dtype=float)
+    lon, lat = coords[:, 0], coords[:, 1]
+    return great_circle_m(lon[:, None], lat[:, None], lon[None, :], lat[None, :])
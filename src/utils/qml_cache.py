@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+QML磁盘缓存预热模块 - 在程序实际运行的位置编译 ui/ 下全部 QML 文件，写入当前用户的 Qt QML 磁盘缓存
+
+Qt 按 QML 文件的绝对路径和应用名把编译结果存放在用户缓存目录的 qmlcache 中，缓存不能随安装包分发，
+因此只能在目标机器上、以安装后的路径生成：
+- 应用首次启动（或 QML 文件变化后）在界面加载完成后预热一次，用 qmlcache 目录下的标记文件记录
+  已预热的 QML 文件指纹（路径、大小、修改时间）；
+- 安装程序可在安装后执行 `main.exe --build-qml-cache`，使首次启动也跳过 QML 编译。
+环境变量 QML_DISABLE_DISK_CACHE 会禁用磁盘缓存。
+"""
+
+import glob
+import hashlib
+import os
+import time
+
+from qgis.PyQt.QtCore import QStandardPaths, QUrl
+from PyQt5.QtQml import QQmlComponent
+
+# 程序所在目录下的 ui/（源码运行与 PyInstaller 打包后相同）
+UI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "ui")
+MARKER_NAME = "quick-qgis-warm.txt"
+
+
+def qml_files(ui_dir: str = UI_DIR):
+    return sorted(os.path.abspath(path) for path in glob.glob(os.path.join(ui_dir, "*.qml")))
+
+
+def cache_dir() -> str:
+    """当前应用名下的 QML 磁盘缓存目录（需在 QApplication 创建后调用）"""
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "qmlcache")
+
+
+def fingerprint(paths) -> str:
+    """QML 文件的路径、大小与修改时间摘要：文件或安装位置变化后预热结果失效"""
+    digest = hashlib.md5()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}|{stat.st_size}|{stat.st_mtime}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _marker_path() -> str:
+    return os.path.join(cache_dir(), MARKER_NAME)
+
+
+def is_warm(ui_dir: str = UI_DIR) -> bool:
+    """当前 QML 文件是否已在本机预热过"""
+    try:
+        with open(_marker_path(), "r", encoding="utf-8") as handle:
+            return handle.read().strip() == fingerprint(qml_files(ui_dir))
+    except OSError:
+        return False
+
+
+def compile_qml(engine, path: str):
+    """编译单个QML文件（只编译不实例化），返回 (是否成功, 耗时毫秒, 错误列表)"""
+    start = time.perf_counter()
+    component = QQmlComponent(engine, QUrl.fromLocalFile(os.path.abspath(path)))
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    errors = [error.toString() for error in component.errors()]
+    return component.status() == QQmlComponent.Ready, elapsed_ms, errors
+
+
+def warm_qml_cache(engine, ui_dir: str = UI_DIR):
+    """编译 ui_dir 下全部 QML 文件写入磁盘缓存，全部成功时记录指纹；返回 [(路径, 是否成功, 耗时毫秒, 错误)]"""
+    paths = qml_files(ui_dir)
+    results = [(path,) + compile_qml(engine, path) for path in paths]
+    if paths and all(ok for _, ok, _, _ in results):
+        try:
+            os.makedirs(cache_dir(), exist_ok=True)
+            with open(_marker_path(), "w", encoding="utf-8") as handle:
+                handle.write(fingerprint(paths))
+        except OSError as e:
+            print(f"[WARN] QML缓存预热标记写入失败: {e}")
+    return results
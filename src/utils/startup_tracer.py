@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+启动过程计时模块 - 记录各启动阶段的墙钟时间与CPU时间，可输出JSON报告
+
+用法：
+    from src.utils.startup_tracer import tracer
+
+    with tracer.phase("init_qgis"):
+        qgs.initQgis()
+
+    tracer.begin("sample_data")   # 跨越事件循环的异步阶段
+    ...
+    tracer.end("sample_data")
+    tracer.mark("first_render")   # 瞬时事件
+
+CPU 时间取自 time.process_time()，为整个进程（含后台线程）的累计值。
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class StartupTracer:
+    """启动阶段计时器"""
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._cpu_origin = time.process_time()
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.phases = []  # 已结束的阶段（按结束顺序）
+        self.marks = {}  # 事件名 -> 相对启动的毫秒数
+        self._open = {}  # 进行中的阶段名 -> (墙钟起点, CPU起点, 嵌套深度)
+        self._depth = 0
+        self._listeners = []
+        self.report_path = None
+        self.finished = False
+
+    def _now(self):
+        return time.perf_counter(), time.process_time()
+
+    def elapsed_ms(self) -> float:
+        """距启动的毫秒数"""
+        return (time.perf_counter() - self._origin) * 1000.0
+
+    def add_listener(self, callback):
+        """注册事件监听：callback(event, name)，event 为 begin / end / mark"""
+        self._listeners.append(callback)
+
+    def _notify(self, event: str, name: str):
+        for callback in list(self._listeners):
+            try:
+                callback(event, name)
+            except Exception as e:
+                print(f"[WARN] 启动计时监听出错: {e}")
+
+    def begin(self, name: str):
+        """开始一个阶段"""
+        if name in self._open:
+            return
+        wall, cpu = self._now()
+        self._open[name] = (wall, cpu, self._depth)
+        self._notify("begin", name)
+
+    def end(self, name: str):
+        """结束一个阶段（未开始的阶段忽略）"""
+        started = self._open.pop(name, None)
+        if started is None:
+            return
+        wall, cpu = self._now()
+        start_wall, start_cpu, depth = started
+        self.phases.append({
+            "name": name,
+            "start_ms": round((start_wall - self._origin) * 1000.0, 3),
+            "wall_ms": round((wall - start_wall) * 1000.0, 3),
+            "cpu_ms": round((cpu - start_cpu) * 1000.0, 3),
+            "depth": depth,
+        })
+        self._notify("end", name)
+
+    @contextmanager
+    def phase(self, name: str):
+        """同步阶段的上下文管理器，嵌套的阶段记录嵌套深度"""
+        self.begin(name)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.end(name)
+
+    def mark(self, name: str):
+        """记录瞬时事件（只记录第一次）"""
+        if name not in self.marks:
+            self.marks[name] = round(self.elapsed_ms(), 3)
+            self._notify("mark", name)
+
+    def report(self) -> dict:
+        """生成报告字典"""
+        return {
+            "started_at": self.started_at,
+            "total_ms": round(self.elapsed_ms(), 3),
+            "total_cpu_ms": round((time.process_time() - self._cpu_origin) * 1000.0, 3),
+            "phases": sorted(self.phases, key=lambda p: p["start_ms"]),
+            "unfinished": sorted(self._open),
+            "marks": dict(self.marks),
+            "environment": {
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+            },
+        }
+
+    def write_report(self, path: str):
+        """将报告写入JSON文件"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        print(f"启动报告已写入: {path}")
+
+    def print_summary(self):
+        """在控制台输出各阶段耗时"""
+        print("\n=== 启动阶段耗时 ===")
+        for item in sorted(self.phases, key=lambda p: p["start_ms"]):
+            indent = "  " * item["depth"]
+            print(f"{indent}{item['name']}: {item['wall_ms']:.1f}ms (CPU {item['cpu_ms']:.1f}ms)")
+        for name, at in self.marks.items():
+            print(f"{name}: 启动后 {at:.1f}ms")
+
+    def finish(self):
+        """启动结束：输出汇总，设置了报告路径时写入报告（只执行一次）"""
+        if self.finished:
+            return
+        self.finished = True
+        self.print_summary()
+        if self.report_path:
+            try:
+                self.write_report(self.report_path)
+            except OSError as e:
+                print(f"[WARN] 启动报告写入失败: {e}")
+
+
+# 全局启动计时器：在 main.py 最先导入，起点即进程启动
+tracer = StartupTracer()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+统计工具模块 - 固定窗口的滚动直方图，用于记录渲染耗时等指标
+"""
+
+import bisect
+import math
+from collections import deque
+
+
+class RollingHistogram:
+    """保留最近 window 个样本的滚动直方图"""
+
+    def __init__(self, window: int = 200, buckets=None):
+        self._values = deque(maxlen=window)
+        # 直方图分桶上界（升序）；最后一个桶收集超过最大上界的样本
+        self.buckets = tuple(buckets) if buckets else ()
+        self.total_count = 0  # 累计样本数（含已移出窗口的）
+
+    def add(self, value: float):
+        self._values.append(value)
+        self.total_count += 1
+
+    def clear(self):
+        self._values.clear()
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def last(self):
+        return self._values[-1] if self._values else None
+
+    def mean(self) -> float:
+        return sum(self._values) / len(self._values) if self._values else 0.0
+
+    def percentile(self, p: float) -> float:
+        """百分位数（p 取 0~100，最近秩法）"""
+        if not self._values:
+            return 0.0
+        ordered = sorted(self._values)
+        index = min(len(ordered) - 1, max(0, math.ceil(p * len(ordered) / 100.0) - 1))
+        return ordered[index]
+
+    def histogram(self):
+        """各分桶的样本数：[(上界, 数量)]，最后一项上界为 None"""
+        counts = [0] * (len(self.buckets) + 1)
+        for value in self._values:
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+        return list(zip(self.buckets + (None,), counts))
+
+    def summary(self) -> dict:
+        """窗口内样本的汇总"""
+        if not self._values:
+            return {"count": 0, "total": self.total_count}
+        return {
+            "count": len(self._values),
+            "total": self.total_count,
+            "last": self._values[-1],
+            "mean": self.mean(),
+            "min": min(self._values),
+            "max": max(self._values),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
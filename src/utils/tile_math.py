@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+瓦片坐标工具模块 - Web墨卡托（XYZ）瓦片与经纬度之间的换算
+"""
+
+import math
+
+MAX_LATITUDE = 85.0511287798066  # Web墨卡托可表示的最大纬度
+EARTH_RADIUS = 6378137.0  # WGS84 长半轴（米）
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS  # 墨卡托平面半宽（米）
+
+
+def clamp_latitude(lat: float) -> float:
+    """将纬度限制在Web墨卡托有效范围内"""
+    return max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+
+
+def lonlat_to_tile_fraction(lon: float, lat: float, z: int):
+    """经纬度转瓦片坐标（带小数，便于计算与瓦片中心的距离）"""
+    n = 1 << z
+    lat_rad = math.radians(clamp_latitude(lat))
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return x, y
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int):
+    """经纬度转所在瓦片的 (x, y)"""
+    n = 1 << z
+    x, y = lonlat_to_tile_fraction(lon, lat, z)
+    return min(n - 1, max(0, int(x))), min(n - 1, max(0, int(y)))
+
+
+def tile_to_lonlat(x: float, y: float, z: int):
+    """瓦片坐标（左上角）转经纬度"""
+    n = 1 << z
+    lon = x / n * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * y / n))))
+    return lon, lat
+
+
+def tile_bounds(z: int, x: int, y: int):
+    """瓦片的经纬度范围 (west, south, east, north)"""
+    west, north = tile_to_lonlat(x, y, z)
+    east, south = tile_to_lonlat(x + 1, y + 1, z)
+    return west, south, east, north
+
+
+def tile_mercator_bounds(z: int, x: int, y: int):
+    """瓦片的Web墨卡托（EPSG:3857）范围 (xmin, ymin, xmax, ymax)"""
+    size = 2.0 * ORIGIN_SHIFT / (1 << z)
+    xmin = -ORIGIN_SHIFT + x * size
+    ymax = ORIGIN_SHIFT - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def tile_range(bounds, z: int):
+    """经纬度范围 (west, south, east, north) 覆盖的瓦片范围 (xmin, ymin, xmax, ymax)"""
+    west, south, east, north = bounds
+    xmin, ymin = lonlat_to_tile(west, north, z)
+    xmax, ymax = lonlat_to_tile(east, south, z)
+    return xmin, ymin, xmax, ymax
+
+
+def mercator_to_lonlat(mx: float, my: float):
+    """Web墨卡托坐标转经纬度"""
+    lon = mx / ORIGIN_SHIFT * 180.0
+    lat = math.degrees(2.0 * math.atan(math.exp(my / EARTH_RADIUS)) - math.pi / 2.0)
+    return lon, lat
+
+
+def zoom_for_resolution(degrees_per_pixel: float, tile_size: int = 256) -> int:
+    """根据每像素经度跨度估算对应的瓦片缩放级别"""
+    if degrees_per_pixel <= 0:
+        return 0
+    z = math.log2(360.0 / (tile_size * degrees_per_pixel))
+    return max(0, min(22, int(round(z))))
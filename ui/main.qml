@@ -28,6 +28,8 @@ Item {
         border.width: 0
 
         Row {
+            // 按钮区域：叠加层只在该区域内拦截鼠标
+            objectName: "headerButtons"
             anchors.fill: parent
             anchors.margins: 8
             spacing: 12
@@ -179,20 +181,104 @@ Item {
 
             Item { width: 16; height: 1 }
 
+            // 取消后台加载（仅在加载时显示）
+            Rectangle {
+                id: btnCancel
+                width: 92; height: 34
+                radius: 6
+                border.width: 1
+                visible: qgisBridge ? qgisBridge.loading : false
+                property bool hovered: false
+                property bool pressed: false
+                color: btnFillColor(hovered, pressed)
+                border.color: btnBorderColor(hovered)
+                anchors.verticalCenter: parent.verticalCenter
+                Text { 
+                    anchors.centerIn: parent
+                    text: "取消加载"
+                    color: Qt.rgba(0.2, 0.2, 0.2, 1)
+                }
+                MouseArea {
+                    anchors.fill: parent
+                    hoverEnabled: true
+                    onEntered: btnCancel.hovered = true
+                    onExited: { btnCancel.hovered = false; btnCancel.pressed = false }
+                    onPressed: btnCancel.pressed = true
+                    onReleased: btnCancel.pressed = false
+                    onClicked: {
+                        qgisBridge && qgisBridge.cancelLoading()
+                    }
+                }
+            }
+
+            // 后台加载进度条（仅在加载且进度已知时显示）
+            Rectangle {
+                id: loadingProgressBar
+                width: 96; height: 6
+                radius: 3
+                visible: qgisBridge ? (qgisBridge.loading && qgisBridge.loadingProgress >= 0) : false
+                color: Qt.rgba(0.8, 0.8, 0.8, 1)
+                anchors.verticalCenter: parent.verticalCenter
+                Rectangle {
+                    width: parent.width * Math.min(100, qgisBridge ? Math.max(0, qgisBridge.loadingProgress) : 0) / 100
+                    height: parent.height
+                    radius: parent.radius
+                    color: Qt.rgba(0.1, 0.35, 0.6, 1)
+                }
+            }
+
             // 状态文本，显示来自Python的状态
             Text {
                 id: statusText
-                text: ""
+                text: qgisBridge ? qgisBridge.status : ""
                 color: Qt.rgba(0.4, 0.4, 0.4, 1)
                 verticalAlignment: Text.AlignVCenter
                 anchors.verticalCenter: parent.verticalCenter
             }
 
+            // 渲染性能统计开关
+            Rectangle {
+                id: btnStats
+                width: 56; height: 34
+                radius: 6
+                border.width: 1
+                property bool hovered: false
+                property bool pressed: false
+                property bool checked: false
+                color: checked ? btnFillColor(true, true) : btnFillColor(hovered, pressed)
+                border.color: btnBorderColor(hovered)
+                anchors.verticalCenter: parent.verticalCenter
+                Text { 
+                    anchors.centerIn: parent
+                    text: "性能"
+                    color: Qt.rgba(0.2, 0.2, 0.2, 1)
+                }
+                MouseArea {
+                    anchors.fill: parent
+                    hoverEnabled: true
+                    onEntered: btnStats.hovered = true
+                    onExited: { btnStats.hovered = false; btnStats.pressed = false }
+                    onPressed: btnStats.pressed = true
+                    onReleased: btnStats.pressed = false
+                    onClicked: btnStats.checked = !btnStats.checked
+                }
+            }
+
+            // 渲染统计文本（打开“性能”后显示）
+            Text {
+                id: renderStatsText
+                text: ""
+                visible: btnStats.checked
+                color: Qt.rgba(0.1, 0.35, 0.6, 1)
+                verticalAlignment: Text.AlignVCenter
+                anchors.verticalCenter: parent.verticalCenter
+            }
+
             // 通过 Connections 监听 Python 发射的信号
             Connections {
                 target: qgisBridge
-                onStatusChanged: function(msg) {
-                    statusText.text = msg
+                onRenderStatsChanged: function(text) {
+                    renderStatsText.text = text
                 }
             }
         }
@@ -0,0 +1,34 @@
+import QtQuick 2.15
+
+// 叠加层宿主：顶部控制条、右下角工具栏与底部回放时间轴共用同一个 QML 场景和渲染目标
+// 各部分均异步加载（incubate），不阻塞地图画布的首帧
+Item {
+    id: overlayRoot
+
+    Loader {
+        id: headerLoader
+        objectName: "headerLoader"
+        anchors.fill: parent
+        asynchronous: true
+        source: "main.qml"
+        onLoaded: qgisBridge && qgisBridge.notifyOverlayLoaded(objectName)
+    }
+
+    Loader {
+        id: toolsLoader
+        objectName: "toolsLoader"
+        anchors.fill: parent
+        asynchronous: true
+        source: "tools.qml"
+        onLoaded: qgisBridge && qgisBridge.notifyOverlayLoaded(objectName)
+    }
+
+    Loader {
+        id: timelineLoader
+        objectName: "timelineLoader"
+        anchors.fill: parent
+        asynchronous: true
+        source: "timeline.qml"
+        onLoaded: qgisBridge && qgisBridge.notifyOverlayLoaded(objectName)
+    }
+}
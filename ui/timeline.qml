@@ -0,0 +1,183 @@
+import QtQuick 2.15
+
+// 轨迹回放时间轴：回放模式下显示在底部
+// 滑块上的蓝色区间为显示的时间窗口 [t0, t1]：拖动两端调整窗口，拖动中间平移窗口，
+// 点击空白处把窗口移到该时刻。窗口位置由 Python 端确定后通过属性绑定回显。
+Item {
+    id: timelineRoot
+    anchors.fill: parent
+
+    property bool active: qgisBridge ? qgisBridge.playbackActive : false
+    property real rangeStart: qgisBridge ? qgisBridge.playbackStart : 0
+    property real rangeEnd: qgisBridge ? qgisBridge.playbackEnd : 1
+    property real t0: qgisBridge ? qgisBridge.playbackT0 : 0
+    property real t1: qgisBridge ? qgisBridge.playbackT1 : 1
+
+    function toX(t) {
+        if (rangeEnd <= rangeStart) return 0
+        return (t - rangeStart) / (rangeEnd - rangeStart) * track.width
+    }
+    function toTime(x) {
+        return rangeStart + Math.max(0, Math.min(1, x / track.width)) * (rangeEnd - rangeStart)
+    }
+    function formatTime(t) {
+        return Qt.formatDateTime(new Date(t * 1000), "yyyy-MM-dd hh:mm:ss")
+    }
+    function setWindow(a, b) {
+        qgisBridge && qgisBridge.setPlaybackWindow(a, b)
+    }
+
+    Rectangle {
+        id: panel
+        // 时间轴区域：叠加层只在该区域内拦截鼠标
+        objectName: "timelinePanel"
+        visible: timelineRoot.active
+        anchors.left: parent.left
+        anchors.right: parent.right
+        anchors.bottom: parent.bottom
+        anchors.leftMargin: 16
+        anchors.rightMargin: 88     // 让出右下角工具栏
+        anchors.bottomMargin: 16
+        height: 64
+        radius: 8
+        color: Qt.rgba(1, 1, 1, 0.92)
+        border.width: 1
+        border.color: Qt.rgba(0, 0, 0, 0.15)
+
+        // 播放/暂停
+        Rectangle {
+            id: btnPlay
+            width: 40; height: 40; radius: 20
+            anchors.left: parent.left
+            anchors.leftMargin: 12
+            anchors.verticalCenter: parent.verticalCenter
+            property bool hovered: false
+            color: hovered ? Qt.rgba(0.94, 0.97, 1, 1) : Qt.rgba(1, 1, 1, 1)
+            border.width: 1; border.color: Qt.rgba(0, 0, 0, 0.15)
+            Text {
+                anchors.centerIn: parent
+                text: qgisBridge && qgisBridge.playing ? "⏸" : "▶"
+                color: Qt.rgba(0.2, 0.2, 0.2, 1)
+            }
+            MouseArea { anchors.fill: parent; hoverEnabled: true
+                onEntered: parent.hovered = true
+                onExited: parent.hovered = false
+                onClicked: { qgisBridge && qgisBridge.togglePlayback() }
+            }
+        }
+
+        // 退出回放
+        Rectangle {
+            id: btnClose
+            width: 28; height: 28; radius: 14
+            anchors.right: parent.right
+            anchors.rightMargin: 12
+            anchors.verticalCenter: parent.verticalCenter
+            property bool hovered: false
+            color: hovered ? Qt.rgba(1, 0.93, 0.93, 1) : Qt.rgba(1, 1, 1, 1)
+            border.width: 1; border.color: Qt.rgba(0, 0, 0, 0.15)
+            Text { anchors.centerIn: parent; text: "✕"; color: Qt.rgba(0.4, 0.4, 0.4, 1) }
+            MouseArea { anchors.fill: parent; hoverEnabled: true
+                onEntered: parent.hovered = true
+                onExited: parent.hovered = false
+                onClicked: { qgisBridge && qgisBridge.closePlayback() }
+            }
+        }
+
+        // 窗口起止时间
+        Text {
+            id: windowText
+            anchors.left: track.left
+            anchors.top: parent.top
+            anchors.topMargin: 8
+            text: formatTime(timelineRoot.t0) + "  —  " + formatTime(timelineRoot.t1)
+            color: Qt.rgba(0.3, 0.3, 0.3, 1)
+        }
+
+        Item {
+            id: track
+            anchors.left: btnPlay.right
+            anchors.right: btnClose.left
+            anchors.leftMargin: 16
+            anchors.rightMargin: 16
+            anchors.bottom: parent.bottom
+            anchors.bottomMargin: 10
+            height: 20
+
+            // 点击空白处：窗口中心移到该时刻
+            Rectangle {
+                anchors.left: parent.left
+                anchors.right: parent.right
+                anchors.verticalCenter: parent.verticalCenter
+                height: 4; radius: 2
+                color: Qt.rgba(0.8, 0.8, 0.8, 1)
+            }
+            MouseArea {
+                anchors.fill: parent
+                onPressed: {
+                    var half = (timelineRoot.t1 - timelineRoot.t0) / 2
+                    var t = toTime(mouse.x)
+                    setWindow(t - half, t + half)
+                }
+            }
+
+            // 时间窗口：拖动平移
+            Rectangle {
+                id: windowBar
+                x: toX(timelineRoot.t0)
+                width: Math.max(2, toX(timelineRoot.t1) - toX(timelineRoot.t0))
+                anchors.verticalCenter: parent.verticalCenter
+                height: 8; radius: 4
+                color: Qt.rgba(0.2, 0.5, 0.9, 0.85)
+                MouseArea {
+                    anchors.fill: parent
+                    property real pressX: 0
+                    property real pressT0: 0
+                    property real pressT1: 0
+                    onPressed: {
+                        pressX = mapToItem(track, mouse.x, mouse.y).x
+                        pressT0 = timelineRoot.t0
+                        pressT1 = timelineRoot.t1
+                    }
+                    onPositionChanged: {
+                        var dt = (mapToItem(track, mouse.x, mouse.y).x - pressX) / track.width
+                                 * (timelineRoot.rangeEnd - timelineRoot.rangeStart)
+                        setWindow(pressT0 + dt, pressT1 + dt)
+                    }
+                }
+            }
+
+            // 窗口起点
+            Rectangle {
+                x: toX(timelineRoot.t0) - width / 2
+                width: 10; height: 20; radius: 3
+                color: Qt.rgba(1, 1, 1, 1)
+                border.width: 1; border.color: Qt.rgba(0.2, 0.5, 0.9, 1)
+                MouseArea {
+                    anchors.fill: parent
+                    anchors.margins: -4
+                    onPositionChanged: {
+                        var t = toTime(mapToItem(track, mouse.x, mouse.y).x)
+                        setWindow(Math.min(t, timelineRoot.t1), timelineRoot.t1)
+                    }
+                }
+            }
+
+            // 窗口终点
+            Rectangle {
+                x: toX(timelineRoot.t1) - width / 2
+                width: 10; height: 20; radius: 3
+                color: Qt.rgba(1, 1, 1, 1)
+                border.width: 1; border.color: Qt.rgba(0.2, 0.5, 0.9, 1)
+                MouseArea {
+                    anchors.fill: parent
+                    anchors.margins: -4
+                    onPositionChanged: {
+                        var t = toTime(mapToItem(track, mouse.x, mouse.y).x)
+                        setWindow(timelineRoot.t0, Math.max(t, timelineRoot.t0))
+                    }
+                }
+            }
+        }
+    }
+}
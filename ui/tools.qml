@@ -7,7 +7,10 @@ Item {
     // 容器：右下角
     Rectangle {
         id: container
+        // 按钮区域：叠加层只在该区域内拦截鼠标
+        objectName: "toolsPanel"
         width: 56
+        height: col.height
         color: Qt.rgba(0,0,0,0)
         border.color: Qt.rgba(0,0,0,0)
         border.width: 0
@@ -104,20 +107,21 @@ Item {
                 }
             }
 
-            // 6) 测量（占位）
+            // 6) 测量（启用时高亮）
             Rectangle {
                 width: 44; height: 44; radius: 22
                 property bool hovered: false
                 property bool pressed: false
-                color: hovered ? (pressed ? Qt.rgba(0.94,0.97,1,0.98) : Qt.rgba(1,1,1,0.98)) : Qt.rgba(1,1,1,0.92)
-                border.width: 1; border.color: Qt.rgba(0,0,0,0.15)
+                property bool active: qgisBridge ? qgisBridge.measuring : false
+                color: active ? Qt.rgba(0.85,0.92,1,0.98) : (hovered ? (pressed ? Qt.rgba(0.94,0.97,1,0.98) : Qt.rgba(1,1,1,0.98)) : Qt.rgba(1,1,1,0.92))
+                border.width: 1; border.color: active ? Qt.rgba(0.2,0.45,0.85,0.8) : Qt.rgba(0,0,0,0.15)
                 Text { anchors.centerIn: parent; text: "📏";   color: Qt.rgba(0.2,0.2,0.2,1) }
                 MouseArea { anchors.fill: parent; hoverEnabled: true
                     onEntered: parent.hovered = true
                     onExited: { parent.hovered=false; parent.pressed=false }
                     onPressed: parent.pressed = true
                     onReleased: parent.pressed = false
-                    onClicked: { /* 预留测量 */ }
+                    onClicked: { qgisBridge && qgisBridge.toggleMeasure() }
                 }
             }
         }